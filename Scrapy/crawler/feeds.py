@@ -0,0 +1,84 @@
+"""
+Feed export configuration for the Animals spider.
+
+The default feed is a single JSON array that is overwritten on each run.
+The JSON Lines mode appends one record per line, so a crawl that dies
+mid-write leaves every completed record readable; it can optionally be
+gzip or zstd compressed (each run appends a new compressed frame).
+"""
+import os
+
+FEED_FORMATS = ('json', 'jsonlines')
+FEED_COMPRESSIONS = ('none', 'gzip', 'zstd')
+
+COMPRESSION_SUFFIXES = {
+    'none': '',
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+COMPRESSION_PLUGINS = {
+    'gzip': 'scrapy.extensions.postprocessing.GzipPlugin',
+    'zstd': 'crawler.feeds.ZstdPlugin',
+}
+
+
+def build_feeds(data_dir, feed_format=None, compression=None):
+    """Build the Scrapy FEEDS setting for the requested format.
+
+    ``feed_format`` and ``compression`` default to the ``FEED_FORMAT`` and
+    ``FEED_COMPRESSION`` environment variables.
+    """
+    feed_format = feed_format or os.environ.get('FEED_FORMAT', 'json')
+    compression = compression or os.environ.get('FEED_COMPRESSION', 'none')
+
+    if feed_format not in FEED_FORMATS:
+        raise ValueError(f"Unknown feed format: {feed_format!r} (expected one of {FEED_FORMATS})")
+    if compression not in FEED_COMPRESSIONS:
+        raise ValueError(f"Unknown feed compression: {compression!r} (expected one of {FEED_COMPRESSIONS})")
+
+    if feed_format == 'json':
+        if compression != 'none':
+            raise ValueError("Compression is only supported for the jsonlines feed format")
+        return {
+            os.path.join(data_dir, 'animals.json'): {
+                'format': 'json',
+                'encoding': 'utf-8',
+                'overwrite': True,
+            },
+        }
+
+    options = {
+        'format': 'jsonlines',
+        'encoding': 'utf-8',
+        # Append: records from an interrupted crawl are kept
+        'overwrite': False,
+    }
+    if compression != 'none':
+        options['postprocessing'] = [COMPRESSION_PLUGINS[compression]]
+
+    path = os.path.join(data_dir, 'animals.jsonl' + COMPRESSION_SUFFIXES[compression])
+    return {path: options}
+
+
+class ZstdPlugin:
+    """Scrapy feed post-processing plugin compressing the feed with zstd.
+
+    Mirrors ``scrapy.extensions.postprocessing.GzipPlugin``. The compression
+    level is read from the ``zstd_level`` feed option (default 3).
+    """
+
+    def __init__(self, file, feed_options):
+        import zstandard
+
+        self.file = file
+        self.feed_options = feed_options
+        level = self.feed_options.get('zstd_level', 3)
+        self.zstdfile = zstandard.ZstdCompressor(level=level).stream_writer(self.file, closefd=False)
+
+    def write(self, data):
+        return self.zstdfile.write(data)
+
+    def close(self):
+        self.zstdfile.close()
+        self.file.close()
@@ -0,0 +1,34 @@
+"""
+End of an ingest: new data version and columnar snapshot.
+
+Every writer of the animals collection (crawl, import, enrichment, keyword
+tags, dedup merge) finishes with ``finish_ingest``, so the Webapp caches
+keyed on the data version and the snapshot read in DATA_MODE=snapshot never
+lag behind MongoDB.
+"""
+import os
+
+from datastore.changes import bump_data_version
+
+from crawler.snapshot import export_collection
+
+# Snapshot lu par la Webapp (DATA_MODE=snapshot)
+SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'animals.arrow'
+)
+
+
+def finish_ingest(collection, snapshot_path=SNAPSHOT_PATH):
+    """Publish a new data version and re-export the snapshot of ``collection``.
+
+    Returns ``(version, rows)``; ``rows`` is None when no snapshot was written
+    (no ``snapshot_path``, or pyarrow is not installed).
+    """
+    version = bump_data_version(collection.database)
+    rows = None
+    if snapshot_path:
+        try:
+            rows = export_collection(collection, snapshot_path)
+        except ImportError:
+            pass
+    return version, rows
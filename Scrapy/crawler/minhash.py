@@ -0,0 +1,192 @@
+"""
+Near-duplicate detection with MinHash and locality-sensitive hashing.
+
+Each animal is fingerprinted by the word shingles of its text fields. The
+MinHash signature estimates the Jaccard similarity between two animals, and
+the LSH index (signature split into bands) only compares animals sharing at
+least one band, so finding duplicates is roughly linear in the number of
+animals instead of pairwise.
+"""
+import hashlib
+import random
+import re
+import struct
+
+# Champs texte utilisés pour l'empreinte d'un animal
+FINGERPRINT_FIELDS = ('description', 'habitat', 'diet')
+FINGERPRINT_LIST_FIELDS = ('key_facts',)
+# Champs liste dédoublonnés à l'intérieur d'un même animal
+LIST_FIELDS = ('key_facts', 'locations')
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize(value):
+    """Normalized form used to compare list entries ("Solitary " == "solitary")."""
+    return ' '.join(value.split()).lower() if isinstance(value, str) else value
+
+
+def dedupe_list(values):
+    """Remove repeated entries, keeping the first spelling and the order."""
+    if not values:
+        return values
+    seen = set()
+    result = []
+    for value in values:
+        key = normalize(value)
+        if key in seen:
+            continue
+        seen.add(key)
+        result.append(value)
+    return result
+
+
+def dedupe_list_fields(doc):
+    """Return the list fields of ``doc`` that change once deduplicated."""
+    changes = {}
+    for field in LIST_FIELDS:
+        values = doc.get(field)
+        if isinstance(values, list):
+            deduped = dedupe_list(values)
+            if len(deduped) != len(values):
+                changes[field] = deduped
+    return changes
+
+
+def fingerprint_text(doc):
+    """Concatenate the text fields an animal is fingerprinted on."""
+    parts = [doc.get(field) or '' for field in FINGERPRINT_FIELDS]
+    for field in FINGERPRINT_LIST_FIELDS:
+        parts.extend(v for v in (doc.get(field) or []) if isinstance(v, str))
+    facts = doc.get('facts')
+    if isinstance(facts, dict):
+        parts.extend(str(v) for v in facts.values())
+    return ' '.join(parts)
+
+
+def shingles(text, size=3):
+    """Set of hashed word ``size``-grams of ``text``."""
+    tokens = TOKEN_RE.findall(text.lower())
+    if len(tokens) < size:
+        grams = [' '.join(tokens)] if tokens else []
+    else:
+        grams = [' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    return {
+        struct.unpack('<I', hashlib.blake2b(g.encode('utf-8'), digest_size=4).digest())[0]
+        for g in grams
+    }
+
+
+class MinHasher:
+    """Compute fixed-size MinHash signatures with universal hash permutations."""
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.permutations = [
+            (rng.randint(1, MERSENNE_PRIME - 1), rng.randint(0, MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, hashes):
+        """MinHash signature (tuple of num_perm ints) of a set of shingle hashes."""
+        if not hashes:
+            return None
+        return tuple(
+            min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        )
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures.
+
+    With ``bands`` bands of ``rows`` rows, two items become candidates with
+    probability ``1 - (1 - s**rows) ** bands`` for a similarity ``s``; the
+    defaults (16 x 8) put the threshold around 0.7.
+    """
+
+    def __init__(self, num_perm=128, bands=16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def candidates(self, signature):
+        """Keys sharing at least one band with ``signature``."""
+        found = set()
+        for band, key in self._band_keys(signature):
+            found.update(self.buckets[band].get(key, ()))
+        return found
+
+    def query(self, signature, threshold):
+        """Return (key, similarity) of indexed items at least ``threshold`` similar, best first."""
+        matches = [
+            (key, similarity(signature, self.signatures[key]))
+            for key in self.candidates(signature)
+        ]
+        matches = [m for m in matches if m[1] >= threshold]
+        return sorted(matches, key=lambda m: -m[1])
+
+    def insert(self, key, signature):
+        self.signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self.buckets[band].setdefault(band_key, []).append(key)
+
+
+class NearDuplicateDetector:
+    """Stream animals through MinHash/LSH and group near-duplicates in clusters.
+
+    The first animal of a cluster is its representative; documents with too
+    little text to fingerprint reliably (fewer than ``min_shingles``) are
+    never matched.
+    """
+
+    def __init__(self, threshold=0.7, num_perm=128, bands=16, min_shingles=5):
+        self.threshold = threshold
+        self.min_shingles = min_shingles
+        self.hasher = MinHasher(num_perm)
+        self.index = LSHIndex(num_perm, bands)
+        self.clusters = {}
+
+    def add(self, key, doc):
+        """Index ``doc`` under ``key``; return (representative, similarity) if it is a near-duplicate."""
+        hashes = shingles(fingerprint_text(doc))
+        if len(hashes) < self.min_shingles:
+            return None
+        signature = self.hasher.signature(hashes)
+        matches = self.index.query(signature, self.threshold)
+        if matches:
+            representative, score = matches[0]
+            self.clusters.setdefault(representative, []).append((key, score))
+            return representative, score
+        self.index.insert(key, signature)
+        return None
+
+    def report(self, labels=None):
+        """Merged clusters as JSON-serialisable dicts."""
+        labels = labels or {}
+        return [
+            {
+                'representative': rep,
+                'representative_name': labels.get(rep),
+                'duplicates': [
+                    {'key': key, 'name': labels.get(key), 'similarity': round(score, 3)}
+                    for key, score in duplicates
+                ],
+            }
+            for rep, duplicates in self.clusters.items()
+        ]
@@ -1,74 +1,381 @@
 """
-MongoDB Pipeline for Scrapy.
-Inserts scraped animal data into MongoDB.
+Item pipelines for Scrapy.
+Records crawl state, validates and deduplicates scraped animal data, inserts
+it into MongoDB and indexes it in Elasticsearch.
 """
+import json
 import os
-from pymongo import MongoClient
+from datetime import datetime, timedelta, timezone
+
 from pymongo.errors import ConnectionFailure
+from scrapy import signals
+from scrapy.exceptions import DropItem
+
+from datastore import settings as datastore_settings
+from datastore.bulk import BulkWriter
+from datastore.client import close_client, get_client, ping
+from datastore.facets import ensure_location_index, refresh_location_counts
+from datastore.taxonomy import ensure_taxonomy_index, refresh_taxonomy, taxonomy_path
+from crawler.ingest import finish_ingest
+from crawler.minhash import NearDuplicateDetector, dedupe_list_fields
+from crawler.recrawl import RecrawlScheduler, content_hash
+from crawler.search_index import ElasticsearchIndexer
+from crawler.validation import compile_optional_fields, compile_schema
+from profiling.profiler import profiled
+
+
+def stamped_update(doc):
+    """Build an update pipeline that sets ``doc`` and stamps real changes.
+
+    ``updated_at`` (server time) and ``revision`` only move when one of the
+    stored fields differs from ``doc``, so re-scraping an unchanged page does
+    not make downstream syncs ship it again. The comparison is made against
+    the stored document rather than the last scraped hash: a re-crawl
+    overwriting fields set since by enrich_data.py is a change too.
+    """
+    digest = content_hash(doc)
+    fields = {key: {'$literal': value} for key, value in doc.items()}
+    unchanged = {'$and': [{'$eq': [f'${key}', value]} for key, value in fields.items()]}
+    fields.update({
+        'content_hash': digest,
+        'updated_at': {'$cond': [unchanged, '$updated_at', '$$NOW']},
+        'revision': {'$cond': [unchanged, '$revision', {'$add': [{'$ifNull': ['$revision', 0]}, 1]}]},
+    })
+    return [{'$set': fields}]
+
+
+class SharedClientPipeline:
+    """Base of the pipelines writing through the shared MongoDB client.
+
+    Scrapy closes pipelines in reverse priority order, so a pipeline closing
+    the client in ``close_spider`` would break the final flushes of the
+    pipelines closed after it. The client is closed on ``spider_closed``
+    instead, which is sent once every pipeline has been closed.
+    """
+
+    mongo_uri = None
+
+    @classmethod
+    def connect_signals(cls, crawler, pipeline):
+        crawler.signals.connect(pipeline.spider_closed, signal=signals.spider_closed)
+        return pipeline
+
+    def spider_closed(self, spider):
+        """Close the shared client (a no-op for the pipelines after the first)."""
+        close_client(self.mongo_uri)
 
 
-class MongoDBPipeline:
-    """Pipeline to store scraped items in MongoDB."""
+class CrawlStatePipeline(SharedClientPipeline):
+    """Pipeline owning the crawl state of the animal pages.
 
-    def __init__(self, mongo_uri, mongo_db, mongo_collection):
+    Attaches the recrawl scheduler (see crawler.recrawl) to the spider as
+    ``spider.recrawl``. The spider records every fetch through it from its
+    detail callback and errback, so redirected and failed pages are recorded
+    under the URL that was requested; the scheduler plans the budget mode
+    runs from that state.
+    """
+
+    def __init__(self, mongo_uri, mongo_db, discovery_interval, batch_size=100):
+        self.mongo_uri = mongo_uri
+        self.mongo_db = mongo_db
+        self.discovery_interval = discovery_interval
+        self.batch_size = batch_size
+        self.scheduler = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Create pipeline instance from Scrapy settings."""
+        return cls.connect_signals(crawler, cls(
+            mongo_uri=crawler.settings.get('MONGO_URI', datastore_settings.MONGODB_URI),
+            mongo_db=crawler.settings.get('MONGO_DB', datastore_settings.DATABASE_NAME),
+            discovery_interval=timedelta(hours=crawler.settings.getfloat('RECRAWL_DISCOVERY_INTERVAL', 24)),
+            batch_size=crawler.settings.getint('MONGO_BULK_SIZE', 100)
+        ))
+
+    def open_spider(self, spider):
+        """Attach the recrawl scheduler to the spider."""
+        client = get_client(self.mongo_uri)
+        self.scheduler = RecrawlScheduler(client[self.mongo_db], self.discovery_interval, self.batch_size)
+        spider.recrawl = self.scheduler
+
+    def close_spider(self, spider):
+        """Flush pending crawl state writes."""
+        if self.scheduler:
+            self.scheduler.flush()
+            spider.logger.info(f"Crawl state writes: {self.scheduler.writer.stats}")
+
+
+class ValidationPipeline(SharedClientPipeline):
+    """Pipeline checking items against the animal schema (crawler.validation).
+
+    An invalid optional field (e.g. a description that is only the Latin
+    name) is cleared and logged; the animal is kept. Items that stay invalid
+    (no usable animal_name or url) are dropped and stored with the failure
+    reason in the quarantine collection, so they never reach the animals
+    collection.
+    """
+
+    def __init__(self, mongo_uri, mongo_db, quarantine_collection, batch_size=100):
+        self.mongo_uri = mongo_uri
+        self.mongo_db = mongo_db
+        self.quarantine_collection = quarantine_collection
+        self.batch_size = batch_size
+        # Schéma compilé une fois pour tout le crawl
+        self.validate = compile_schema()
+        self.optional_fields = compile_optional_fields()
+        self.cleared = 0
+        self.writer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Create pipeline instance from Scrapy settings."""
+        return cls.connect_signals(crawler, cls(
+            mongo_uri=crawler.settings.get('MONGO_URI', datastore_settings.MONGODB_URI),
+            mongo_db=crawler.settings.get('MONGO_DB', datastore_settings.DATABASE_NAME),
+            quarantine_collection=crawler.settings.get(
+                'QUARANTINE_COLLECTION', datastore_settings.QUARANTINE_COLLECTION
+            ),
+            batch_size=crawler.settings.getint('MONGO_BULK_SIZE', 100)
+        ))
+
+    def open_spider(self, spider):
+        client = get_client(self.mongo_uri)
+        self.writer = BulkWriter(client[self.mongo_db][self.quarantine_collection], self.batch_size)
+
+    def close_spider(self, spider):
+        """Flush the quarantined items."""
+        if self.cleared:
+            spider.logger.warning(f"Validation: {self.cleared} invalid optional fields cleared")
+        if self.writer:
+            self.writer.flush()
+            if self.writer.stats['inserted']:
+                spider.logger.warning(
+                    f"Validation: {self.writer.stats['inserted']} items quarantined in {self.quarantine_collection}"
+                )
+
+    @profiled()
+    def process_item(self, item, spider):
+        """Clear invalid optional fields, then drop and quarantine the item if it is still invalid."""
+        for name, check, cleared in self.optional_fields:
+            if name in item:
+                error = check(item[name])
+                if error:
+                    spider.logger.warning(f"Validation: {error}, field cleared: {item.get('url')}")
+                    item[name] = cleared
+                    self.cleared += 1
+        error = self.validate(item)
+        if error is None:
+            return item
+        self.writer.insert_one({
+            'url': item.get('url'),
+            'error': error,
+            'item': dict(item),
+            'spider': spider.name,
+            'quarantined_at': datetime.now(timezone.utc),
+        })
+        raise DropItem(f"Invalid item ({error}): {item.get('url')}")
+
+
+class DeduplicationPipeline:
+    """Pipeline removing repeated list entries and near-duplicate animals.
+
+    List fields (key_facts, locations) are deduplicated in place. Animals whose
+    MinHash fingerprint is near-identical to one already seen in this crawl are
+    dropped, and the merged clusters are written to a JSON report when the
+    spider closes.
+    """
+
+    def __init__(self, threshold, report_path):
+        self.threshold = threshold
+        self.report_path = report_path
+        self.detector = None
+        self.labels = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Create pipeline instance from Scrapy settings."""
+        return cls(
+            threshold=crawler.settings.getfloat('DEDUP_THRESHOLD', 0.7),
+            report_path=crawler.settings.get('DEDUP_REPORT_PATH')
+        )
+
+    def open_spider(self, spider):
+        self.detector = NearDuplicateDetector(threshold=self.threshold)
+
+    def close_spider(self, spider):
+        """Write the merged clusters report."""
+        report = self.detector.report(self.labels)
+        spider.logger.info(f"Deduplication: {sum(len(c['duplicates']) for c in report)} near-duplicates dropped")
+        if self.report_path and report:
+            os.makedirs(os.path.dirname(self.report_path) or '.', exist_ok=True)
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+    @profiled()
+    def process_item(self, item, spider):
+        """Clean list fields, then drop the item if it is a near-duplicate."""
+        for field, values in dedupe_list_fields(item).items():
+            item[field] = values
+
+        key = item.get('url')
+        self.labels[key] = item.get('animal_name')
+        match = self.detector.add(key, item)
+        if match:
+            representative, score = match
+            raise DropItem(f"Near-duplicate of {representative} (similarity {score:.2f}): {key}")
+        return item
+
+
+class MongoDBPipeline(SharedClientPipeline):
+    """Pipeline to store scraped items in MongoDB.
+
+    Upserts are buffered and sent with one ``bulk_write`` every
+    ``batch_size`` items (and when the spider closes). When
+    ``snapshot_path`` is set, the collection is exported to a columnar
+    snapshot for the Webapp once a crawl changed it.
+    """
+
+    def __init__(self, mongo_uri, mongo_db, mongo_collection, snapshot_path=None, batch_size=100):
         self.mongo_uri = mongo_uri
         self.mongo_db = mongo_db
         self.mongo_collection = mongo_collection
+        self.snapshot_path = snapshot_path
+        self.batch_size = batch_size
         self.client = None
         self.db = None
+        self.writer = None
 
     @classmethod
     def from_crawler(cls, crawler):
         """Create pipeline instance from Scrapy settings."""
-        return cls(
-            mongo_uri=crawler.settings.get(
-                'MONGO_URI',
-                os.environ.get('MONGO_URI', 'mongodb://localhost:27017')
-            ),
-            mongo_db=crawler.settings.get(
-                'MONGO_DB',
-                os.environ.get('MONGO_DB', 'animals_db')
+        return cls.connect_signals(crawler, cls(
+            mongo_uri=crawler.settings.get('MONGO_URI', datastore_settings.MONGODB_URI),
+            mongo_db=crawler.settings.get('MONGO_DB', datastore_settings.DATABASE_NAME),
+            mongo_collection=crawler.settings.get('MONGO_COLLECTION', datastore_settings.COLLECTION_NAME),
+            snapshot_path=crawler.settings.get(
+                'SNAPSHOT_PATH',
+                os.environ.get('SNAPSHOT_PATH')
             ),
-            mongo_collection=crawler.settings.get(
-                'MONGO_COLLECTION',
-                os.environ.get('MONGO_COLLECTION', 'animals')
-            )
-        )
+            batch_size=crawler.settings.getint('MONGO_BULK_SIZE', 100)
+        ))
 
     def open_spider(self, spider):
         """Connect to MongoDB when spider opens."""
         try:
-            self.client = MongoClient(self.mongo_uri)
-            # Test connection
-            self.client.admin.command('ping')
+            self.client = get_client(self.mongo_uri)
+            # Test connection (retried with backoff while MongoDB starts)
+            ping(self.client)
             self.db = self.client[self.mongo_db]
+            # Incremental syncs scan documents by modification time
+            self.db[self.mongo_collection].create_index('updated_at')
+            # Location filter of the Webapp (multikey index on the list field)
+            ensure_location_index(self.db[self.mongo_collection])
+            # Taxonomy drill-down (prefix queries on the materialized path)
+            ensure_taxonomy_index(self.db[self.mongo_collection])
+            # Ordered: a page scraped twice in one batch keeps its last version
+            self.writer = BulkWriter(self.db[self.mongo_collection], self.batch_size, ordered=True)
             spider.logger.info(f"Connected to MongoDB: {self.mongo_db}")
         except ConnectionFailure as e:
             spider.logger.error(f"Failed to connect to MongoDB: {e}")
             raise
 
     def close_spider(self, spider):
-        """Close MongoDB connection when spider closes."""
-        if self.client:
-            self.client.close()
-            spider.logger.info("MongoDB connection closed")
+        """Flush pending writes, publish a new data version and export the snapshot when spider closes."""
+        if self.writer:
+            self.writer.flush()
+            spider.logger.info(f"MongoDB writes: {self.writer.stats}")
+            counts = refresh_location_counts(self.db[self.mongo_collection])
+            spider.logger.info(f"Location counts refreshed ({len(counts)} locations)")
+            nodes = refresh_taxonomy(self.db[self.mongo_collection])
+            spider.logger.info(f"Taxonomy tree refreshed ({nodes} nodes)")
+            stats = self.writer.stats
+            if stats['modified'] or stats['upserted']:
+                # Caches de la Webapp invalidés et snapshot réexporté dès la fin du crawl
+                version, count = finish_ingest(self.db[self.mongo_collection], self.snapshot_path)
+                spider.logger.info(f"Data version bumped: {version.isoformat()}")
+                if count is not None:
+                    spider.logger.info(f"Snapshot written: {self.snapshot_path} ({count} animals)")
+                elif self.snapshot_path:
+                    spider.logger.warning("pyarrow is not installed, snapshot export skipped")
 
+    @profiled()
     def process_item(self, item, spider):
-        """Insert item into MongoDB collection."""
-        collection = self.db[self.mongo_collection]
-
+        """Queue the upsert of the item into MongoDB collection."""
         # Use animal_name + url as unique identifier to avoid duplicates
         filter_query = {
             'animal_name': item.get('animal_name'),
             'url': item.get('url')
         }
 
-        # Upsert: update if exists, insert if not
-        collection.update_one(
+        doc = dict(item)
+        doc['taxonomy_path'] = taxonomy_path(doc.get('classification'))
+
+        # Upsert: update if exists, insert if not (sent with the next bulk write)
+        self.writer.update_one(
             filter_query,
-            {'$set': dict(item)},
+            stamped_update(doc),
             upsert=True
         )
 
-        spider.logger.debug(f"Saved to MongoDB: {item.get('animal_name')}")
+        spider.logger.debug(f"Queued for MongoDB: {item.get('animal_name')}")
+        return item
+
+
+class ElasticsearchPipeline:
+    """Pipeline to bulk-index scraped items in Elasticsearch.
+
+    Elasticsearch is optional: if the cluster is unreachable when the spider
+    opens, the pipeline logs a warning and passes items through untouched.
+    Batches failing later on (cluster gone mid-crawl) are logged and counted
+    as failed by the indexer; items are never dropped because of them.
+    """
+
+    def __init__(self, es_url, es_index, batch_size):
+        self.es_url = es_url
+        self.es_index = es_index
+        self.batch_size = batch_size
+        self.indexer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Create pipeline instance from Scrapy settings."""
+        return cls(
+            es_url=crawler.settings.get(
+                'ES_URL',
+                os.environ.get('ELASTICSEARCH_URL', 'http://localhost:9200')
+            ),
+            es_index=crawler.settings.get(
+                'ES_INDEX',
+                os.environ.get('ES_INDEX', 'animals')
+            ),
+            batch_size=crawler.settings.getint('ES_BULK_SIZE', 500)
+        )
+
+    def open_spider(self, spider):
+        """Check the cluster and create the index when spider opens."""
+        indexer = ElasticsearchIndexer(self.es_url, self.es_index, batch_size=self.batch_size)
+        if not indexer.ping():
+            spider.logger.warning(f"Elasticsearch not reachable at {self.es_url}, indexing disabled")
+            return
+        try:
+            indexer.ensure_index()
+        except (OSError, RuntimeError) as e:
+            spider.logger.warning(f"Elasticsearch index {self.es_index} unavailable ({e}), indexing disabled")
+            return
+        self.indexer = indexer
+        spider.logger.info(f"Indexing into Elasticsearch: {self.es_index}")
+
+    def close_spider(self, spider):
+        """Flush the last batch when spider closes."""
+        if self.indexer:
+            self.indexer.close()
+            spider.logger.info(
+                f"Elasticsearch: {self.indexer.indexed} indexed, {self.indexer.failed} failed"
+            )
+
+    @profiled()
+    def process_item(self, item, spider):
+        """Queue item for the next bulk request."""
+        if self.indexer:
+            self.indexer.add(dict(item))
         return item
@@ -0,0 +1,179 @@
+"""Planification des recrawls selon la fraîcheur des pages
+
+Every animal URL has a document in the ``crawl_state`` collection:
+
+    {_id: url, animal_name, source_page, discovered_at, first_fetched,
+     last_fetched, last_changed, fetch_count, change_count, content_hash,
+     last_status, last_error}
+
+The spider records every fetch of an animal page, failures included,
+against the URL it requested (not the redirected one), with a server-side
+update pipeline (no read per fetch); ``CrawlStatePipeline`` attaches the
+scheduler to the spider and flushes it. Given a request budget, ``plan`` ranks the
+URLs: never-fetched pages first, then by the probability that the page
+changed since it was last fetched, assuming changes arrive as a Poisson
+process whose mean interval is estimated from the page's own history
+(smoothed towards PRIOR_INTERVAL while there is little of it).
+"""
+import hashlib
+import json
+import math
+from datetime import datetime, timedelta, timezone
+
+CRAWL_STATE_COLLECTION = 'crawl_state'
+# Date de la dernière découverte (pages index et lettres), dans la collection meta
+DISCOVERY_STATE_ID = 'recrawl_discovery'
+
+# Intervalle de changement supposé d'une page sans historique
+PRIOR_INTERVAL = timedelta(days=7)
+MIN_INTERVAL = timedelta(hours=1)
+# Priorité Scrapy des pages jamais récupérées (les autres : 0..1000 selon la fraîcheur)
+NEVER_FETCHED_PRIORITY = 2000
+
+
+def content_hash(doc):
+    """Hash of the scraped content, independent of key order."""
+    payload = json.dumps(doc, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def utcnow():
+    """Current time as a naive UTC datetime, like the dates MongoDB returns."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def estimated_interval(state):
+    """Mean time between two changes of the page.
+
+    The observed span is divided by the number of changes seen, with one
+    pseudo-observation of PRIOR_INTERVAL so a page fetched twice without a
+    change is not assumed to be static.
+    """
+    first, last = state.get('first_fetched'), state.get('last_fetched')
+    span = (last - first) if first and last else timedelta(0)
+    interval = (span + PRIOR_INTERVAL) / (state.get('change_count', 0) + 1)
+    return max(interval, MIN_INTERVAL)
+
+
+def staleness(state, now):
+    """Probability that the page changed since it was last fetched (2.0 if never fetched)."""
+    last = state.get('last_fetched')
+    if last is None:
+        return 2.0
+    age = max((now - last).total_seconds(), 0.0)
+    return 1.0 - math.exp(-age / estimated_interval(state).total_seconds())
+
+
+def plan(states, budget, now=None):
+    """The ``budget`` states to fetch first, most likely stale first."""
+    if budget <= 0:
+        return []
+    now = now or utcnow()
+    ranked = sorted(
+        states,
+        # À fraîcheur égale, la page la plus anciennement récupérée d'abord
+        key=lambda s: (-staleness(s, now), s.get('last_fetched') or datetime.min),
+    )
+    return ranked[:budget]
+
+
+def request_priority(state, now):
+    """Scrapy request priority for a planned state (higher is fetched first)."""
+    score = staleness(state, now)
+    return NEVER_FETCHED_PRIORITY if score > 1 else int(score * 1000)
+
+
+def discovery_update(animal_name, source_page, now):
+    """Upsert recording a URL found on a letter page (never overwrites fetch history)."""
+    return {
+        '$setOnInsert': {'discovered_at': now, 'last_fetched': None, 'fetch_count': 0, 'change_count': 0},
+        '$set': {'animal_name': animal_name, 'source_page': source_page},
+    }
+
+
+def _fetched(now, animal_name, source_page, status, error):
+    """Fields set by every fetch, successful or not."""
+    return {
+        # Nom et page source connus à la découverte sont gardés si la requête ne les porte pas
+        'animal_name': {'$ifNull': [{'$literal': animal_name}, '$animal_name']},
+        'source_page': {'$ifNull': [{'$literal': source_page}, '$source_page']},
+        'discovered_at': {'$ifNull': ['$discovered_at', now]},
+        'first_fetched': {'$ifNull': ['$first_fetched', now]},
+        'last_fetched': now,
+        'fetch_count': {'$add': [{'$ifNull': ['$fetch_count', 0]}, 1]},
+        'last_status': {'$literal': status},
+        'last_error': {'$literal': error},
+    }
+
+
+def fetch_update(digest, now, animal_name=None, source_page=None, status=200):
+    """Update pipeline recording a fetch whose scraped content hashes to ``digest``.
+
+    Evaluated on the server against the stored state, so a change (a hash
+    different from a previous one) is detected without reading it first.
+    """
+    previous = {'$ifNull': ['$content_hash', None]}
+    changed = {'$and': [{'$ne': [previous, None]}, {'$ne': [previous, digest]}]}
+    fields = _fetched(now, animal_name, source_page, status, None)
+    fields.update({
+        'last_changed': {'$cond': [changed, now, {'$ifNull': ['$last_changed', now]}]},
+        'change_count': {'$add': [{'$ifNull': ['$change_count', 0]}, {'$cond': [changed, 1, 0]}]},
+        'content_hash': digest,
+    })
+    return [{'$set': fields}]
+
+
+def failure_update(now, error, animal_name=None, source_page=None, status=None):
+    """Update pipeline recording a failed fetch (HTTP error, timeout...).
+
+    The page counts as fetched, so it is not planned again at the top
+    priority of never-fetched pages; its content history is kept.
+    """
+    return [{'$set': _fetched(now, animal_name, source_page, status, error)}]
+
+
+class RecrawlScheduler:
+    """Crawl state of the animal URLs in MongoDB."""
+
+    def __init__(self, db, discovery_interval=timedelta(hours=24), batch_size=100):
+        from datastore import settings
+        from datastore.bulk import BulkWriter
+
+        self.collection = db[CRAWL_STATE_COLLECTION]
+        self.meta = db[settings.META_COLLECTION]
+        self.discovery_interval = discovery_interval
+        # Ordonné : découverte et récupération d'une même URL peuvent partager un lot
+        self.writer = BulkWriter(self.collection, batch_size, ordered=True)
+
+    def discovery_due(self, now=None):
+        """True if the index and letter pages have not been crawled recently."""
+        state = self.meta.find_one({'_id': DISCOVERY_STATE_ID})
+        return state is None or (now or utcnow()) - state['at'] >= self.discovery_interval
+
+    def mark_discovered(self, now=None):
+        self.meta.update_one({'_id': DISCOVERY_STATE_ID}, {'$set': {'at': now or utcnow()}}, upsert=True)
+
+    def discover(self, url, animal_name, source_page, now=None):
+        """Queue the recording of a URL found on a letter page."""
+        self.writer.update_one({'_id': url}, discovery_update(animal_name, source_page, now or utcnow()), upsert=True)
+
+    def record_fetch(self, url, item, status=200, now=None):
+        """Queue the recording of the fetch of ``url`` (the requested URL) that scraped ``item``."""
+        update = fetch_update(
+            content_hash(item), now or utcnow(), item.get('animal_name'), item.get('source_page'), status
+        )
+        self.writer.update_one({'_id': url}, update, upsert=True)
+
+    def record_failure(self, url, error, animal_name=None, source_page=None, status=None, now=None):
+        """Queue the recording of a failed fetch of ``url``."""
+        update = failure_update(now or utcnow(), error, animal_name, source_page, status)
+        self.writer.update_one({'_id': url}, update, upsert=True)
+
+    def flush(self):
+        return self.writer.flush()
+
+    def plan(self, budget, now=None):
+        """States of the ``budget`` URLs to fetch in this run."""
+        self.flush()
+        projection = {'animal_name': 1, 'source_page': 1, 'first_fetched': 1, 'last_fetched': 1, 'change_count': 1}
+        return plan(self.collection.find({}, projection), budget, now)
@@ -0,0 +1,173 @@
+"""
+Elasticsearch bulk indexer for scraped animals.
+
+Talks to the Elasticsearch REST API with the standard library only: documents
+are buffered and sent in batches through the ``_bulk`` endpoint, retrying
+with exponential backoff on connection errors, 429 and 5xx responses. A
+batch that still cannot be sent is logged and counted as failed, so an
+Elasticsearch outage never interrupts the crawl; ``sync_data.py
+elasticsearch`` re-indexes the animals from MongoDB afterwards.
+"""
+import hashlib
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+
+# Champs texte servis par la recherche plein texte de la Webapp
+INDEX_MAPPINGS = {
+    'mappings': {
+        'properties': {
+            'animal_name': {'type': 'text', 'fields': {'keyword': {'type': 'keyword'}}},
+            'scientific_name': {'type': 'text'},
+            'description': {'type': 'text'},
+            'habitat': {'type': 'text'},
+            'diet': {'type': 'text'},
+            'key_facts': {'type': 'text'},
+            'conservation_status': {'type': 'keyword'},
+            'url': {'type': 'keyword'},
+        }
+    }
+}
+
+INDEXED_FIELDS = tuple(INDEX_MAPPINGS['mappings']['properties'])
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+
+logger = logging.getLogger(__name__)
+
+
+def document_id(doc):
+    """Stable document id derived from the animal URL (re-indexing is idempotent)."""
+    key = doc.get('url') or doc.get('animal_name') or ''
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class ElasticsearchIndexer:
+    """Buffer animal documents and index (or delete) them with batched ``_bulk`` requests."""
+
+    def __init__(self, url, index, batch_size=500, max_retries=3, backoff=0.5, timeout=10):
+        self.url = url.rstrip('/')
+        self.index = index
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.buffer = []
+        self.indexed = 0
+        self.deleted = 0
+        self.failed = 0
+
+    def _request(self, method, path, body=None, content_type='application/json'):
+        """Send a request and return (status, decoded JSON body)."""
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        request = urllib.request.Request(
+            self.url + path, data=data, method=method,
+            headers={'Content-Type': content_type}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read() or b'{}')
+        except urllib.error.HTTPError as e:
+            payload = e.read()
+            try:
+                return e.code, json.loads(payload or b'{}')
+            except ValueError:
+                return e.code, {}
+
+    def _request_with_retry(self, method, path, body=None, content_type='application/json'):
+        """Like _request, retrying connection errors and retryable statuses."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                status, payload = self._request(method, path, body, content_type)
+                if status not in RETRYABLE_STATUSES:
+                    return status, payload
+            except urllib.error.URLError:
+                if attempt == self.max_retries:
+                    raise
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * (2 ** attempt))
+        return status, payload
+
+    def ping(self):
+        """Return True if the cluster answers."""
+        try:
+            status, _ = self._request('GET', '/')
+            return status == 200
+        except (urllib.error.URLError, OSError):
+            return False
+
+    def ensure_index(self):
+        """Create the index with its mappings if it does not exist yet."""
+        status, payload = self._request_with_retry('PUT', f'/{self.index}', json.dumps(INDEX_MAPPINGS))
+        if status == 400 and 'resource_already_exists' in json.dumps(payload):
+            return
+        if status >= 300:
+            raise RuntimeError(f"Failed to create index {self.index}: {status} {payload}")
+
+    def add(self, doc):
+        """Queue a document, flushing when the batch is full."""
+        self.buffer.append(('index', doc))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def delete(self, doc):
+        """Queue the removal of a deleted animal (matched on its url)."""
+        self.buffer.append(('delete', doc))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Send the buffered actions; only rejected (429) items are retried.
+
+        If the cluster is unreachable or rejects the whole request, the
+        pending documents are logged and counted in ``failed``.
+        """
+        pending = [
+            (action, document_id(doc), {k: doc[k] for k in INDEXED_FIELDS if doc.get(k) is not None})
+            for action, doc in self.buffer
+        ]
+        self.buffer = []
+
+        for attempt in range(self.max_retries + 1):
+            if not pending:
+                return
+            lines = []
+            for action, doc_id, source in pending:
+                lines.append(json.dumps({action: {'_index': self.index, '_id': doc_id}}))
+                if action == 'index':
+                    lines.append(json.dumps(source, ensure_ascii=False))
+            try:
+                status, payload = self._request_with_retry(
+                    'POST', '/_bulk', '\n'.join(lines) + '\n', 'application/x-ndjson'
+                )
+            except OSError as e:
+                # URLError, timeouts, connexion coupée : le lot est perdu pour ce run, pas le crawl
+                status, payload = None, str(e)
+            if status is None or status >= 300:
+                logger.error(f"Bulk request failed ({status or 'unreachable'}: {payload}), "
+                             f"{len(pending)} documents not indexed")
+                self.failed += len(pending)
+                return
+
+            retry = []
+            for entry, item in zip(pending, payload.get('items', [])):
+                action = entry[0]
+                item_status = item.get(action, {}).get('status', 500)
+                if action == 'delete' and item_status in (200, 404):
+                    # 404 : déjà absent de l'index
+                    self.deleted += 1
+                elif item_status < 300:
+                    self.indexed += 1
+                elif item_status == 429 and attempt < self.max_retries:
+                    retry.append(entry)
+                else:
+                    self.failed += 1
+            pending = retry
+            if pending:
+                time.sleep(self.backoff * (2 ** attempt))
+
+    def close(self):
+        """Flush what is left in the buffer."""
+        if self.buffer:
+            self.flush()
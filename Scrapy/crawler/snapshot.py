@@ -0,0 +1,78 @@
+"""
+Columnar snapshot of the animals collection.
+
+The snapshot is an uncompressed Arrow IPC file (Feather v2), which the
+Webapp can memory-map without copying; a ``.parquet`` path writes the same
+table as Parquet for offline analysis. Low-cardinality columns (tags and
+conservation status) are dictionary-encoded. The file is written to a
+temporary path and swapped in atomically.
+"""
+import os
+
+# Colonnes texte simples
+STRING_COLUMNS = ('animal_name', 'scientific_name', 'description', 'habitat', 'diet', 'url', 'image_url')
+# Colonnes à faible cardinalité, encodées en dictionnaire
+DICTIONARY_COLUMNS = ('conservation_status', 'habitat_tag', 'diet_tag', 'taxonomy_path')
+LIST_COLUMNS = ('key_facts', 'locations')
+
+
+def snapshot_columns(doc):
+    """Flatten an animal document into the snapshot columns."""
+    row = {column: doc.get(column) for column in STRING_COLUMNS + LIST_COLUMNS}
+    row['conservation_status'] = doc.get('conservation_status')
+    row['taxonomy_path'] = doc.get('taxonomy_path')
+    # Premier tag, comme dans la Webapp
+    row['habitat_tag'] = (doc.get('habitat_tags') or [None])[0]
+    row['diet_tag'] = (doc.get('diet_tags') or [None])[0]
+    return row
+
+
+def build_table(docs):
+    """Build the Arrow table of the snapshot from animal documents."""
+    import pyarrow as pa
+
+    columns = {column: [] for column in STRING_COLUMNS + DICTIONARY_COLUMNS + LIST_COLUMNS}
+    for doc in docs:
+        row = snapshot_columns(doc)
+        for column, values in columns.items():
+            value = row[column]
+            if column in LIST_COLUMNS:
+                value = [v for v in value if isinstance(v, str)] if isinstance(value, list) else None
+            elif value is not None and not isinstance(value, str):
+                value = str(value)
+            values.append(value)
+
+    arrays = {}
+    for column, values in columns.items():
+        if column in LIST_COLUMNS:
+            arrays[column] = pa.array(values, type=pa.list_(pa.string()))
+        elif column in DICTIONARY_COLUMNS:
+            arrays[column] = pa.array(values, type=pa.string()).dictionary_encode()
+        else:
+            arrays[column] = pa.array(values, type=pa.string())
+    return pa.table(arrays)
+
+
+def write_snapshot(docs, path):
+    """Write the snapshot of ``docs`` to ``path``; return the number of rows."""
+    import pyarrow as pa
+
+    table = build_table(docs)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, tmp_path)
+    else:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(tmp_path, path)
+    return table.num_rows
+
+
+def export_collection(collection, path):
+    """Export a MongoDB collection to a snapshot file."""
+    projection = {'_id': 0, 'classification': 0, 'facts': 0}
+    return write_snapshot(collection.find({}, projection).batch_size(1000), path)
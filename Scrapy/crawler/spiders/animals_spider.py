@@ -1,7 +1,13 @@
 import scrapy
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider
 from urllib.parse import urljoin
 import os
 
+from crawler.feeds import build_feeds
+from crawler.recrawl import request_priority, utcnow
+from profiling.profiler import profiled
+
 
 class AnimalsSpider(scrapy.Spider):
     name = "animals"
@@ -20,24 +26,53 @@ class AnimalsSpider(scrapy.Spider):
         # Respectful crawling at spider level
         'DOWNLOAD_DELAY': 0.5,
         'TWISTED_REACTOR': "twisted.internet.asyncioreactor.AsyncioSelectorReactor",
-        # JSON export avec chemin absolu
-        'FEEDS': {
-            os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'animals.json'): {
-                'format': 'json',
-                'encoding': 'utf-8',
-                'overwrite': True,
-            },
-        },
+        # JSON export avec chemin absolu (FEED_FORMAT=jsonlines pour le mode append)
+        'FEEDS': build_feeds(
+            os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
+        ),
     }
 
+    def __init__(self, budget=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Budget de requêtes par exécution (None : parcours complet de l'index)
+        self.budget = int(budget) if budget else None
+        # Planificateur de recrawl, attaché par CrawlStatePipeline
+        self.recrawl = None
+        self.requests_used = 0
+        self.discovering = False
+        self.planned = False
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        if spider.budget is None:
+            budget = crawler.settings.getint('RECRAWL_BUDGET', int(os.environ.get('RECRAWL_BUDGET', 0)))
+            spider.budget = budget or None
+        crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+        return spider
+
     def start_requests(self):
-        """Start with impersonation enabled via meta."""
+        """Start with impersonation enabled via meta.
+
+        In budget mode the index and letter pages are only crawled when the
+        last discovery is older than RECRAWL_DISCOVERY_INTERVAL; the animal
+        pages are planned from the crawl state once discovery is done.
+        """
+        if self.budget and self.recrawl is None:
+            self.logger.warning("Recrawl budget ignored: CrawlStatePipeline is not enabled")
+            self.budget = None
+        if self.budget and not self.recrawl.discovery_due():
+            self.logger.info("Discovery skipped, planning from the crawl state")
+            return
+        self.discovering = True
+        self.requests_used += 1
         yield scrapy.Request(
             url="https://a-z-animals.com/animals/",
             callback=self.parse,
             meta={"impersonate": "chrome120"}
         )
 
+    @profiled("spider.parse")
     def parse(self, response):
         """Parse the main animals page and follow letter links."""
         letter_links = response.xpath(
@@ -46,6 +81,11 @@ class AnimalsSpider(scrapy.Spider):
 
         self.logger.info(f"Found {len(letter_links)} letter pages.")
 
+        if self.budget:
+            # Les pages lettres comptent dans le budget
+            letter_links = letter_links[:max(self.budget - self.requests_used, 0)]
+            self.requests_used += len(letter_links)
+
         for link in letter_links:
             full_url = urljoin(response.url, link)
             yield scrapy.Request(
@@ -54,6 +94,7 @@ class AnimalsSpider(scrapy.Spider):
                 meta={"impersonate": "chrome120"}
             )
 
+    @profiled("spider.parse_letter_page")
     def parse_letter_page(self, response):
         """Parse a letter page and extract animal URLs, limited by ANIMALS_PER_LETTER."""
         animal_links = response.xpath(
@@ -77,21 +118,76 @@ class AnimalsSpider(scrapy.Spider):
                     continue
 
                 count += 1
+                if self.budget:
+                    # Mode budget : l'URL est enregistrée, la planification choisit quoi récupérer
+                    self.recrawl.discover(urljoin(response.url, url), name.strip(), response.url)
+                    continue
                 # Follow the URL to get detailed info
-                yield scrapy.Request(
-                    url=urljoin(response.url, url),
-                    callback=self.parse_animal_detail,
-                    meta={
-                        "impersonate": "chrome120",
-                        "animal_name": name.strip(),
-                        "source_page": response.url
-                    }
-                )
+                yield self.animal_request(urljoin(response.url, url), name.strip(), response.url)
 
         self.logger.info(f"Queued {count} animals from {response.url}")
 
+    def spider_idle(self):
+        """Once discovery is done, schedule the animal pages the budget allows.
+
+        Never-fetched pages come first, then the most likely stale ones (see
+        crawler.recrawl).
+        """
+        if not self.budget or self.planned:
+            return
+        self.planned = True
+        if self.discovering:
+            self.recrawl.mark_discovered()
+        now = utcnow()
+        states = self.recrawl.plan(self.budget - self.requests_used, now)
+        for state in states:
+            self.crawler.engine.crawl(self.animal_request(
+                state['_id'], state.get('animal_name'), state.get('source_page'),
+                priority=request_priority(state, now)
+            ))
+        self.logger.info(f"Recrawl: {len(states)} animal pages scheduled (budget {self.budget})")
+        if states:
+            raise DontCloseSpider
+
+    def animal_request(self, url, animal_name, source_page, priority=0):
+        """Request of an animal page, recorded in the crawl state under ``url``."""
+        return scrapy.Request(
+            url=url,
+            callback=self.parse_animal_detail,
+            errback=self.fetch_failed,
+            priority=priority,
+            meta={
+                "impersonate": "chrome120",
+                "animal_name": animal_name,
+                "source_page": source_page,
+                # URL découverte : clé de l'état de crawl, même après une redirection
+                "crawl_url": url
+            }
+        )
+
+    def fetch_failed(self, failure):
+        """Record a failed animal page fetch (HTTP error, DNS, timeout...)."""
+        request = failure.request
+        response = getattr(failure.value, 'response', None)
+        status = response.status if response is not None else None
+        self.logger.warning(f"Fetch failed for {request.url}: {failure.getErrorMessage()}")
+        if self.recrawl is not None:
+            self.recrawl.record_failure(
+                request.meta.get('crawl_url', request.url), failure.getErrorMessage(),
+                request.meta.get('animal_name'), request.meta.get('source_page'), status
+            )
+
+    @profiled("spider.parse_animal_detail")
     def parse_animal_detail(self, response):
         """Parse individual animal page and extract detailed information."""
+        item = self.extract_animal(response)
+        if self.recrawl is not None:
+            self.recrawl.record_fetch(response.meta.get('crawl_url', response.url), item, response.status)
+        yield item
+        self.logger.info(f"Scraped details for: {item['animal_name']}")
+
+    def extract_animal(self, response):
+        """Fields of an animal page."""
         animal_name = response.meta.get('animal_name')
         source_page = response.meta.get('source_page')
 
@@ -162,7 +258,7 @@ class AnimalsSpider(scrapy.Spider):
             if loc.strip() and loc.strip() not in excluded
         ]
 
-        yield {
+        return {
             'animal_name': animal_name,
             'scientific_name': scientific_name,
             'description': description,
@@ -177,5 +273,3 @@ class AnimalsSpider(scrapy.Spider):
             'url': response.url,
             'source_page': source_page
         }
-
-        self.logger.info(f"Scraped details for: {animal_name}")
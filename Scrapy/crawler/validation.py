@@ -0,0 +1,192 @@
+"""
+Schema validation of the scraped animals.
+
+``ANIMAL_SCHEMA`` is written in JSON Schema (the subset used here: type,
+required, properties, additionalProperties, items, minLength, pattern and
+not). ``compile_schema`` turns it once into nested closures with the
+regexes precompiled, so validating an item is a handful of isinstance and
+regex calls instead of a walk over the schema dict.
+
+Only the ``required`` fields make an item unusable. ``compile_optional_fields``
+checks the other properties one by one, so that a bad optional value (a
+Latin name or an empty string as description) can be cleared instead of
+dropping the whole animal.
+"""
+import re
+
+# Nom latin seul ("Panthera tigris") : la page n'avait pas de description
+LATIN_NAME = r'^[A-Z][a-z]+( [a-z]+){1,2}$'
+
+ANIMAL_SCHEMA = {
+    'type': 'object',
+    'required': ['animal_name', 'url'],
+    'properties': {
+        'animal_name': {'type': 'string', 'pattern': r'\S'},
+        'url': {'type': 'string', 'pattern': r'^https://a-z-animals\.com/'},
+        'scientific_name': {'type': ['string', 'null'], 'pattern': r'\S'},
+        'description': {'type': ['string', 'null'], 'minLength': 1, 'not': {'type': 'string', 'pattern': LATIN_NAME}},
+        'key_facts': {'type': ['array', 'null'], 'items': {'type': 'string'}},
+        'conservation_status': {'type': ['string', 'null']},
+        'habitat': {'type': ['string', 'null']},
+        'diet': {'type': ['string', 'null']},
+        'image_url': {'type': ['string', 'null']},
+        'classification': {'type': ['object', 'null'], 'additionalProperties': {'type': 'string'}},
+        'facts': {'type': ['object', 'null'], 'additionalProperties': {'type': 'string'}},
+        'locations': {'type': 'array', 'items': {'type': 'string'}},
+        'source_page': {'type': ['string', 'null']},
+    },
+}
+
+_TYPES = {
+    'object': (dict,),
+    'array': (list,),
+    'string': (str,),
+    'number': (int, float),
+    'integer': (int,),
+    'boolean': (bool,),
+    'null': (type(None),),
+}
+_TYPE_NAMES = {dict: 'object', list: 'array', str: 'string', int: 'integer', float: 'number',
+               bool: 'boolean', type(None): 'null'}
+
+
+def _type_name(value):
+    return _TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def _only_types(schema):
+    """Accepted Python types when ``schema`` only constrains the type, else None."""
+    if set(schema) != {'type'}:
+        return None
+    names = [schema['type']] if isinstance(schema['type'], str) else schema['type']
+    return tuple(t for name in names for t in _TYPES[name])
+
+
+def _compile(schema, path):
+    """Compile ``schema`` into a function returning an error message or None."""
+    checks = []
+
+    if 'type' in schema:
+        names = [schema['type']] if isinstance(schema['type'], str) else list(schema['type'])
+        types = tuple(t for name in names for t in _TYPES[name])
+        expected = ' or '.join(names)
+
+        def check_type(value):
+            if not isinstance(value, types):
+                return f"{path}: expected {expected}, got {_type_name(value)}"
+        checks.append(check_type)
+
+    if 'minLength' in schema:
+        min_length = schema['minLength']
+
+        def check_min_length(value):
+            if isinstance(value, str) and len(value) < min_length:
+                return f"{path}: shorter than {min_length} characters"
+        checks.append(check_min_length)
+
+    if 'pattern' in schema:
+        search = re.compile(schema['pattern']).search
+        pattern = schema['pattern']
+
+        def check_pattern(value):
+            if isinstance(value, str) and not search(value):
+                return f"{path}: does not match {pattern}"
+        checks.append(check_pattern)
+
+    if 'not' in schema:
+        negated = _compile(schema['not'], path)
+
+        def check_not(value):
+            if negated(value) is None:
+                return f"{path}: must not match {schema['not']}"
+        checks.append(check_not)
+
+    if 'items' in schema:
+        item_check = _compile(schema['items'], f"{path}[]")
+        item_types = _only_types(schema['items'])
+
+        def check_items(value):
+            if isinstance(value, list):
+                # Chemin rapide pour les listes valides d'un type simple
+                if item_types and all(isinstance(element, item_types) for element in value):
+                    return None
+                for element in value:
+                    error = item_check(element)
+                    if error:
+                        return error
+        checks.append(check_items)
+
+    if 'required' in schema:
+        required = tuple(schema['required'])
+
+        def check_required(value):
+            if isinstance(value, dict):
+                for name in required:
+                    if name not in value:
+                        return f"{path}.{name}: required field missing"
+        checks.append(check_required)
+
+    if 'properties' in schema:
+        properties = tuple(
+            (name, _compile(subschema, f"{path}.{name}")) for name, subschema in schema['properties'].items()
+        )
+
+        def check_properties(value):
+            if isinstance(value, dict):
+                for name, check in properties:
+                    if name in value:
+                        error = check(value[name])
+                        if error:
+                            return error
+        checks.append(check_properties)
+
+    if 'additionalProperties' in schema:
+        known = frozenset(schema.get('properties', ()))
+        extra_check = _compile(schema['additionalProperties'], f"{path}.*")
+        extra_types = _only_types(schema['additionalProperties']) if not known else None
+
+        def check_additional(value):
+            if isinstance(value, dict):
+                if extra_types and all(isinstance(element, extra_types) for element in value.values()):
+                    return None
+                for name, element in value.items():
+                    if name not in known:
+                        error = extra_check(element)
+                        if error:
+                            return error
+        checks.append(check_additional)
+
+    checks = tuple(checks)
+    if len(checks) == 1:
+        return checks[0]
+
+    def validate(value):
+        for check in checks:
+            error = check(value)
+            if error:
+                return error
+        return None
+    return validate
+
+
+def compile_schema(schema=ANIMAL_SCHEMA):
+    """Validator for ``schema``: returns the first error message, None if valid."""
+    return _compile(schema, '$')
+
+
+def _cleared_value(schema):
+    """Replacement of an invalid value: None if allowed, else an empty value of the type."""
+    names = [schema.get('type')] if isinstance(schema.get('type'), str) else list(schema.get('type', ['null']))
+    if 'null' in names:
+        return None
+    return {'array': [], 'object': {}, 'string': ''}.get(names[0])
+
+
+def compile_optional_fields(schema=ANIMAL_SCHEMA):
+    """[(name, validator, cleared value)] of the properties that are not required."""
+    required = set(schema.get('required', ()))
+    return [
+        (name, _compile(subschema, f"$.{name}"), _cleared_value(subschema))
+        for name, subschema in schema.get('properties', {}).items()
+        if name not in required
+    ]
@@ -38,7 +38,11 @@ def main():
         # Ensure MongoDB pipeline is active for direct insertion when running locally
         settings['ITEM_PIPELINES'] = settings.get('ITEM_PIPELINES', {})
         settings['ITEM_PIPELINES'].update({
+            'crawler.pipelines.CrawlStatePipeline': 200,
+            'crawler.pipelines.ValidationPipeline': 220,
+            'crawler.pipelines.DeduplicationPipeline': 250,
             'crawler.pipelines.MongoDBPipeline': 300,
+            'crawler.pipelines.ElasticsearchPipeline': 400,
         })
 
     process = CrawlerProcess(settings)
@@ -0,0 +1,56 @@
+"""Calculs des vues Table et Stats à partir de listes de documents (mode MongoDB)"""
+import pandas as pd
+
+
+def _display(tags, text):
+    """First tag capitalised, else the text truncated to 50 characters"""
+    if tags:
+        return tags[0].capitalize()
+    if text and len(text) > 50:
+        return text[:50] + "..."
+    return text
+
+
+def table_frame(animals, alphabetical=True):
+    """Rows of the Table view, sorted alphabetically unless ``alphabetical`` is False"""
+    # Créer un dataframe simplifié avec les tags - TRIÉ ALPHABÉTIQUEMENT (sauf classement de recherche)
+    df_simple = []
+    sorted_animals = sorted(animals, key=lambda x: (x.get('animal_name') or '').lower()) if alphabetical else animals
+    for animal in sorted_animals:
+        df_simple.append({
+            'Nom': animal.get('animal_name'),
+            'Scientifique': animal.get('scientific_name', 'N/A'),
+            'Habitat': _display(animal.get('habitat_tags'), animal.get('habitat', 'N/A')),
+            'Diet': _display(animal.get('diet_tags'), animal.get('diet', 'N/A')),
+            'Status': animal.get('conservation_status', 'N/A')
+        })
+    return pd.DataFrame(df_simple)
+
+
+def first_tag_counts(animals, field, label):
+    """Counts of the first tag of ``field`` (diet_tags, habitat_tags)"""
+    tags = [animal[field][0] for animal in animals if animal.get(field)]
+    counts = pd.Series(tags, dtype=object).value_counts().reset_index()
+    counts.columns = [label, 'count']
+    return counts
+
+
+def status_counts(animals):
+    """Counts of conservation statuses"""
+    status_list = [a.get('conservation_status') for a in animals if a.get('conservation_status')]
+    counts = pd.Series(status_list, dtype=object).value_counts().reset_index()
+    counts.columns = ['status', 'count']
+    return counts
+
+
+def distinct_count(animals, field):
+    """Number of distinct non-empty values of ``field``"""
+    return len(set([a.get(field) for a in animals if a.get(field)]))
+
+
+def location_counts(animals):
+    """Counts of locations (each animal counts once per location it lists)"""
+    locations = [loc for a in animals for loc in (a.get('locations') or []) if loc]
+    counts = pd.Series(locations, dtype=object).value_counts().reset_index()
+    counts.columns = ['location', 'count']
+    return counts
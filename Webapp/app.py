@@ -1,9 +1,12 @@
 """Application Streamlit pour afficher les animaux - Améliorée"""
 import streamlit as st
-from pymongo import MongoClient
-import pandas as pd
-import plotly.express as px
-from config import MONGODB_URI, DATABASE_NAME, COLLECTION_NAME
+from pymongo.errors import PyMongoError
+from config import DATA_MODE, SNAPSHOT_PATH
+from datastore.client import get_database as get_shared_database
+from datastore.taxonomy import RANKS, child_nodes
+from profiling.profiler import start_run
+from search import get_search_backend, search_backends
+from repository import AnimalRepository, build_filter, export_csv
 
 # Configuration de la page
 st.set_page_config(page_title="Animals DB 🦁", layout="wide", initial_sidebar_state="expanded")
@@ -24,15 +27,89 @@ st.markdown("""
 st.markdown("# 🦁 Animals Database - Interactive Explorer")
 st.markdown("Explore global biodiversity with detailed data and visualizations")
 
+# Vues de la page ; pandas (analysis) et plotly ne sont importés que par les vues qui les utilisent
+VIEWS = ["📊 Table", "📈 Stats", "📋 Details", "⬇️ Export"]
+
+
 # Connexion MongoDB
 @st.cache_resource
 def get_database():
-    client = MongoClient(MONGODB_URI)
-    return client[DATABASE_NAME]
+    # Client mutualisé (pool, timeouts) de datastore, partagé par toutes les sessions
+    return get_shared_database()
+
+
+# Backends créés une fois par processus : BM25Search re-mappe l'index reconstruit (et ferme l'ancien),
+# ElasticsearchSearch revérifie le cluster toutes les 30 s
+@st.cache_resource
+def get_search_backends():
+    return search_backends()
+
+
+def get_search():
+    return get_search_backend(get_search_backends())
+
+
+def get_repository():
+    return AnimalRepository(get_database())
+
+
+# Caches partagés entre sessions, invalidés quand la version des données change
+@st.cache_data(max_entries=2)
+def fetch_facets_cached(data_version):
+    return get_repository().facets()
+
+
+@st.cache_data(max_entries=256)
+def fetch_taxonomy_children_cached(data_version, parent):
+    return get_repository().taxonomy_children(parent)
+
+
+@st.cache_data(max_entries=2)
+def fetch_location_counts_cached(data_version):
+    return get_repository().location_counts()
+
+
+@st.cache_data(max_entries=2)
+def fetch_metrics_cached(data_version):
+    repository = get_repository()
+    return repository.metrics(fetch_facets_cached(data_version))
+
+
+# Vue d'accueil non filtrée rendue une fois par version des données, partagée entre processus via MongoDB
+@st.cache_data(max_entries=2)
+def fetch_landing_cached(data_version):
+    repository = get_repository()
+    landing = repository.landing(data_version)
+    if landing is None:
+        import charts
+        landing = charts.build_landing(repository)
+        repository.store_landing(data_version, landing)
+    return landing
+
+
+# Snapshot Arrow mappé une fois par processus (rechargé quand le fichier change)
+@st.cache_resource(max_entries=1)
+def get_snapshot(version):
+    return snapshot.load_snapshot(SNAPSHOT_PATH)
+
+
+if DATA_MODE == "snapshot":
+    import snapshot
+    snapshot_mtime = snapshot.snapshot_version(SNAPSHOT_PATH)
+else:
+    snapshot_mtime = None
+
+# Profilage du rerun (PROFILING=1), écrit dans PROFILE_DIR à la fin du script
+rerun_profile = start_run("webapp")
 
 try:
-    db = get_database()
-    collection = db[COLLECTION_NAME]
+    repository = get_repository()
+    if snapshot_mtime:
+        table = get_snapshot(snapshot_mtime)
+        data_version = None
+    else:
+        table = None
+        data_version = repository.data_version()
     
     # Sidebar
     with st.sidebar:
@@ -42,108 +119,168 @@ try:
         search_query = st.text_input("Search animal", placeholder="Ex: Tiger, Lion...")
         
         # Récupérer les valeurs uniques pour les filtres
-        habitats = sorted([h for h in collection.distinct("habitat") if h])
-        diets = sorted([d for d in collection.distinct("diet") if d])
-        statuses = sorted([s for s in collection.distinct("conservation_status") if s])
+        if table is not None:
+            facets = snapshot.facet_values(table)
+        else:
+            facets = fetch_facets_cached(data_version) if data_version else repository.facets()
+        habitats = facets["habitat"]
+        diets = facets["diet"]
+        statuses = facets["conservation_status"]
+        locations = facets["locations"]
         
         selected_habitats = st.multiselect("🌍 Habitat", habitats)
         selected_diets = st.multiselect("🍖 Diet", diets)
         selected_statuses = st.multiselect("🛡️ Status", statuses)
+        selected_locations = st.multiselect("🗺️ Location", locations)
+        
+        # Navigation taxonomique : un niveau par rang, effectifs des sous-arbres précalculés
+        taxonomy_nodes = snapshot.taxonomy_nodes(table) if table is not None else None
+        selected_taxonomy = None
+        for rank in RANKS:
+            if taxonomy_nodes is not None:
+                children = child_nodes(taxonomy_nodes, selected_taxonomy)
+            elif data_version:
+                children = fetch_taxonomy_children_cached(data_version, selected_taxonomy)
+            else:
+                children = repository.taxonomy_children(selected_taxonomy)
+            if not children:
+                break
+            labels = {node["_id"]: f"{node['name']} ({node['count']})" for node in children}
+            choice = st.selectbox(
+                f"🧬 {rank}", [None, *labels],
+                format_func=lambda path: "All" if path is None else labels[path],
+                key=f"taxonomy_{rank}"
+            )
+            if choice is None:
+                break
+            selected_taxonomy = choice
     
-    # Construire la requête MongoDB
-    filter_query = {}
-    
+    # Recherche plein texte (description, habitat, diet, key_facts) si disponible
+    search_urls = None
     if search_query:
-        filter_query["animal_name"] = {"$regex": search_query, "$options": "i"}
+        search_backend = get_search()
+        if search_backend:
+            try:
+                search_urls = search_backend.search(search_query)
+            except OSError:
+                search_urls = None
     
-    if selected_habitats:
-        filter_query["habitat"] = {"$in": selected_habitats}
-    
-    if selected_diets:
-        filter_query["diet"] = {"$in": selected_diets}
-    
-    if selected_statuses:
-        filter_query["conservation_status"] = {"$in": selected_statuses}
-    
-    # Récupérer tous les animaux pour les stats
-    all_animals = list(collection.find({}, {"_id": 0}))
+    # Construire la requête MongoDB
+    filter_query = build_filter(
+        search_query, search_urls, selected_habitats, selected_diets, selected_statuses, selected_locations,
+        selected_taxonomy
+    )
     
-    # Récupérer les animaux filtrés
-    animals = list(collection.find(filter_query, {"_id": 0}).limit(200))
+    if table is not None:
+        # Mode snapshot : filtres et comptages vectorisés, sans MongoDB
+        results = snapshot.filter_table(
+            table,
+            name_pattern=search_query or None,
+            urls=search_urls,
+            habitats=selected_habitats,
+            diets=selected_diets,
+            statuses=selected_statuses,
+            locations=selected_locations,
+            taxonomy=selected_taxonomy,
+        )
+        if search_urls is not None:
+            # Classement BM25 / Elasticsearch conservé : meilleurs résultats en premier
+            results = snapshot.rank_by_urls(results, search_urls)
+        results = results.slice(0, 200)
+        result_count = results.num_rows
+        total_animals = table.num_rows
+        habitats_uniq = snapshot.count_distinct(table, "habitat")
+        diets_uniq = snapshot.count_distinct(table, "diet")
+        landing = None
+    else:
+        # Sans filtre : cartes et figures pré-rendues, les animaux ne sont lus que par les vues qui les affichent
+        landing = fetch_landing_cached(data_version) if data_version and not filter_query else None
+        if landing:
+            metrics = landing["metrics"]
+            animals = None
+            result_count = metrics["results"]
+        else:
+            # Métriques comptées côté serveur, animaux filtrés limités à une page
+            metrics = fetch_metrics_cached(data_version) if data_version else repository.metrics(facets)
+            animals = repository.page(filter_query, ranking=search_urls)
+            result_count = len(animals)
+        total_animals = metrics["total"]
+        habitats_uniq = metrics["habitats"]
+        diets_uniq = metrics["diets"]
     
-    if animals:
+    if result_count:
         # Métriques
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("🐾 Total Animals", len(all_animals))
+            st.metric("🐾 Total Animals", total_animals)
         with col2:
-            st.metric("🔎 Results", len(animals))
+            st.metric("🔎 Results", result_count)
         with col3:
-            habitats_uniq = len(set([a.get('habitat') for a in all_animals if a.get('habitat')]))
             st.metric("🌍 Habitats", habitats_uniq)
         with col4:
-            diets_uniq = len(set([a.get('diet') for a in all_animals if a.get('diet')]))
             st.metric("🍖 Diets", diets_uniq)
         
-        # Tabs
-        tab1, tab2, tab3, tab4 = st.tabs(["📊 Table", "📈 Stats", "📋 Details", "⬇️ Export"])
+        # Navigation : contrairement à st.tabs, seule la vue active est calculée à chaque rerun
+        view = st.radio("View", VIEWS, horizontal=True, label_visibility="collapsed", key="view")
         
-        with tab1:
+        if table is not None and view in ("📋 Details", "⬇️ Export"):
+            animals = results.to_pylist()
+        elif table is None and animals is None and view != "📈 Stats":
+            animals = repository.page(filter_query, ranking=search_urls)
+        
+        if view == "📊 Table":
             st.subheader("Animal List")
-            # Créer un dataframe simplifié avec les tags - TRIÉ ALPHABÉTIQUEMENT
-            df_simple = []
-            sorted_animals = sorted(animals, key=lambda x: x.get('animal_name', '').lower())
-            for animal in sorted_animals:
-                habitat_display = (animal.get('habitat_tags', [0])[0].capitalize() if animal.get('habitat_tags') else (animal.get('habitat', 'N/A')[:50] + "..." if animal.get('habitat') and len(animal.get('habitat', '')) > 50 else animal.get('habitat', 'N/A')))
-                diet_display = (animal.get('diet_tags', [0])[0].capitalize() if animal.get('diet_tags') else (animal.get('diet', 'N/A')[:50] + "..." if animal.get('diet') and len(animal.get('diet', '')) > 50 else animal.get('diet', 'N/A')))
-                df_simple.append({
-                    'Nom': animal.get('animal_name'),
-                    'Scientifique': animal.get('scientific_name', 'N/A'),
-                    'Habitat': habitat_display,
-                    'Diet': diet_display,
-                    'Status': animal.get('conservation_status', 'N/A')
-                })
-            df_display = pd.DataFrame(df_simple)
+            if table is not None:
+                df_display = snapshot.display_frame(results, alphabetical=search_urls is None)
+            else:
+                import analysis
+                df_display = analysis.table_frame(animals, alphabetical=search_urls is None)
             st.dataframe(df_display, use_container_width=True, height=400)
         
-        with tab2:
-            # Graphiques - Utiliser les tags au lieu des textes complets
-            col1, col2 = st.columns(2)
+        elif view == "📈 Stats":
+            import charts
             
-            with col1:
-                # Extraire les premiers tags diet
-                diet_tags_list = []
-                for animal in animals:
-                    if animal.get('diet_tags'):
-                        diet_tags_list.append(animal['diet_tags'][0])
+            if landing:
+                # Vue non filtrée : figures pré-rendues pour cette version des données
+                figures = charts.load_figures(landing["figures"])
+            else:
+                import analysis
                 
-                diet_counts = pd.Series(diet_tags_list).value_counts().reset_index()
-                diet_counts.columns = ['diet', 'count']
-                fig_diet = px.pie(diet_counts, names='diet', values='count', title="📊 Diet Distribution")
-                st.plotly_chart(fig_diet, use_container_width=True)
+                # Graphiques - Utiliser les tags au lieu des textes complets
+                if table is not None:
+                    diet_counts = snapshot.counts_frame(results, 'diet_tag', 'diet')
+                    habitat_counts = snapshot.counts_frame(results, 'habitat_tag', 'habitat')
+                    status_counts = snapshot.counts_frame(results, 'conservation_status', 'status')
+                else:
+                    diet_counts = analysis.first_tag_counts(animals, 'diet_tags', 'diet')
+                    habitat_counts = analysis.first_tag_counts(animals, 'habitat_tags', 'habitat')
+                    status_counts = analysis.status_counts(animals)
+                
+                # Locations : comptages précalculés à l'ingestion tant qu'aucun filtre n'est actif
+                if table is not None:
+                    location_counts = snapshot.counts_frame(results if filter_query else table, 'locations', 'location')
+                elif filter_query:
+                    location_counts = analysis.location_counts(animals)
+                else:
+                    import pandas as pd
+                    counts = fetch_location_counts_cached(data_version) if data_version else repository.location_counts()
+                    location_counts = pd.DataFrame(counts, columns=['location', 'count'])
+                
+                figures = charts.stats_figures(diet_counts, habitat_counts, status_counts, location_counts)
             
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(figures["diet"], use_container_width=True)
             with col2:
-                # Extraire les premiers tags habitat
-                habitat_tags_list = []
-                for animal in animals:
-                    if animal.get('habitat_tags'):
-                        habitat_tags_list.append(animal['habitat_tags'][0])
-                
-                habitat_counts = pd.Series(habitat_tags_list).value_counts().reset_index()
-                habitat_counts.columns = ['habitat', 'count']
-                fig_habitat = px.bar(habitat_counts.head(10), x='habitat', y='count', 
-                                    title="🌍 Top 10 Habitats")
-                st.plotly_chart(fig_habitat, use_container_width=True)
+                st.plotly_chart(figures["habitat"], use_container_width=True)
             
             # Statuts de conservation
-            status_list = [a.get('conservation_status') for a in animals if a.get('conservation_status')]
-            status_counts = pd.Series(status_list).value_counts().reset_index()
-            status_counts.columns = ['status', 'count']
-            fig_status = px.bar(status_counts, x='status', y='count', 
-                               title="🛡️ Conservation Status", color='count')
-            st.plotly_chart(fig_status, use_container_width=True)
+            st.plotly_chart(figures["status"], use_container_width=True)
+            
+            if "location" in figures:
+                st.plotly_chart(figures["location"], use_container_width=True)
         
-        with tab3:
+        elif view == "📋 Details":
             st.subheader("Animal Details")
             
             selected_animal = st.selectbox(
@@ -156,6 +293,13 @@ try:
                 None
             )
             
+            if animal_detail and table is not None:
+                # Le snapshot ne contient pas classification/facts : document complet depuis MongoDB
+                try:
+                    animal_detail = repository.detail(animal_detail["url"]) or animal_detail
+                except PyMongoError:
+                    pass
+            
             if animal_detail:
                 st.markdown(f"### 🦁 {selected_animal}")
                 
@@ -191,22 +335,20 @@ try:
                         with cols[i % 3]:
                             st.write(f"*{key}:* {val}")
         
-        with tab4:
+        elif view == "⬇️ Export":
             st.subheader("Export Data")
             
             # Sélectionner les colonnes
-            df_export = pd.DataFrame(animals)
+            columns = list(dict.fromkeys(key for animal in animals for key in animal))
             columns_to_export = st.multiselect(
                 "Columns to export",
-                df_export.columns.tolist(),
+                columns,
                 default=['animal_name', 'scientific_name', 'habitat', 'diet', 'conservation_status']
             )
             
             if columns_to_export:
-                df_export_filtered = df_export[columns_to_export]
-                
                 # CSV
-                csv = df_export_filtered.to_csv(index=False)
+                csv = export_csv(animals, columns_to_export)
                 st.download_button(
                     label="📥 Download CSV",
                     data=csv,
@@ -219,3 +361,6 @@ try:
 except Exception as e:
     st.error(f"❌ MongoDB Connection Error: {e}")
     st.info("Make sure MongoDB is running on mongodb://localhost:27017")
+finally:
+    # Aussi après st.stop() et les reruns interrompus
+    rerun_profile.stop()
@@ -0,0 +1,48 @@
+"""Figures plotly de la vue Stats et rendu pré-calculé de la vue d'accueil
+
+The unfiltered landing view (metric cards and Stats figures) only changes
+with the data version, so it is rendered once per version by the first
+session that needs it, serialized to plotly JSON and stored in the meta
+collection (see AnimalRepository.landing); every other session and
+process then reads it instead of aggregating and building the figures.
+"""
+import plotly.express as px
+import plotly.io as pio
+
+
+def stats_figures(diet_counts, habitat_counts, status_counts, location_counts):
+    """Figures of the Stats view from the count frames."""
+    figures = {
+        "diet": px.pie(diet_counts, names='diet', values='count', title="📊 Diet Distribution"),
+        "habitat": px.bar(habitat_counts.head(10), x='habitat', y='count', title="🌍 Top 10 Habitats"),
+        "status": px.bar(status_counts, x='status', y='count', title="🛡️ Conservation Status", color='count'),
+    }
+    if not location_counts.empty:
+        figures["location"] = px.bar(location_counts, x='location', y='count', title="🗺️ Animals per Location")
+    return figures
+
+
+def dump_figures(figures):
+    return {name: figure.to_json() for name, figure in figures.items()}
+
+
+def load_figures(serialized):
+    return {name: pio.from_json(data) for name, data in serialized.items()}
+
+
+def build_landing(repository):
+    """Metric cards and serialized Stats figures of the unfiltered view."""
+    import pandas as pd
+    import analysis
+
+    metrics = repository.metrics(repository.facets())
+    # Même page d'animaux que la vue non filtrée
+    animals = repository.page({})
+    metrics["results"] = len(animals)
+    figures = stats_figures(
+        analysis.first_tag_counts(animals, 'diet_tags', 'diet'),
+        analysis.first_tag_counts(animals, 'habitat_tags', 'habitat'),
+        analysis.status_counts(animals),
+        pd.DataFrame(repository.location_counts(), columns=['location', 'count']),
+    )
+    return {"metrics": metrics, "figures": dump_figures(figures)}
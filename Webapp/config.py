@@ -1,6 +1,20 @@
 """Configuration pour la connexion MongoDB"""
 import os
 
-MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
-DATABASE_NAME = "animals_db"
-COLLECTION_NAME = "animals"
+# Paquet d'accès MongoDB partagé, installé depuis la racine du dépôt (pip install -e .)
+from datastore import settings as datastore_settings
+
+MONGODB_URI = datastore_settings.MONGODB_URI
+DATABASE_NAME = datastore_settings.DATABASE_NAME
+COLLECTION_NAME = datastore_settings.COLLECTION_NAME
+META_COLLECTION = datastore_settings.META_COLLECTION
+
+ELASTICSEARCH_URL = os.getenv("ELASTICSEARCH_URL", "http://localhost:9200")
+ELASTICSEARCH_INDEX = os.getenv("ES_INDEX", "animals")
+
+# Index BM25 embarqué (python fulltext.py build)
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "animals.bm25"))
+
+# "mongo" (par défaut) ou "snapshot" : lecture du snapshot Arrow exporté après chaque ingestion
+DATA_MODE = os.getenv("DATA_MODE", "mongo")
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "animals.arrow"))
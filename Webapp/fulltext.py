@@ -0,0 +1,257 @@
+"""Index plein texte BM25 embarqué (recherche hors ligne, sans Elasticsearch)
+
+The index is built from MongoDB or a feed file and stored in a single binary
+file that is memory-mapped on load: only the header and the document table
+are decoded, term lookups binary-search the sorted vocabulary and read the
+postings straight from the mapping.
+
+File layout (little endian)::
+
+    header   magic, version, n_docs, n_terms, avgdl, section offsets
+    doc_len  uint32[n_docs]           token count of each document
+    terms    uint32[n_terms + 1]      offsets into the vocabulary blob
+             uint32[n_terms + 1]      offsets (in entries) into the postings
+    vocab    utf-8 blob of the sorted terms
+    postings (uint32 doc, uint32 tf)[...] grouped by term, sorted by doc
+    docs     JSON list of document urls
+
+Usage:
+    python fulltext.py build [--json ../data/animals.json] [--output animals.bm25]
+    python fulltext.py search "striped grassland herbivore"
+"""
+import argparse
+import array
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from collections import Counter, defaultdict
+
+from config import BM25_INDEX_PATH
+
+MAGIC = b"BM25IDX1"
+HEADER = struct.Struct("<8sIIId5Q")
+
+TEXT_FIELDS = ("description", "habitat", "diet")
+LIST_FIELDS = ("key_facts",)
+DICT_FIELDS = ("facts",)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the their they this to was were with".split()
+)
+
+DEFAULT_INDEX_PATH = BM25_INDEX_PATH
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens, stopwords removed."""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def document_text(doc):
+    """Text of the indexed fields of an animal."""
+    parts = [doc.get("animal_name") or ""]
+    parts.extend(doc.get(field) or "" for field in TEXT_FIELDS)
+    for field in LIST_FIELDS:
+        parts.extend(v for v in (doc.get(field) or []) if isinstance(v, str))
+    for field in DICT_FIELDS:
+        value = doc.get(field)
+        if isinstance(value, dict):
+            parts.extend(f"{k} {v}" for k, v in value.items())
+    return " ".join(parts)
+
+
+def build_index(docs, path):
+    """Build the index file at ``path`` from an iterable of animal documents.
+
+    Returns the number of indexed documents.
+    """
+    postings = defaultdict(list)
+    doc_len = array.array("I")
+    urls = []
+    for doc in docs:
+        doc_id = len(urls)
+        tokens = tokenize(document_text(doc))
+        for term, tf in Counter(tokens).items():
+            postings[term].append((doc_id, tf))
+        doc_len.append(len(tokens))
+        urls.append(doc.get("url"))
+
+    terms = sorted(postings)
+    vocab = bytearray()
+    vocab_offsets = array.array("I", [0])
+    posting_offsets = array.array("I", [0])
+    posting_data = array.array("I")
+    for term in terms:
+        vocab += term.encode("utf-8")
+        vocab_offsets.append(len(vocab))
+        for doc_id, tf in postings[term]:
+            posting_data.append(doc_id)
+            posting_data.append(tf)
+        posting_offsets.append(len(posting_data) // 2)
+
+    docs_blob = json.dumps(urls).encode("utf-8")
+    avgdl = (sum(doc_len) / len(doc_len)) if doc_len else 0.0
+
+    doc_len_off = HEADER.size
+    terms_off = doc_len_off + doc_len.itemsize * len(doc_len)
+    vocab_off = terms_off + vocab_offsets.itemsize * (len(vocab_offsets) + len(posting_offsets))
+    postings_off = vocab_off + len(vocab)
+    docs_off = postings_off + posting_data.itemsize * len(posting_data)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, 1, len(urls), len(terms), avgdl,
+            doc_len_off, terms_off, vocab_off, postings_off, docs_off
+        ))
+        doc_len.tofile(f)
+        vocab_offsets.tofile(f)
+        posting_offsets.tofile(f)
+        f.write(vocab)
+        posting_data.tofile(f)
+        f.write(docs_blob)
+    # Remplacement atomique : la Webapp ne lit jamais un index à moitié écrit
+    os.replace(tmp_path, path)
+    return len(urls)
+
+
+class BM25Index:
+    """Read-only BM25 index over a memory-mapped index file."""
+
+    def __init__(self, path, k1=1.2, b=0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, _, self.n_docs, self.n_terms, self.avgdl,
+         doc_len_off, terms_off, vocab_off, postings_off, docs_off) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a BM25 index file")
+
+        view = memoryview(self.mm)
+        self.doc_len = view[doc_len_off:terms_off].cast("I")
+        offsets = view[terms_off:vocab_off].cast("I")
+        self.vocab_offsets = offsets[:self.n_terms + 1]
+        self.posting_offsets = offsets[self.n_terms + 1:]
+        self.vocab_off = vocab_off
+        self.postings = view[postings_off:docs_off].cast("I")
+        self.urls = json.loads(bytes(view[docs_off:]))
+        self._views = [view, offsets, self.doc_len, self.vocab_offsets, self.posting_offsets, self.postings]
+
+    def close(self):
+        """Unmap the index file (the views on the mapping must be released first)."""
+        for view in self._views:
+            view.release()
+        self.mm.close()
+
+    def _term(self, i):
+        start = self.vocab_off + self.vocab_offsets[i]
+        end = self.vocab_off + self.vocab_offsets[i + 1]
+        return self.mm[start:end].decode("utf-8")
+
+    def _find(self, term):
+        """Binary search of ``term`` in the sorted vocabulary; index or -1."""
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terms and self._term(lo) == term:
+            return lo
+        return -1
+
+    def search(self, query, size=200):
+        """Return the URLs of the best matching animals, best first."""
+        return [url for url, _ in self.search_with_scores(query, size)]
+
+    def search_with_scores(self, query, size=200):
+        """Return (url, score) pairs of the best matching animals."""
+        scores = defaultdict(float)
+        k1, b, avgdl = self.k1, self.b, self.avgdl or 1.0
+        for term in set(tokenize(query)):
+            i = self._find(term)
+            if i < 0:
+                continue
+            start, end = self.posting_offsets[i], self.posting_offsets[i + 1]
+            df = end - start
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            entries = self.postings[2 * start:2 * end]
+            for j in range(0, len(entries), 2):
+                doc_id, tf = entries[j], entries[j + 1]
+                norm = k1 * (1 - b + b * self.doc_len[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (k1 + 1) / (tf + norm)
+        best = heapq.nlargest(size, scores.items(), key=lambda item: item[1])
+        return [(self.urls[doc_id], score) for doc_id, score in best]
+
+
+class BM25Search:
+    """Search backend loading the index file lazily on first use.
+
+    The file is re-mapped when it has been rebuilt since it was loaded, and
+    the previous mapping closed. The backend is shared by the Streamlit
+    sessions, so searches and re-mapping are serialized by a lock.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._index = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        return os.path.exists(self.path)
+
+    def search(self, query, size=200):
+        mtime = os.stat(self.path).st_mtime_ns
+        with self._lock:
+            if self._index is None or mtime != self._mtime:
+                index = BM25Index(self.path)
+                if self._index is not None:
+                    self._index.close()
+                self._index, self._mtime = index, mtime
+            return self._index.search(query, size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the embedded BM25 index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build the index from MongoDB or a feed file")
+    build.add_argument("--json", help="read animals from this .json / .jsonl(.gz/.zst) feed instead of MongoDB")
+    build.add_argument("--output", default=DEFAULT_INDEX_PATH)
+    search = sub.add_parser("search", help="run a query against the index")
+    search.add_argument("query")
+    search.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    search.add_argument("--size", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        if args.json:
+            # Lecture en flux du flux d'export (tableau JSON ou JSON Lines, .gz / .zst)
+            from fix_json import iter_records
+
+            docs = iter_records(args.json)
+        else:
+            from datastore.client import get_collection
+
+            docs = get_collection().find({}, {"_id": 0}).batch_size(1000)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        count = build_index(docs, args.output)
+        print(f"✅ {count} animaux indexés dans {args.output}")
+    else:
+        for url, score in BM25Index(args.index).search_with_scores(args.query, args.size):
+            print(f"{score:6.2f}  {url}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Couche d'accès aux données de la Webapp (mode MongoDB)
+
+All the queries app.py runs live here, so they can be called, profiled and
+load-tested without Streamlit (see benchmarks/query_latency.py).
+"""
+import csv
+import io
+
+from config import COLLECTION_NAME, META_COLLECTION
+from datastore.facets import count_locations, load_location_counts
+from datastore.taxonomy import TAXONOMY_COLLECTION, load_children, subtree_filter
+
+# Colonnes de filtre de la sidebar
+FACET_FIELDS = ("habitat", "diet", "conservation_status")
+PAGE_SIZE = 200
+EXPORT_COLUMNS = ["animal_name", "scientific_name", "habitat", "diet", "conservation_status"]
+# Vue d'accueil pré-rendue (cartes et figures), dans la collection meta
+LANDING_ID = "landing"
+
+
+def build_filter(search_query=None, search_urls=None, habitats=None, diets=None, statuses=None, locations=None,
+                 taxonomy=None):
+    """MongoDB filter for the sidebar state.
+
+    ``search_urls`` (full-text search results) wins over the name regex;
+    pass None when no search backend answered. ``taxonomy`` is a node path
+    of the taxonomy tree (all animals under it).
+    """
+    filter_query = {}
+    if search_query:
+        if search_urls is not None:
+            filter_query["url"] = {"$in": search_urls}
+        else:
+            filter_query["animal_name"] = {"$regex": search_query, "$options": "i"}
+    if habitats:
+        filter_query["habitat"] = {"$in": list(habitats)}
+    if diets:
+        filter_query["diet"] = {"$in": list(diets)}
+    if statuses:
+        filter_query["conservation_status"] = {"$in": list(statuses)}
+    if locations:
+        # Champ liste : servi par l'index multikey sur locations
+        filter_query["locations"] = {"$in": list(locations)}
+    if taxonomy:
+        # Préfixe ancré : servi par l'index sur taxonomy_path
+        filter_query.update(subtree_filter(taxonomy))
+    return filter_query
+
+
+def export_csv(animals, columns):
+    """CSV export of the selected ``columns`` of ``animals``."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for animal in animals:
+        writer.writerow({column: animal.get(column) for column in columns})
+    return buffer.getvalue()
+
+
+def rank_by_urls(animals, urls):
+    """``animals`` in the order of ``urls`` (search ranking), unranked ones last."""
+    rank = {url: i for i, url in enumerate(urls)}
+    return sorted(animals, key=lambda animal: rank.get(animal.get("url"), len(rank)))
+
+
+class AnimalRepository:
+    """Queries of the Webapp on the animals collection."""
+
+    def __init__(self, db, collection_name=COLLECTION_NAME, meta_collection=META_COLLECTION):
+        self.db = db
+        self.collection = db[collection_name]
+        self.meta = db[meta_collection]
+
+    def data_version(self):
+        """Version published by `sync_data.py cache` (None if never synced)."""
+        meta = self.meta.find_one({"_id": "data_version"})
+        return meta["version"] if meta else None
+
+    def landing(self, data_version):
+        """Pre-rendered unfiltered view of ``data_version`` (see charts.py), None if not built yet."""
+        return self.meta.find_one({"_id": LANDING_ID, "version": data_version}, {"_id": 0, "version": 0})
+
+    def store_landing(self, data_version, landing):
+        """Share the rendered unfiltered view of ``data_version`` with every session and process."""
+        self.meta.replace_one({"_id": LANDING_ID}, {"version": data_version, **landing}, upsert=True)
+
+    def facets(self):
+        """Sorted non-empty distinct values of the sidebar filter fields."""
+        facets = {field: sorted(v for v in self.collection.distinct(field) if v) for field in FACET_FIELDS}
+        facets["locations"] = sorted(row["location"] for row in self.location_counts())
+        return facets
+
+    def location_counts(self):
+        """Animals per location, precomputed at ingest (aggregated here if never stored)."""
+        counts = load_location_counts(self.meta)
+        return counts if counts is not None else count_locations(self.collection)
+
+    def taxonomy_children(self, parent=None):
+        """Nodes of the precomputed taxonomy tree under ``parent`` (kingdoms when None)."""
+        return load_children(self.db[TAXONOMY_COLLECTION], parent)
+
+    def metrics(self, facets=None):
+        """Header metrics: total animals, distinct habitats and diets.
+
+        Counted server-side; pass already fetched ``facets`` to skip the
+        distinct queries.
+        """
+        if facets is None:
+            facets = {field: [v for v in self.collection.distinct(field) if v] for field in ("habitat", "diet")}
+        return {
+            "total": self.collection.count_documents({}),
+            "habitats": len(facets["habitat"]),
+            "diets": len(facets["diet"]),
+        }
+
+    def page(self, filter_query, limit=PAGE_SIZE, ranking=None):
+        """Animals matching ``filter_query`` (at most ``limit``).
+
+        ``ranking`` (full-text search URLs, best first) orders the page;
+        ``$in`` returns the matches in natural order.
+        """
+        animals = list(self.collection.find(filter_query, {"_id": 0}).limit(limit))
+        return animals if ranking is None else rank_by_urls(animals, ranking)
+
+    def detail(self, url):
+        """Full document of one animal, None if unknown."""
+        return self.collection.find_one({"url": url}, {"_id": 0})
+
+    def export(self, filter_query, columns=EXPORT_COLUMNS, limit=PAGE_SIZE):
+        """CSV of the ``columns`` of the animals matching ``filter_query``."""
+        projection = {column: 1 for column in columns}
+        projection["_id"] = 0
+        return export_csv(self.collection.find(filter_query, projection).limit(limit), columns)
@@ -0,0 +1,76 @@
+"""Backends de recherche plein texte pour la Webapp"""
+import json
+import time
+import urllib.error
+import urllib.request
+
+from config import ELASTICSEARCH_URL, ELASTICSEARCH_INDEX
+from fulltext import BM25Search
+
+# Champs interrogés (le nom de l'animal pèse plus lourd)
+SEARCH_FIELDS = ["animal_name^3", "description", "habitat", "diet", "key_facts"]
+
+
+class ElasticsearchSearch:
+    """Full-text search over the animals index through the Elasticsearch REST API."""
+
+    def __init__(self, url=ELASTICSEARCH_URL, index=ELASTICSEARCH_INDEX, timeout=2, recheck_interval=30):
+        self.url = url.rstrip("/")
+        self.index = index
+        self.timeout = timeout
+        self.recheck_interval = recheck_interval
+        self._available = None
+        self._checked_at = 0.0
+
+    def available(self):
+        """Return True if the cluster answers; the result is cached for recheck_interval seconds."""
+        now = time.monotonic()
+        if self._available is None or now - self._checked_at > self.recheck_interval:
+            try:
+                with urllib.request.urlopen(self.url + "/", timeout=self.timeout) as response:
+                    self._available = response.status == 200
+            except (urllib.error.URLError, OSError):
+                self._available = False
+            self._checked_at = now
+        return self._available
+
+    def search(self, query, size=200):
+        """Return the URLs of the best matching animals, best first."""
+        body = {
+            "size": size,
+            "_source": ["url"],
+            "query": {
+                "multi_match": {
+                    "query": query,
+                    "fields": SEARCH_FIELDS,
+                    "fuzziness": "AUTO",
+                }
+            },
+        }
+        request = urllib.request.Request(
+            f"{self.url}/{self.index}/_search",
+            data=json.dumps(body).encode("utf-8"),
+            method="POST",
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.loads(response.read())
+        return [hit["_source"]["url"] for hit in payload.get("hits", {}).get("hits", [])]
+
+
+def search_backends():
+    """Full-text backends, in order of preference."""
+    return (ElasticsearchSearch(), BM25Search())
+
+
+def get_search_backend(backends=None):
+    """Return the first available full-text backend, or None (name regex fallback).
+
+    Elasticsearch is preferred; the embedded BM25 index serves offline search.
+    Pass long-lived ``backends`` (see ``search_backends``) to keep the BM25
+    mapping and the cached cluster availability between calls.
+    """
+    for backend in backends or search_backends():
+        if backend.available():
+            return backend
+    return None
@@ -0,0 +1,181 @@
+"""Mode de données « snapshot » : requêtes vectorisées sur le snapshot Arrow
+
+The snapshot written by the crawler (crawler/snapshot.py) is memory-mapped
+once per process; filters and chart counts run as Arrow compute kernels.
+Dictionary-encoded columns are filtered and counted on their (small)
+dictionary and indices instead of on the decoded strings. pandas is only
+imported by the functions building the Table and Stats frames.
+"""
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from datastore.taxonomy import build_nodes
+
+# Colonnes de filtre de la sidebar
+FACET_COLUMNS = ("habitat", "diet", "conservation_status")
+
+
+def load_snapshot(path):
+    """Memory-map the snapshot file and return its table (no copy)."""
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def snapshot_version(path):
+    """Modification time of the snapshot, None if there is none."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _chunks(column):
+    return column.chunks if isinstance(column, pa.ChunkedArray) else [column]
+
+
+def _is_in(column, values):
+    """Boolean mask of ``column`` values in ``values``."""
+    value_set = pa.array(values, type=pa.string())
+    masks = []
+    for chunk in _chunks(column):
+        if pa.types.is_dictionary(chunk.type):
+            # Tester le dictionnaire une fois, puis propager via les indices
+            masks.append(pc.take(pc.is_in(chunk.dictionary, value_set=value_set), chunk.indices))
+        else:
+            masks.append(pc.is_in(chunk, value_set=value_set))
+    return pa.chunked_array(masks, type=pa.bool_())
+
+
+def _starts_with(column, prefix):
+    """Boolean mask of ``column`` values starting with ``prefix``."""
+    masks = []
+    for chunk in _chunks(column):
+        if pa.types.is_dictionary(chunk.type):
+            masks.append(pc.take(pc.starts_with(chunk.dictionary, pattern=prefix), chunk.indices))
+        else:
+            masks.append(pc.starts_with(chunk, pattern=prefix))
+    return pa.chunked_array(masks, type=pa.bool_())
+
+
+def _list_is_in(column, values):
+    """Boolean mask of the rows of list ``column`` holding one of ``values``."""
+    import numpy as np
+
+    value_set = pa.array(values, type=pa.string())
+    masks = []
+    for chunk in _chunks(column):
+        # Tester les éléments aplatis, puis remonter aux lignes par leurs indices parents
+        hits = pc.is_in(pc.list_flatten(chunk), value_set=value_set).to_numpy(zero_copy_only=False)
+        parents = pc.list_parent_indices(chunk).to_numpy(zero_copy_only=False)
+        mask = np.zeros(len(chunk), dtype=bool)
+        mask[parents[hits]] = True
+        masks.append(pa.array(mask))
+    return pa.chunked_array(masks, type=pa.bool_())
+
+
+def _flat(table, column):
+    """``column`` of ``table``, list columns flattened to their elements."""
+    values = table[column]
+    return pc.list_flatten(values) if pa.types.is_list(values.type) else values
+
+
+def value_counts(column):
+    """Counts of the non-null values of ``column`` as a {value: count} dict."""
+    counts = {}
+    for chunk in _chunks(column):
+        if pa.types.is_dictionary(chunk.type):
+            dictionary = chunk.dictionary.to_pylist()
+            result = pc.value_counts(chunk.indices)
+            values = [None if i is None else dictionary[i] for i in result.field("values").to_pylist()]
+        else:
+            result = pc.value_counts(chunk)
+            values = result.field("values").to_pylist()
+        for value, count in zip(values, result.field("counts").to_pylist()):
+            if value is not None:
+                counts[value] = counts.get(value, 0) + count
+    return counts
+
+
+def facet_values(table):
+    """Sorted distinct values of the sidebar filter columns."""
+    facets = {column: sorted(value for value in value_counts(table[column]) if value) for column in FACET_COLUMNS}
+    facets["locations"] = sorted(value for value in value_counts(_flat(table, "locations")) if value)
+    return facets
+
+
+def count_distinct(table, column):
+    return len([value for value in value_counts(table[column]) if value])
+
+
+def taxonomy_nodes(table):
+    """Taxonomy tree nodes with subtree counts, from the snapshot's paths."""
+    if "taxonomy_path" not in table.column_names:
+        return []
+    return build_nodes(value_counts(table["taxonomy_path"]))
+
+
+def filter_table(table, name_pattern=None, urls=None, habitats=None, diets=None, statuses=None, locations=None,
+                 taxonomy=None):
+    """Rows matching the sidebar filters (same semantics as the MongoDB query)."""
+    mask = None
+    conditions = []
+    if urls is not None:
+        conditions.append(_is_in(table["url"], urls))
+    elif name_pattern:
+        conditions.append(pc.match_substring_regex(table["animal_name"], name_pattern, ignore_case=True))
+    if habitats:
+        conditions.append(_is_in(table["habitat"], habitats))
+    if diets:
+        conditions.append(_is_in(table["diet"], diets))
+    if statuses:
+        conditions.append(_is_in(table["conservation_status"], statuses))
+    if locations:
+        conditions.append(_list_is_in(table["locations"], locations))
+    if taxonomy:
+        conditions.append(_starts_with(table["taxonomy_path"], taxonomy))
+    for condition in conditions:
+        mask = condition if mask is None else pc.and_(mask, condition)
+    return table if mask is None else table.filter(mask)
+
+
+def rank_by_urls(table, urls):
+    """Rows of ``table`` in the order of ``urls`` (search ranking), unranked ones last."""
+    ranks = pc.index_in(table["url"], value_set=pa.array(urls, type=pa.string()))
+    # Lignes hors classement (null) placées en fin par défaut
+    return table.take(pc.sort_indices(ranks))
+
+
+def counts_frame(table, column, label):
+    """Value counts of ``column`` (list elements for list columns) as a DataFrame sorted by decreasing count."""
+    import pandas as pd
+
+    counts = value_counts(_flat(table, column))
+    df = pd.DataFrame({label: list(counts), "count": list(counts.values())})
+    return df.sort_values("count", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def _display(tags, texts):
+    """First tag capitalised, else the text truncated to 50 characters, else N/A."""
+    truncated = texts.where(texts.str.len() <= 50, texts.str[:50] + "...")
+    return tags.str.capitalize().fillna(truncated).fillna("N/A")
+
+
+def display_frame(table, alphabetical=True):
+    """Table view rows, sorted alphabetically unless ``alphabetical`` is False, computed column-wise."""
+    import pandas as pd
+
+    df = table.select(
+        ["animal_name", "scientific_name", "habitat", "habitat_tag", "diet", "diet_tag", "conservation_status"]
+    ).to_pandas()
+    display = pd.DataFrame({
+        "Nom": df["animal_name"],
+        "Scientifique": df["scientific_name"].fillna("N/A"),
+        "Habitat": _display(df["habitat_tag"].astype(object), df["habitat"]),
+        "Diet": _display(df["diet_tag"].astype(object), df["diet"]),
+        "Status": df["conservation_status"].astype(object).fillna("N/A"),
+    })
+    if not alphabetical:
+        return display
+    order = display["Nom"].fillna("").str.lower().argsort(kind="stable")
+    return display.iloc[order].reset_index(drop=True)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Latency harness for the Webapp queries (Webapp/repository.py).
+
+Replays simulated user sessions against a local MongoDB: open the app, type
+a search, add habitat/diet/status filters, open an animal's details, export
+the results. Each step runs the same repository calls as a Streamlit rerun.
+The harness prints p50/p95/p99 latency per operation.
+
+By default it seeds `--docs` synthetic animals into a scratch database. Pass
+--no-seed --database animals_db to replay against the real data instead.
+
+Usage:
+    python benchmarks/query_latency.py [--docs 10000] [--sessions 50] [--json latency.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'Webapp'), os.path.dirname(os.path.abspath(__file__))):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from datastore.client import close_clients, get_client  # noqa: E402
+from datastore.facets import ensure_location_index, refresh_location_counts  # noqa: E402
+from config import META_COLLECTION  # noqa: E402
+from repository import AnimalRepository, build_filter  # noqa: E402
+from synthetic import generate_animals, with_tags  # noqa: E402
+
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017')
+PERCENTILES = (50, 95, 99)
+# Filtres de la sidebar -> champ des facettes
+FILTER_FIELDS = {'habitats': 'habitat', 'diets': 'diet', 'statuses': 'conservation_status', 'locations': 'locations'}
+
+
+class LatencyRecorder:
+    """Collects the durations of named operations."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def time(self, operation, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.samples[operation].append(time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        """{operation: {count, p50_ms, p95_ms, p99_ms, max_ms}}"""
+        summary = {}
+        for operation, samples in sorted(self.samples.items()):
+            entry = {'count': len(samples)}
+            for p in PERCENTILES:
+                entry[f'p{p}_ms'] = round(percentile(samples, p) * 1000, 3)
+            entry['max_ms'] = round(max(samples) * 1000, 3)
+            summary[operation] = entry
+        return summary
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def search_terms(repository, count=20):
+    """Words of animal names, as a user would type them."""
+    names = [a['animal_name'] for a in repository.page({}, limit=500) if a.get('animal_name')]
+    words = sorted({word for name in names for word in name.split() if len(word) > 2 and not word.isdigit()})
+    return words[:count] or ['a']
+
+
+def rerun(repository, recorder, facets, filter_query):
+    """Calls of one Streamlit rerun (mode MongoDB, no shared cache)."""
+    recorder.time('data_version', repository.data_version)
+    recorder.time('facets', repository.facets)
+    recorder.time('metrics', repository.metrics, facets)
+    return recorder.time('page', repository.page, filter_query)
+
+
+def replay_session(repository, recorder, rng, facets, terms):
+    """One user session: search, narrow down with filters, open details, export."""
+    state = {'search_query': None, 'habitats': [], 'diets': [], 'statuses': [], 'locations': []}
+    animals = rerun(repository, recorder, facets, build_filter())
+    steps = ['search', 'habitats', 'diets', 'statuses', 'locations']
+    rng.shuffle(steps)
+    for step in steps[:rng.randint(1, len(steps))]:
+        if step == 'search':
+            state['search_query'] = rng.choice(terms)
+        else:
+            values = facets[FILTER_FIELDS[step]]
+            state[step] = rng.sample(values, min(len(values), rng.randint(1, 3)))
+        animals = rerun(repository, recorder, facets, build_filter(**state))
+    recorder.time('location_counts', repository.location_counts)
+    if animals:
+        recorder.time('detail', repository.detail, rng.choice(animals)['url'])
+    recorder.time('export', repository.export, build_filter(**state))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default=MONGO_URI)
+    parser.add_argument('--database', default='animals_bench')
+    parser.add_argument('--collection', default='latency')
+    parser.add_argument('--docs', type=int, default=10000, help="synthetic animals to seed")
+    parser.add_argument('--no-seed', action='store_true', help="replay against the existing collection")
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42, help="random seed of the sessions")
+    parser.add_argument('--json', help="write the summary to this file")
+    args = parser.parse_args(argv)
+
+    client = get_client(args.uri, serverSelectionTimeoutMS=2000)
+    db = client[args.database]
+    if not args.no_seed:
+        db[args.collection].drop()
+        db[args.collection].insert_many(with_tags(generate_animals(args.docs)))
+        # Même état qu'après une ingestion : index multikey et comptages précalculés
+        ensure_location_index(db[args.collection])
+        refresh_location_counts(db[args.collection], db['latency_meta'])
+        print(f"📥 {args.docs} animaux synthétiques insérés dans {args.database}.{args.collection}")
+
+    repository = AnimalRepository(db, args.collection, 'latency_meta' if not args.no_seed else META_COLLECTION)
+    facets = repository.facets()
+    terms = search_terms(repository)
+    rng = random.Random(args.seed)
+    recorder = LatencyRecorder()
+    for _ in range(args.sessions):
+        replay_session(repository, recorder, rng, facets, terms)
+
+    summary = recorder.summary()
+    print(f"{'operation':<14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for operation, entry in summary.items():
+        print(f"{operation:<14} {entry['count']:>6} {entry['p50_ms']:>9} {entry['p95_ms']:>9} "
+              f"{entry['p99_ms']:>9} {entry['max_ms']:>9}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'docs': None if args.no_seed else args.docs, 'sessions': args.sessions, 'operations': summary}, f, indent=2)
+        print(f"✅ Résultats sauvegardés : {args.json}")
+    close_clients()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the scraper, the ingest scripts and the Webapp code.
+
+Every benchmark runs on synthetic animals (benchmarks/synthetic.py) at the
+requested scales. Benchmarks whose dependencies are missing (scrapy, pymongo,
+pyarrow...) or that need an unreachable MongoDB are reported as skipped.
+Results are saved as JSON, by default under benchmarks/results/<commit>.json,
+so two commits can be compared with --compare.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--scales 1000,10000,100000] [--only tagging]
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/abc123.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import islice
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'Scrapy'), os.path.join(ROOT, 'Webapp'), os.path.dirname(os.path.abspath(__file__))):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from synthetic import generate_animals, render_animal_page, with_tags  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017')
+BENCH_DB = os.environ.get('BENCH_DB', 'animals_bench')
+
+BENCHMARKS = []
+
+
+class Skip(Exception):
+    """Raised by a benchmark setup when it cannot run here."""
+
+
+def benchmark(name):
+    """Register a benchmark.
+
+    The decorated function receives the synthetic animals and returns
+    ``(setup, run)``: ``setup`` runs untimed before each repetition, ``run``
+    is timed and returns the number of items processed.
+    """
+    def decorator(func):
+        BENCHMARKS.append((name, func))
+        return func
+    return decorator
+
+
+def mongo_collection(name):
+    """A fresh collection of the benchmark database, or Skip."""
+    try:
+        from pymongo.errors import PyMongoError
+        from datastore.client import get_client
+    except ImportError:
+        raise Skip("pymongo not installed")
+    client = get_client(MONGO_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+    except PyMongoError:
+        raise Skip(f"MongoDB not reachable at {MONGO_URI}")
+    collection = client[BENCH_DB][name]
+    collection.drop()
+    return collection
+
+
+def noop():
+    pass
+
+
+@benchmark('spider.parse_animal_detail')
+def bench_parse_animal_detail(animals):
+    try:
+        from scrapy.http import HtmlResponse, Request
+        from crawler.spiders.animals_spider import AnimalsSpider
+    except ImportError:
+        raise Skip("scrapy not installed")
+    logging.getLogger('animals').setLevel(logging.WARNING)
+    spider = AnimalsSpider()
+    responses = []
+    for animal in animals:
+        request = Request(url=animal['url'], meta={'animal_name': animal['animal_name'], 'source_page': animal['source_page']})
+        responses.append(HtmlResponse(url=animal['url'], request=request, body=render_animal_page(animal), encoding='utf-8'))
+
+    def run():
+        for response in responses:
+            for _ in spider.parse_animal_detail(response):
+                pass
+        return len(responses)
+    return noop, run
+
+
+@benchmark('pipeline.mongodb_ingest')
+def bench_mongodb_ingest(animals):
+    try:
+        from crawler.pipelines import MongoDBPipeline
+    except ImportError as e:
+        raise Skip(f"pipeline dependencies missing: {e}")
+    collection = mongo_collection('pipeline')
+
+    class BenchSpider:
+        logger = logging.getLogger('bench')
+
+    spider = BenchSpider()
+    pipeline = MongoDBPipeline(MONGO_URI, BENCH_DB, 'pipeline')
+
+    def setup():
+        collection.drop()
+        pipeline.open_spider(spider)
+
+    def run():
+        for animal in animals:
+            pipeline.process_item(dict(animal), spider)
+        pipeline.close_spider(spider)
+        return len(animals)
+    return setup, run
+
+
+@benchmark('pipeline.validation')
+def bench_validation(animals):
+    from crawler.validation import compile_schema
+
+    validate = compile_schema()
+    items = [dict(animal) for animal in animals]
+    # Une part d'items invalides, comme les pages sans nom ou sans description
+    for item in items[::20]:
+        item['description'] = item['scientific_name']
+    for item in items[10::20]:
+        item['animal_name'] = None
+
+    def run():
+        for item in items:
+            validate(item)
+        return len(items)
+    return noop, run
+
+
+@benchmark('extract_keywords.tagging')
+def bench_tagging(animals):
+    try:
+        from extract_keywords import tag_animal
+    except ImportError as e:
+        raise Skip(f"extract_keywords dependencies missing: {e}")
+
+    def run():
+        for animal in animals:
+            tag_animal(animal)
+        return len(animals)
+    return noop, run
+
+
+def _feed_benchmark(animals, filename):
+    from fix_json import FeedWriter, is_jsonlines, iter_records
+    try:
+        from import_data import BATCH_SIZE
+    except ImportError:
+        BATCH_SIZE = 1000
+
+    path = os.path.join(tempfile.mkdtemp(prefix='animals_bench_'), filename)
+    writer = FeedWriter(path, is_jsonlines(path))
+    for animal in animals:
+        writer.write(animal)
+    writer.close()
+
+    def run():
+        records = iter_records(path)
+        count = 0
+        while True:
+            batch = list(islice(records, BATCH_SIZE))
+            if not batch:
+                return count
+            count += len(batch)
+    return noop, run
+
+
+@benchmark('import_data.load_json_array')
+def bench_load_json(animals):
+    try:
+        return _feed_benchmark(animals, 'animals.json')
+    except ImportError as e:
+        raise Skip(f"import_data dependencies missing: {e}")
+
+
+@benchmark('import_data.load_jsonlines')
+def bench_load_jsonl(animals):
+    try:
+        return _feed_benchmark(animals, 'animals.jsonl')
+    except ImportError as e:
+        raise Skip(f"import_data dependencies missing: {e}")
+
+
+@benchmark('import_data.insert')
+def bench_import_insert(animals):
+    try:
+        from import_data import BATCH_SIZE
+    except ImportError as e:
+        raise Skip(f"import_data dependencies missing: {e}")
+    collection = mongo_collection('import')
+
+    def run():
+        for start in range(0, len(animals), BATCH_SIZE):
+            collection.insert_many([dict(a) for a in animals[start:start + BATCH_SIZE]])
+        return len(animals)
+    return collection.drop, run
+
+
+@benchmark('webapp.mongodb_queries')
+def bench_webapp_queries(animals):
+    from repository import AnimalRepository, build_filter
+
+    collection = mongo_collection('webapp')
+    tagged = with_tags(animals)
+    collection.insert_many([dict(a) for a in tagged])
+    repository = AnimalRepository(collection.database, 'webapp')
+    habitats = sorted({a['habitat'] for a in tagged})[:3]
+    filters = [
+        build_filter(),
+        build_filter(search_query='monitor'),
+        build_filter(diets=sorted({a['diet'] for a in tagged})[:5]),
+        build_filter(habitats=habitats, statuses=['Endangered', 'Vulnerable']),
+    ]
+
+    def run():
+        # Même séquence de requêtes qu'un rerun de la Webapp, pour chaque filtre
+        for query in filters:
+            facets = repository.facets()
+            repository.metrics(facets)
+            repository.page(query)
+        return len(filters)
+    return noop, run
+
+
+def _landing_repository(animals):
+    try:
+        import charts
+    except ImportError as e:
+        raise Skip(f"plotly not installed: {e}")
+    from repository import AnimalRepository
+
+    collection = mongo_collection('landing')
+    collection.database['landing_meta'].drop()
+    collection.insert_many([dict(a) for a in with_tags(animals)])
+    return charts, AnimalRepository(collection.database, 'landing', 'landing_meta')
+
+
+@benchmark('webapp.landing_build')
+def bench_landing_build(animals):
+    charts, repository = _landing_repository(animals)
+
+    def run():
+        # Premier affichage sans cache : requêtes, comptages et construction des figures
+        charts.load_figures(charts.build_landing(repository)['figures'])
+        return 1
+    return noop, run
+
+
+@benchmark('webapp.landing_cached')
+def bench_landing_cached(animals):
+    charts, repository = _landing_repository(animals)
+    repository.store_landing('bench', charts.build_landing(repository))
+
+    def run():
+        # Premier affichage d'une session : lecture du rendu stocké
+        charts.load_figures(repository.landing('bench')['figures'])
+        return 1
+    return noop, run
+
+
+@benchmark('webapp.table_frame')
+def bench_table_frame(animals):
+    try:
+        import analysis
+    except ImportError as e:
+        raise Skip(f"pandas not installed: {e}")
+    tagged = with_tags(animals) if _has_tagging() else animals
+
+    def run():
+        analysis.table_frame(tagged)
+        return len(tagged)
+    return noop, run
+
+
+@benchmark('webapp.stats_counts')
+def bench_stats_counts(animals):
+    try:
+        import analysis
+    except ImportError as e:
+        raise Skip(f"pandas not installed: {e}")
+    tagged = with_tags(animals) if _has_tagging() else animals
+
+    def run():
+        analysis.first_tag_counts(tagged, 'diet_tags', 'diet')
+        analysis.first_tag_counts(tagged, 'habitat_tags', 'habitat')
+        analysis.status_counts(tagged)
+        analysis.distinct_count(tagged, 'habitat')
+        analysis.distinct_count(tagged, 'diet')
+        return len(tagged)
+    return noop, run
+
+
+@benchmark('webapp.snapshot_queries')
+def bench_snapshot_queries(animals):
+    try:
+        import snapshot
+        from crawler.snapshot import write_snapshot
+    except ImportError as e:
+        raise Skip(f"pyarrow/pandas not installed: {e}")
+    tagged = with_tags(animals) if _has_tagging() else animals
+    path = os.path.join(tempfile.mkdtemp(prefix='animals_bench_'), 'animals.arrow')
+    write_snapshot(tagged, path)
+    table = snapshot.load_snapshot(path)
+    statuses = ['Endangered', 'Vulnerable']
+
+    def run():
+        snapshot.facet_values(table)
+        results = snapshot.filter_table(table, name_pattern='monitor', statuses=statuses)
+        snapshot.display_frame(results)
+        for column in ('diet_tag', 'habitat_tag', 'conservation_status'):
+            snapshot.counts_frame(table, column, 'value')
+        return table.num_rows
+    return noop, run
+
+
+@benchmark('webapp.bm25_search')
+def bench_bm25_search(animals):
+    from fulltext import BM25Index, build_index
+
+    path = os.path.join(tempfile.mkdtemp(prefix='animals_bench_'), 'animals.bm25')
+    build_index(animals, path)
+    index = BM25Index(path)
+    queries = ['carnivorous insects', 'coral reefs open sea', 'grass leaves herbivore', 'nocturnal solitary owl']
+
+    def run():
+        for query in queries:
+            index.search(query)
+        return len(queries)
+    return noop, run
+
+
+def _has_tagging():
+    try:
+        import extract_keywords  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_benchmarks(scales, only=None, repeat=3):
+    """Run the selected benchmarks at each scale and return the result entries."""
+    results = []
+    for scale in scales:
+        animals = generate_animals(scale)
+        for name, func in BENCHMARKS:
+            if only and not any(o in name for o in only):
+                continue
+            entry = {'benchmark': name, 'scale': scale}
+            try:
+                setup, run = func(animals)
+                timings = []
+                items = 0
+                for _ in range(repeat):
+                    setup()
+                    start = time.perf_counter()
+                    items = run()
+                    timings.append(time.perf_counter() - start)
+            except Skip as e:
+                entry['skipped'] = str(e)
+                print(f"  {name:<32} {scale:>7}  skipped: {e}")
+                results.append(entry)
+                continue
+            best = min(timings)
+            entry.update({
+                'items': items,
+                'best_s': round(best, 6),
+                'mean_s': round(sum(timings) / len(timings), 6),
+                'items_per_s': round(items / best, 1) if best else None,
+            })
+            print(f"  {name:<32} {scale:>7}  {best * 1000:10.2f} ms  {entry['items_per_s']:>12} items/s")
+            results.append(entry)
+    return results
+
+
+def compare(base_path, results):
+    """Print the speed ratio of ``results`` against a previous results file."""
+    with open(base_path, encoding='utf-8') as f:
+        base = json.load(f)
+    previous = {(r['benchmark'], r['scale']): r for r in base['results'] if 'best_s' in r}
+    print(f"\nComparison with {base.get('commit')} (ratio > 1 means faster now):")
+    for entry in results:
+        old = previous.get((entry['benchmark'], entry['scale']))
+        if old and 'best_s' in entry and entry['best_s']:
+            print(f"  {entry['benchmark']:<32} {entry['scale']:>7}  x{old['best_s'] / entry['best_s']:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='1000,10000,100000', help="comma-separated dataset sizes")
+    parser.add_argument('--only', help="comma-separated substrings of benchmark names to run")
+    parser.add_argument('--repeat', type=int, default=3, help="timed repetitions (the best one is kept)")
+    parser.add_argument('--output', help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', help="previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    scales = [int(s) for s in args.scales.split(',') if s]
+    only = args.only.split(',') if args.only else None
+    commit = git_commit()
+    print(f"Benchmarks @ {commit}")
+    results = run_benchmarks(scales, only, args.repeat)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }, f, indent=2)
+    print(f"✅ Résultats sauvegardés : {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
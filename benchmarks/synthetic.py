@@ -0,0 +1,139 @@
+"""Synthetic animal documents and detail pages for benchmarks.
+
+Documents follow the shape produced by ``AnimalsSpider.parse_animal_detail``
+(long habitat/diet paragraphs, repeated key facts, classification, facts,
+locations) plus the tags added by extract_keywords.py. Generation is
+deterministic for a given seed, so runs on different commits see the same
+data.
+"""
+import html
+import random
+
+SYLLABLES = [
+    "ar", "ba", "ca", "da", "el", "fa", "go", "ha", "ik", "ja", "ka", "lo", "ma", "ne",
+    "or", "pa", "qu", "ra", "sa", "ta", "ul", "va", "wo", "xe", "ya", "ze",
+]
+KINDS = ["Monitor", "Shark", "Finch", "Eel", "Bat", "Frog", "Beetle", "Deer", "Owl", "Snake", "Wolf", "Crab"]
+STATUSES = ["Least Concern", "Near Threatened", "Vulnerable", "Endangered", "Critically Endangered", None]
+LOCATIONS = ["Africa", "Asia", "Central-America", "Eurasia", "Europe", "North-America", "Ocean", "Oceania", "South-America"]
+KEY_FACTS = [
+    "Solitary", "Mainly solitary", "Herd", "Flock", "Colony", "Diurnal", "Nocturnal", "Diurnal/Nocturnal",
+    "Brown", "Grey", "Yellow", "Red", "Black", "White", "Orange", "Multi-colored", "Golden", "Cream",
+]
+HABITAT_PHRASES = [
+    "arid woodland and scrubland", "tropical rainforest", "open grasslands and plains", "coral reefs and the open sea",
+    "freshwater rivers and ponds", "high mountain slopes", "underground burrows and caves", "sandy desert dunes",
+]
+DIET_PHRASES = [
+    "carnivorous, feeding primarily on insects and other invertebrates", "a herbivore grazing on grass and leaves",
+    "omnivorous and eats both plants and small animals", "a piscivore hunting fish in shallow water",
+    "insectivorous, catching beetles and ants", "a predator that hunts birds and small mammals",
+]
+CLASSES = {
+    "Mammalia": ["Carnivora", "Primates", "Rodentia", "Chiroptera"],
+    "Aves": ["Passeriformes", "Strigiformes", "Accipitriformes"],
+    "Reptilia": ["Squamata", "Testudines"],
+    "Amphibia": ["Anura", "Caudata"],
+    "Actinopterygii": ["Anguilliformes", "Perciformes"],
+}
+FILLER = (
+    "These animals are known to live for many years in the wild and are often observed by researchers "
+    "studying their behaviour, breeding cycles and seasonal migrations across their natural range."
+).split()
+
+
+def _name(rng):
+    word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    return f"{word} {rng.choice(KINDS)}"
+
+
+def _sentence(rng, phrase, words=25):
+    filler = " ".join(rng.choice(FILLER) for _ in range(words))
+    return f"They are found in {phrase}. {filler.capitalize()}."
+
+
+def generate_animal(rng, index):
+    """One synthetic animal document."""
+    name = f"{_name(rng)} {index}"
+    slug = name.lower().replace(" ", "-")
+    letter = name[0].lower()
+    animal_class = rng.choice(list(CLASSES))
+    order = rng.choice(CLASSES[animal_class])
+    genus = "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+    habitat_phrase = rng.choice(HABITAT_PHRASES)
+    diet_phrase = rng.choice(DIET_PHRASES)
+    # Faits répétés, comme dans les données réelles ("Solitary" deux fois)
+    key_facts = rng.sample(KEY_FACTS, rng.randint(3, 10))
+    if rng.random() < 0.2:
+        key_facts.append(key_facts[0])
+
+    return {
+        "animal_name": name,
+        "scientific_name": f"{genus} {rng.choice(SYLLABLES)}{rng.choice(SYLLABLES)}",
+        "description": f"The {name} is a member of the order {order}. " + _sentence(rng, habitat_phrase, 40),
+        "key_facts": key_facts,
+        "conservation_status": rng.choice(STATUSES),
+        "habitat": _sentence(rng, habitat_phrase),
+        "diet": f"The {name} is {diet_phrase}. " + _sentence(rng, habitat_phrase, 15),
+        "image_url": None,
+        "classification": {
+            "Kingdom": "Animalia", "Phylum": "Chordata", "Class": animal_class,
+            "Order": order, "Family": f"{genus}idae", "Genus": genus,
+        },
+        "facts": {
+            "Main Prey": rng.choice(["Insects", "Fish", "Grass", "Rodents", "Fruit"]),
+            "Habitat": habitat_phrase.capitalize(),
+            "Lifespan": f"{rng.randint(2, 60)} years",
+        },
+        "locations": rng.sample(LOCATIONS, rng.randint(1, 3)),
+        "url": f"https://a-z-animals.com/animals/{slug}/",
+        "source_page": f"https://a-z-animals.com/animals/animals-that-start-with-{letter}/",
+    }
+
+
+def generate_animals(count, seed=42):
+    """Deterministic list of ``count`` synthetic animal documents."""
+    rng = random.Random(seed)
+    return [generate_animal(rng, i) for i in range(count)]
+
+
+def with_tags(animals):
+    """Add the diet_tags / habitat_tags fields extract_keywords.py would set."""
+    from extract_keywords import tag_animal
+
+    return [{**animal, **tag_animal(animal)} for animal in animals]
+
+
+def render_animal_page(animal):
+    """HTML detail page laid out like a-z-animals.com, as parsed by the spider."""
+    e = html.escape
+    facts = "".join(f"<li>{e(f)}</li>" for f in animal["key_facts"])
+    classification = "".join(
+        f"<dt>{e(k)}:</dt><dd>{e(v)}</dd>" for k, v in animal["classification"].items()
+    )
+    animal_facts = "".join(f"<dt>{e(k)}</dt><dd>{e(v)}</dd>" for k, v in animal["facts"].items())
+    locations = "".join(
+        f'<a href="https://a-z-animals.com/animals/location/{e(loc.lower())}/">{e(loc)}</a>'
+        for loc in animal["locations"]
+    )
+    labelled = "".join(
+        f"<div><span>{label}</span><span>{e(value)}</span></div>"
+        for label, value in (
+            ("Conservation Status", animal["conservation_status"] or "Not Evaluated"),
+            ("Habitat", animal["habitat"]),
+            ("Diet", animal["diet"]),
+        )
+    )
+    return f"""<!DOCTYPE html>
+<html><head><title>{e(animal["animal_name"])}</title></head>
+<body>
+<nav><a href="https://a-z-animals.com/animals/location/">By Location</a></nav>
+<h1>{e(animal["animal_name"])}</h1>
+<em>{e(animal["scientific_name"])}</em>
+<dl class="animal-facts">{classification}</dl>
+<div itemprop="description"><p>{e(animal["description"])}</p></div>
+<div class="animal-facts"><ul>{facts}</ul></div>
+{labelled}
+<dl class="row" title="{e(animal["animal_name"])} Facts">{animal_facts}</dl>
+<div class="locations">{locations}</div>
+</body></html>"""
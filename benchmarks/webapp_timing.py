@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Cold-start and per-interaction timings of the Streamlit Webapp.
+
+Runs Webapp/app.py headless with streamlit.testing (AppTest). Each cold
+start runs in a fresh interpreter, so module imports are included. The
+interactions are timed as reruns: switch view, type a search, add a
+filter. The app needs the usual MongoDB (MONGODB_URI), --mongomock N to
+serve it from an in-memory mongomock database seeded with N synthetic
+animals, or DATA_MODE=snapshot with a snapshot file.
+
+To compare before/after, point --app at another checkout of the Webapp,
+for example a `git worktree add /tmp/before <commit>`:
+    python benchmarks/webapp_timing.py --mongomock 5000 --json after.json
+    python benchmarks/webapp_timing.py --app /tmp/before/Webapp/app.py --mongomock 5000 --json before.json
+
+Reference run of the active-view change (st.tabs replaced by the view
+radio, deferred pandas/plotly imports): commit f51ca19 before, 4aa53e7
+after, default DATA_MODE (mongo) on --mongomock 5000, 5 cold starts and 5
+warm sessions, median ms, one CPU, Python 3.11, streamlit 1.66, mongomock
+4.3. mongomock evaluates every query in Python (the unfiltered page of
+200 animals alone takes about 110 ms here), which puts the same floor
+under each rerun of both versions; a real MongoDB answers these queries
+from its indexes:
+
+    step           before   after
+    cold_start     1232.1  1077.6
+    rerun           653.5   566.4
+    view_stats      636.2   724.9
+    view_details    601.4   549.6
+    view_export     603.5   552.0
+    view_table      616.5   564.8
+    search          500.5   453.0
+    filter_status   504.6   460.2
+    clear_search    488.6   478.7
+
+Only view_stats is slower after: the Stats figures are built when the view
+is opened instead of on every rerun.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_APP = os.path.join(ROOT, 'Webapp', 'app.py')
+
+# Exécuté dans un interpréteur neuf : imports de l'app (pandas, plotly...) inclus
+COLD_START = """
+import os, sys, time
+from streamlit.testing.v1 import AppTest
+if int(sys.argv[2]):
+    sys.path.insert(0, sys.argv[3])
+    from webapp_timing import use_mongomock
+    use_mongomock(int(sys.argv[2]))
+os.chdir(os.path.dirname(sys.argv[1]))
+sys.path.insert(0, os.path.dirname(sys.argv[1]))
+start = time.perf_counter()
+AppTest.from_file(sys.argv[1], default_timeout=60).run()
+print(time.perf_counter() - start)
+"""
+
+
+def use_mongomock(count):
+    """Serve every ``pymongo.MongoClient`` from one in-memory mongomock store.
+
+    The store is seeded with ``count`` synthetic animals (benchmarks/synthetic.py)
+    in the database the app reads (MONGO_DB, default animals_db). Must run
+    before the app imports pymongo's client.
+    """
+    import mongomock
+    import pymongo
+    # with_tags passe par extract_keywords.py, à la racine du dépôt
+    if ROOT not in sys.path:
+        sys.path.append(ROOT)
+    from synthetic import generate_animals, with_tags
+
+    store = mongomock.store.ServerStore()
+
+    class SharedClient(mongomock.MongoClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, _store=store, **kwargs)
+
+    SharedClient()[os.environ.get('MONGO_DB', 'animals_db')]['animals'].insert_many(
+        with_tags(generate_animals(count))
+    )
+    pymongo.MongoClient = SharedClient
+
+
+def cold_start(app, runs, mongomock_count=0):
+    """Seconds of the first run of ``app`` in ``runs`` fresh interpreters."""
+    timings = []
+    bench_dir = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', COLD_START, app, str(mongomock_count), bench_dir], text=True
+        )
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def select_view(at, label):
+    """Switch view with the navigation radio.
+
+    Versions of the app built on st.tabs have no radio: every view already
+    runs on each rerun, so the step is a plain rerun there.
+    """
+    radios = [radio for radio in at.radio if radio.key == 'view']
+    if radios:
+        radios[0].set_value(label)
+    return at
+
+
+def select_first_status(at):
+    """Pick the first conservation status in the sidebar filter, if any."""
+    if len(at.multiselect) > 2 and at.multiselect[2].options:
+        at.multiselect[2].select(at.multiselect[2].options[0])
+    return at
+
+
+def interactions(app, runs):
+    """Seconds of each scripted interaction, over ``runs`` warm sessions."""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(os.path.dirname(app))
+    sys.path.insert(0, os.path.dirname(app))
+    steps = [
+        ('rerun', lambda at: at),
+        ('view_stats', lambda at: select_view(at, '📈 Stats')),
+        ('view_details', lambda at: select_view(at, '📋 Details')),
+        ('view_export', lambda at: select_view(at, '⬇️ Export')),
+        ('view_table', lambda at: select_view(at, '📊 Table')),
+        ('search', lambda at: at.text_input[0].input('monitor')),
+        ('filter_status', select_first_status),
+        ('clear_search', lambda at: at.text_input[0].input('')),
+    ]
+    timings = {name: [] for name, _ in steps}
+    for _ in range(runs):
+        at = AppTest.from_file(app, default_timeout=60)
+        at.run()
+        for name, action in steps:
+            action(at)
+            start = time.perf_counter()
+            at.run()
+            timings[name].append(time.perf_counter() - start)
+    return timings
+
+
+def describe(samples):
+    return {
+        'runs': len(samples),
+        'median_ms': round(statistics.median(samples) * 1000, 1),
+        'max_ms': round(max(samples) * 1000, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default=DEFAULT_APP, help="path of the app.py to measure")
+    parser.add_argument('--cold-runs', type=int, default=5)
+    parser.add_argument('--runs', type=int, default=5, help="warm sessions replaying the interactions")
+    parser.add_argument('--json', help="write the timings to this file")
+    parser.add_argument('--mongomock', type=int, default=0, metavar='N',
+                        help="serve the app from mongomock seeded with N synthetic animals instead of MONGODB_URI")
+    args = parser.parse_args(argv)
+    app = os.path.abspath(args.app)
+
+    if args.mongomock:
+        use_mongomock(args.mongomock)
+    results = {'app': app, 'cold_start': describe(cold_start(app, args.cold_runs, args.mongomock))}
+    results['interactions'] = {name: describe(samples) for name, samples in interactions(app, args.runs).items()}
+
+    print(f"{'cold_start':<16} {results['cold_start']['median_ms']:>9} ms")
+    for name, entry in results['interactions'].items():
+        print(f"{name:<16} {entry['median_ms']:>9} ms  (max {entry['max_ms']} ms)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Résultats sauvegardés : {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""Accès MongoDB partagé par les scripts, le pipeline Scrapy et la Webapp.
+
+    datastore.settings  connection settings (environment variables, no pymongo import)
+    datastore.client    pooled clients per process, retry with backoff
+    datastore.bulk      cursor batching and buffered bulk writes
+    datastore.changes   data version bumps and tombstones of deleted animals
+    datastore.facets    location index and precomputed per-location counts
+    datastore.taxonomy  taxonomy materialized paths and subtree counts
+"""
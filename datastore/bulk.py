@@ -0,0 +1,84 @@
+"""Lecture par lots et écritures groupées
+
+``find_batches`` reads a collection in lists of ``batch_size`` documents
+with a matching cursor batch size (one round-trip per list).
+``BulkWriter`` buffers write operations and sends them with one
+``bulk_write`` per ``batch_size`` operations instead of one request per
+document.
+"""
+from itertools import islice
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import ServerSelectionTimeoutError
+
+from datastore import settings
+from datastore.client import with_retry
+
+
+def iter_batches(iterable, size=None):
+    """Yield lists of at most ``size`` items of ``iterable``."""
+    size = size or settings.BATCH_SIZE
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def find_batches(collection, filter=None, projection=None, batch_size=None, **kwargs):
+    """Yield the documents matching ``filter`` in lists of ``batch_size``."""
+    batch_size = batch_size or settings.BATCH_SIZE
+    cursor = collection.find(filter or {}, projection, **kwargs).batch_size(batch_size)
+    return iter_batches(cursor, batch_size)
+
+
+class BulkWriter:
+    """Buffer of write operations flushed with ``bulk_write``.
+
+    Use as a context manager so the last partial batch is flushed. Unordered
+    by default (the server may apply a batch in parallel); pass ordered=True
+    when several operations of a batch target the same document.
+    """
+
+    def __init__(self, collection, batch_size=None, ordered=False):
+        self.collection = collection
+        self.batch_size = batch_size or settings.BATCH_SIZE
+        self.ordered = ordered
+        self.operations = []
+        self.stats = {"inserted": 0, "matched": 0, "modified": 0, "upserted": 0}
+
+    def add(self, operation):
+        """Queue a pymongo write operation (InsertOne, UpdateOne...)."""
+        self.operations.append(operation)
+        if len(self.operations) >= self.batch_size:
+            self.flush()
+
+    def insert_one(self, document):
+        self.add(InsertOne(document))
+
+    def update_one(self, filter, update, upsert=False):
+        self.add(UpdateOne(filter, update, upsert=upsert))
+
+    def flush(self):
+        """Send the queued operations; returns the number sent."""
+        if not self.operations:
+            return 0
+        operations, self.operations = self.operations, []
+        # Sans serveur joignable, rien n'a été envoyé : la nouvelle tentative est sûre
+        result = with_retry(
+            self.collection.bulk_write, operations, ordered=self.ordered,
+            retry_on=(ServerSelectionTimeoutError,),
+        )
+        self.stats["inserted"] += result.inserted_count
+        self.stats["matched"] += result.matched_count
+        self.stats["modified"] += result.modified_count
+        self.stats["upserted"] += result.upserted_count
+        return len(operations)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,50 @@
+"""Version des données et tombstones des suppressions
+
+Every ingest (crawl, import, enrichment, keyword tags, dedup merge) ends
+with ``bump_data_version``, through ``finish_ingest`` (Scrapy/crawler/ingest.py)
+which also re-exports the snapshot: the Webapp keys its caches on the
+``data_version`` meta document, so they are invalidated as soon as the data
+changed, without waiting for ``sync_data.py cache``.
+
+Deleted animals leave no document for the ``updated_at`` watermark of
+sync_data.py to find, so ``record_deletions`` writes a tombstone per deleted
+animal, stamped with the server time like ``updated_at``; the incremental
+sync ships them to the targets as deletions.
+"""
+from datetime import datetime, timezone
+
+from datastore import settings
+
+DATA_VERSION_ID = "data_version"
+TOMBSTONE_COLLECTION = "tombstones"
+
+
+def bump_data_version(db, version=None):
+    """Publish a new data version (default: now); returns it."""
+    version = version or datetime.now(timezone.utc).replace(tzinfo=None)
+    db[settings.META_COLLECTION].update_one(
+        {"_id": DATA_VERSION_ID},
+        {"$set": {"version": version.isoformat(), "updated_at": version}},
+        upsert=True,
+    )
+    return version
+
+
+def record_deletions(db, docs, replaced_by=None):
+    """Record a tombstone for each deleted animal document (keyed on its url)."""
+    for doc in docs:
+        if not doc.get("url"):
+            continue
+        db[TOMBSTONE_COLLECTION].update_one(
+            {"_id": doc["url"]},
+            {
+                "$set": {"url": doc["url"], "animal_name": doc.get("animal_name"), "replaced_by": replaced_by},
+                "$currentDate": {"deleted_at": True},
+            },
+            upsert=True,
+        )
+
+
+def deletions_query(watermark, upper):
+    """Filter for the tombstones recorded in (watermark, upper]."""
+    return {"deleted_at": {"$gt": watermark, "$lte": upper}}
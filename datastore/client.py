@@ -0,0 +1,103 @@
+"""Clients MongoDB mutualisés et nouvelles tentatives
+
+One ``MongoClient`` is created per (URI, options) and per process, then
+reused by every caller: the driver pools connections itself, so creating a
+client per script step or per request only adds connection churn.
+"""
+import threading
+import time
+
+from pymongo import MongoClient
+from pymongo.errors import ConnectionFailure
+
+from datastore import settings
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _write_concern(value):
+    return int(value) if str(value).isdigit() else value
+
+
+def client_options(**overrides):
+    """MongoClient keyword arguments from the shared settings."""
+    options = {
+        "maxPoolSize": settings.MAX_POOL_SIZE,
+        "minPoolSize": settings.MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": settings.SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.SOCKET_TIMEOUT_MS,
+        "w": _write_concern(settings.WRITE_CONCERN),
+        "retryWrites": True,
+        "retryReads": True,
+    }
+    options.update(overrides)
+    return options
+
+
+def _key(uri, overrides):
+    return (uri or settings.MONGODB_URI, tuple(sorted(client_options(**overrides).items())))
+
+
+def get_client(uri=None, **overrides):
+    """Shared client for ``uri`` (settings.MONGODB_URI by default).
+
+    Keyword arguments override the pool/timeout/write concern options; each
+    distinct set of options gets its own client.
+    """
+    key = _key(uri, overrides)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = MongoClient(key[0], **dict(key[1]))
+        return client
+
+
+def get_database(name=None, uri=None, **overrides):
+    return get_client(uri, **overrides)[name or settings.DATABASE_NAME]
+
+
+def get_collection(name=None, database=None, uri=None, **overrides):
+    return get_database(database, uri, **overrides)[name or settings.COLLECTION_NAME]
+
+
+def close_client(uri=None, **overrides):
+    """Close the shared client ``get_client(uri, **overrides)`` returns, if any."""
+    with _lock:
+        client = _clients.pop(_key(uri, overrides), None)
+    if client is not None:
+        client.close()
+
+
+def close_clients():
+    """Close every shared client (end of a crawl or of a script)."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def with_retry(func, *args, attempts=None, backoff=None, retry_on=(ConnectionFailure,), **kwargs):
+    """Call ``func`` and retry on connection errors with exponential backoff.
+
+    Only pass idempotent operations (reads, pings, upserts of whole
+    documents): a write may have been applied before the connection dropped.
+    """
+    attempts = attempts or settings.RETRY_ATTEMPTS
+    backoff = settings.RETRY_BACKOFF if backoff is None else backoff
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except retry_on:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def ping(client=None):
+    """Check the server answers, retrying while it starts up."""
+    client = client or get_client()
+    return with_retry(client.admin.command, "ping")
@@ -0,0 +1,53 @@
+"""Facette « location » : index multikey et comptages précalculés
+
+``locations`` is a list field, so its index is multikey: a filter such as
+``{"locations": {"$in": ["Africa"]}, "diet": ...}`` is answered from the
+index. Per-location counts are computed once per ingest (crawl, import,
+dedup merge) and stored in a single ``meta`` document, so the Webapp's
+location facet and chart read one document instead of scanning the
+collection.
+"""
+from datetime import datetime, timezone
+
+from datastore import settings
+
+LOCATION_COUNTS_ID = "location_counts"
+
+# Comptage par location ; les documents sans location n'apparaissent pas
+LOCATION_COUNTS_PIPELINE = [
+    {"$unwind": "$locations"},
+    {"$match": {"locations": {"$nin": [None, ""]}}},
+    {"$group": {"_id": "$locations", "count": {"$sum": 1}}},
+    {"$sort": {"count": -1, "_id": 1}},
+]
+
+
+def ensure_location_index(collection):
+    """Create the multikey index on ``locations`` (no-op if it exists)."""
+    return collection.create_index("locations")
+
+
+def count_locations(collection):
+    """[{"location", "count"}] sorted by decreasing count, computed on the server."""
+    return [
+        {"location": row["_id"], "count": row["count"]}
+        for row in collection.aggregate(LOCATION_COUNTS_PIPELINE)
+    ]
+
+
+def refresh_location_counts(collection, meta=None):
+    """Recompute the per-location counts and store them; returns them."""
+    meta = meta if meta is not None else collection.database[settings.META_COLLECTION]
+    counts = count_locations(collection)
+    meta.replace_one(
+        {"_id": LOCATION_COUNTS_ID},
+        {"_id": LOCATION_COUNTS_ID, "counts": counts, "refreshed_at": datetime.now(timezone.utc)},
+        upsert=True,
+    )
+    return counts
+
+
+def load_location_counts(meta):
+    """Stored per-location counts, None if they were never computed."""
+    doc = meta.find_one({"_id": LOCATION_COUNTS_ID})
+    return doc["counts"] if doc else None
@@ -0,0 +1,127 @@
+"""Arbre taxonomique : chemins matérialisés et effectifs par sous-arbre
+
+Each animal stores its classification as a materialized path,
+``taxonomy_path = "Animalia/Chordata/Mammalia/Carnivora/Felidae/Panthera/"``
+(ranks in RANKS order, cut at the first missing rank). "All animals under
+Mammalia/Carnivora" is then the anchored prefix regex
+``^Animalia/Chordata/Mammalia/Carnivora/``, which MongoDB answers from
+the ``taxonomy_path`` index.
+
+The tree itself lives in the ``taxonomy`` collection, one document per
+node: ``{_id: path, name, rank, depth, parent, count}`` where ``count`` is
+the number of animals in the subtree. It is rebuilt on ingest from one
+``$group`` on the paths, so browsing it never touches the animals.
+"""
+import re
+
+from datastore import settings
+
+RANKS = ("Kingdom", "Phylum", "Class", "Order", "Family", "Genus")
+SEPARATOR = "/"
+TAXONOMY_COLLECTION = "taxonomy"
+
+
+def taxonomy_path(classification):
+    """Materialized path of a classification dict, None if it has no Kingdom."""
+    if not isinstance(classification, dict):
+        return None
+    # Libellés insensibles à la casse ("Kingdom", "kingdom:")
+    ranks = {str(k).strip().rstrip(":").lower(): v for k, v in classification.items()}
+    names = []
+    for rank in RANKS:
+        value = ranks.get(rank.lower())
+        if not isinstance(value, str) or not value.strip():
+            break
+        names.append(value.strip().replace(SEPARATOR, " "))
+    return SEPARATOR.join(names) + SEPARATOR if names else None
+
+
+def path_names(path):
+    """Names along ``path``, from the Kingdom down."""
+    return path.rstrip(SEPARATOR).split(SEPARATOR) if path else []
+
+
+def parent_path(path):
+    names = path_names(path)
+    return SEPARATOR.join(names[:-1]) + SEPARATOR if len(names) > 1 else None
+
+
+def subtree_filter(path):
+    """Filter matching the animals under ``path`` (anchored prefix, index-backed)."""
+    return {"taxonomy_path": {"$regex": "^" + re.escape(path)}}
+
+
+def build_nodes(path_counts):
+    """Tree nodes with subtree counts from {taxonomy_path: animals} counts."""
+    counts = {}
+    for path, count in path_counts.items():
+        if not path:
+            continue
+        names = path_names(path)
+        for depth in range(1, len(names) + 1):
+            prefix = SEPARATOR.join(names[:depth]) + SEPARATOR
+            counts[prefix] = counts.get(prefix, 0) + count
+    return [
+        {
+            "_id": path,
+            "name": path_names(path)[-1],
+            "rank": RANKS[len(path_names(path)) - 1],
+            "depth": len(path_names(path)),
+            "parent": parent_path(path),
+            "count": count,
+        }
+        for path, count in sorted(counts.items())
+    ]
+
+
+def child_nodes(nodes, parent=None):
+    """Children of ``parent`` (the kingdoms when None), sorted by name."""
+    return sorted((n for n in nodes if n["parent"] == parent), key=lambda n: n["name"])
+
+
+def ensure_taxonomy_index(collection):
+    """Index on the animals' paths, used by the prefix queries."""
+    collection.create_index("taxonomy_path")
+
+
+def backfill_taxonomy_paths(collection):
+    """Set ``taxonomy_path`` on the animals that have a classification but no path yet."""
+    # Import local : le reste du module (chemins, arbre) n'a pas besoin de pymongo
+    from datastore.bulk import BulkWriter
+
+    query = {"classification": {"$type": "object"}, "taxonomy_path": {"$exists": False}}
+    updated = 0
+    with BulkWriter(collection) as writer:
+        for doc in collection.find(query, {"classification": 1}).batch_size(settings.BATCH_SIZE):
+            writer.update_one({"_id": doc["_id"]}, {"$set": {"taxonomy_path": taxonomy_path(doc["classification"])}})
+            updated += 1
+    return updated
+
+
+def refresh_taxonomy(collection, taxonomy_name=TAXONOMY_COLLECTION):
+    """Rebuild the taxonomy tree of ``collection``; returns the number of nodes."""
+    db = collection.database
+    backfill_taxonomy_paths(collection)
+    path_counts = {
+        row["_id"]: row["count"]
+        for row in collection.aggregate([
+            {"$match": {"taxonomy_path": {"$type": "string"}}},
+            {"$group": {"_id": "$taxonomy_path", "count": {"$sum": 1}}},
+        ])
+    }
+    nodes = build_nodes(path_counts)
+    if not nodes:
+        db[taxonomy_name].delete_many({})
+        return 0
+    # Arbre écrit à côté puis renommé : la Webapp ne voit jamais un arbre partiel
+    staging = db[taxonomy_name + "_staging"]
+    staging.drop()
+    staging.insert_many(nodes)
+    staging.create_index("parent")
+    staging.rename(taxonomy_name, dropTarget=True)
+    return len(nodes)
+
+
+def load_children(taxonomy, parent=None):
+    """Children of ``parent`` in the stored tree, sorted by name."""
+    return list(taxonomy.find({"parent": parent}).sort("name", 1))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Find (and optionally merge) near-duplicate animals with MinHash/LSH.
+
+Reads the animals from MongoDB (default) or from a feed file, removes
+repeated entries in list fields, groups near-duplicates in clusters and
+writes a report. With --apply (MongoDB only), each cluster is merged into
+its most complete animal and the other documents are deleted.
+
+Usage:
+    python dedupe_data.py [--json data/animals.json] [--threshold 0.7] [--apply]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Scrapy'))
+
+from crawler.ingest import SNAPSHOT_PATH, finish_ingest  # noqa: E402
+from crawler.minhash import LIST_FIELDS, NearDuplicateDetector, dedupe_list, dedupe_list_fields  # noqa: E402
+from datastore.bulk import BulkWriter  # noqa: E402
+from datastore.changes import record_deletions  # noqa: E402
+from datastore.client import close_clients, get_collection  # noqa: E402
+from datastore.facets import refresh_location_counts  # noqa: E402
+from datastore.taxonomy import refresh_taxonomy  # noqa: E402
+from fix_json import iter_records  # noqa: E402
+DEFAULT_REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'duplicates_report.json')
+
+
+def completeness(doc):
+    """Number of filled fields, used to pick the animal a cluster is merged into."""
+    return sum(1 for value in doc.values() if value not in (None, '', [], {}))
+
+
+def find_clusters(docs, threshold=0.7):
+    """Return (clusters report, list-field fixes) for an iterable of (key, doc)."""
+    detector = NearDuplicateDetector(threshold=threshold)
+    labels = {}
+    fixes = {}
+    for key, doc in docs:
+        labels[key] = doc.get('animal_name')
+        changes = dedupe_list_fields(doc)
+        if changes:
+            fixes[key] = changes
+            doc = {**doc, **changes}
+        detector.add(key, doc)
+    return detector.report(labels), fixes
+
+
+def merge_cluster(collection, cluster):
+    """Merge a cluster into its most complete document and delete the others."""
+    keys = [cluster['representative']] + [d['key'] for d in cluster['duplicates']]
+    docs = list(collection.find({'_id': {'$in': keys}}))
+    if len(docs) < 2:
+        return 0
+    docs.sort(key=completeness, reverse=True)
+    keeper, others = docs[0], docs[1:]
+
+    update = {}
+    for field in LIST_FIELDS:
+        merged = dedupe_list([v for doc in docs for v in (doc.get(field) or [])])
+        if merged != (keeper.get(field) or []):
+            update[field] = merged
+    aliases = sorted({d.get('animal_name') for d in others if d.get('animal_name')} - {keeper.get('animal_name')})
+    alias_urls = sorted({d.get('url') for d in others if d.get('url')} - {keeper.get('url')})
+
+    changes = {
+        '$addToSet': {'aliases': {'$each': aliases}, 'alias_urls': {'$each': alias_urls}},
+        '$currentDate': {'updated_at': True},
+        '$inc': {'revision': 1},
+    }
+    if update:
+        changes['$set'] = update
+    collection.update_one({'_id': keeper['_id']}, changes)
+    # Tombstones avant la suppression : sync_data.py propage les suppressions aux cibles
+    record_deletions(collection.database, others, replaced_by=keeper.get('url'))
+    collection.delete_many({'_id': {'$in': [d['_id'] for d in others]}})
+    return len(others)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--json', help="read animals from this feed file instead of MongoDB")
+    parser.add_argument('--threshold', type=float, default=0.7, help="minimum estimated Jaccard similarity")
+    parser.add_argument('--report', default=DEFAULT_REPORT, help="where to write the clusters report")
+    parser.add_argument('--apply', action='store_true', help="merge clusters and fix list fields in MongoDB")
+    args = parser.parse_args(argv)
+
+    if args.json:
+        if args.apply:
+            parser.error("--apply only works on MongoDB")
+        docs = ((f"record {i}", record) for i, record in enumerate(iter_records(args.json), 1))
+        collection = None
+    else:
+        collection = get_collection()
+        docs = ((doc['_id'], doc) for doc in collection.find({}))
+
+    report, fixes = find_clusters(docs, args.threshold)
+    duplicates = sum(len(c['duplicates']) for c in report)
+    print(f"🔎 {len(report)} clusters, {duplicates} doublons, {len(fixes)} animaux avec des listes en double")
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    print(f"✅ Rapport sauvegardé : {args.report}")
+
+    if args.apply:
+        with BulkWriter(collection) as writer:
+            for key, changes in fixes.items():
+                writer.update_one(
+                    {'_id': key},
+                    {'$set': changes, '$currentDate': {'updated_at': True}, '$inc': {'revision': 1}}
+                )
+        merged = sum(merge_cluster(collection, cluster) for cluster in report)
+        # Les fusions changent les listes de locations et le nombre d'animaux
+        refresh_location_counts(collection)
+        refresh_taxonomy(collection)
+        print(f"✅ {merged} doublons fusionnés, {len(fixes)} listes nettoyées")
+        if merged or fixes:
+            # Caches de la Webapp invalidés, snapshot colonnaire réexporté
+            _, rows = finish_ingest(collection, SNAPSHOT_PATH)
+            if rows is None:
+                print("⚠️  pyarrow non installé, snapshot non exporté")
+            else:
+                print(f"✅ Snapshot sauvegardé : {SNAPSHOT_PATH}")
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    finally:
+        close_clients()
@@ -1,26 +1,328 @@
 #!/usr/bin/env python3
-"""Fix corrupted JSON file"""
+"""Validate and repair animal feed files in a streaming fashion.
+
+Supports the JSON array feed (data/animals.json) and the JSON Lines feed
+(data/animals.jsonl, optionally .gz / .zst compressed). Records are read one
+at a time, so memory stays constant whatever the file size; bad records are
+reported and skipped instead of aborting the whole file.
+
+Usage:
+    python fix_json.py [path] [--check] [--output OUT] [--report REPORT]
+"""
+import argparse
+import gzip
+import io
 import json
+import os
 import re
+import sys
+import textwrap
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'animals.json')
+
+# Caractères de contrôle invalides (sauf newline, tab, carriage return)
+CONTROL_CHARS = re.compile(r'[\x00-\x08\x0B-\x0C\x0E-\x1F]')
+# Doubles guillemets à la fin des valeurs ("texte"",), sans toucher aux chaînes vides ("": "",)
+DOUBLE_QUOTE_END = re.compile(r'([^\s:])"",(\s*)$', re.MULTILINE)
+# Frontière entre deux objets d'un tableau JSON, pour se resynchroniser après une erreur
+RECORD_BOUNDARY = re.compile(r'\}\s*,\s*(?=\{)')
+
+CHUNK_SIZE = 64 * 1024
+MAX_RECORD_CHARS = 1024 * 1024
+REQUIRED_FIELDS = ('animal_name', 'url')
+
+
+class BadRecord:
+    """A record that could not be parsed or failed validation."""
+
+    def __init__(self, position, error, snippet):
+        self.position = position
+        self.error = error
+        self.snippet = snippet[:200]
+
+    def to_dict(self):
+        return {'position': self.position, 'error': self.error, 'snippet': self.snippet}
+
+
+class ZstdFramesReader(io.RawIOBase):
+    """Binary reader over every zstd frame of a file.
+
+    Each appended crawl run is a separate frame. Like ``gzip``, a truncated
+    last frame (crawl interrupted mid-write) raises ``EOFError`` once its
+    complete blocks have been read, instead of ending the stream silently.
+    """
+
+    def __init__(self, path):
+        import zstandard
+
+        self.file = open(path, 'rb')
+        self.decompressor = zstandard.ZstdDecompressor()
+        self.frame = None
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def _decompress(self):
+        """Next decompressed chunk, b'' after the last complete frame."""
+        while True:
+            leftover = b''
+            if self.frame is not None and self.frame.eof:
+                leftover = self.frame.unused_data
+                self.frame = None
+            chunk = leftover or self.file.read(CHUNK_SIZE)
+            if not chunk:
+                if self.frame is not None:
+                    raise EOFError("Compressed file ended before the end of the last zstd frame")
+                return b''
+            if self.frame is None:
+                self.frame = self.decompressor.decompressobj()
+            data = self.frame.decompress(chunk)
+            if data:
+                return data
+
+    def readinto(self, buffer):
+        if not self.pending:
+            self.pending = self._decompress()
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def open_feed(path, mode='r'):
+    """Open a feed file in text mode, handling .gz and .zst compression."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', errors='replace')
+    if path.endswith('.zst'):
+        if mode == 'r':
+            raw = io.BufferedReader(ZstdFramesReader(path))
+        else:
+            import zstandard
+
+            raw = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'))
+        return io.TextIOWrapper(raw, encoding='utf-8', errors='replace')
+    return open(path, mode, encoding='utf-8', errors='replace')
+
+
+def is_jsonlines(path):
+    """Return True for .jsonl feeds (compressed or not)."""
+    name = re.sub(r'\.(gz|zst)$', '', path)
+    return name.endswith('.jsonl')
+
+
+def repair_text(text):
+    """Apply the known fixes for corrupted feed text."""
+    text = CONTROL_CHARS.sub('', text)
+    return DOUBLE_QUOTE_END.sub(r'\1",\2', text)
+
+
+def validate_record(record):
+    """Return an error message if the record is not a usable animal, else None."""
+    if not isinstance(record, dict):
+        return f"expected an object, got {type(record).__name__}"
+    for field in REQUIRED_FIELDS:
+        value = record.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return f"missing or empty field: {field}"
+    return None
+
+
+def _iter_jsonlines(f):
+    """Yield (line_number, record, error) for each non-blank line."""
+    line_number = 0
+    try:
+        for line in f:
+            line_number += 1
+            text = repair_text(line).strip()
+            if not text:
+                continue
+            try:
+                yield line_number, json.loads(text), None
+            except json.JSONDecodeError as e:
+                yield line_number, None, BadRecord(f"line {line_number}", str(e), text)
+    except EOFError as e:
+        # Flux compressé tronqué (crawl interrompu pendant l'écriture)
+        yield line_number + 1, None, BadRecord(f"line {line_number + 1}", f"truncated stream: {e}", '')
+
+
+def _iter_json_array(f):
+    """Yield (record_number, record, error) from a JSON array, one object at a time."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    carry = ''
+    eof = False
+    started = False
+    record_number = 0
+
+    while True:
+        if not eof:
+            try:
+                chunk = f.read(CHUNK_SIZE)
+            except EOFError:
+                chunk = ''
+            if chunk:
+                # Only repair complete lines so regexes never straddle chunks
+                chunk = carry + chunk
+                cut = chunk.rfind('\n') + 1
+                carry = chunk[cut:]
+                buffer += repair_text(chunk[:cut])
+            else:
+                eof = True
+                buffer += repair_text(carry)
+                carry = ''
+
+        while True:
+            buffer = buffer.lstrip()
+            if not started:
+                if not buffer:
+                    break
+                if buffer[0] != '[':
+                    record_number += 1
+                    yield record_number, None, BadRecord('record 1', 'not a JSON array', buffer)
+                    return
+                buffer = buffer[1:]
+                started = True
+                continue
+            buffer = buffer.lstrip(', \t\r\n')
+            if not buffer:
+                break
+            if buffer[0] == ']':
+                return
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as e:
+                boundary = RECORD_BOUNDARY.search(buffer, e.pos)
+                if not eof and boundary is None and len(buffer) < MAX_RECORD_CHARS:
+                    break  # Probablement incomplet : lire la suite
+                record_number += 1
+                reason = str(e) if boundary or not eof else f"truncated record: {e}"
+                yield record_number, None, BadRecord(f"record {record_number}", reason, buffer)
+                if boundary is None:
+                    if eof:
+                        return
+                    buffer = ''
+                    break
+                buffer = buffer[boundary.end():]
+                continue
+            record_number += 1
+            yield record_number, record, None
+            buffer = buffer[end:]
+
+        if eof and not buffer.strip():
+            if started:
+                record_number += 1
+                yield record_number, None, BadRecord(f"record {record_number}", 'truncated array: missing ]', '')
+            return
+
+
+def iter_feed(path):
+    """Yield (position, record, error) for every record of a feed file.
+
+    Exactly one of ``record`` and ``error`` is set. Records failing
+    :func:`validate_record` are reported as errors.
+    """
+    with open_feed(path) as f:
+        reader = _iter_jsonlines(f) if is_jsonlines(path) else _iter_json_array(f)
+        for position, record, error in reader:
+            if error is None:
+                problem = validate_record(record)
+                if problem:
+                    label = f"line {position}" if is_jsonlines(path) else f"record {position}"
+                    error = BadRecord(label, problem, json.dumps(record, ensure_ascii=False))
+                    record = None
+            yield position, record, error
+
+
+def iter_records(path):
+    """Yield only the valid records of a feed file, silently skipping bad ones."""
+    for _, record, error in iter_feed(path):
+        if error is None:
+            yield record
+
+
+class FeedWriter:
+    """Write records in the same layout as the input feed (array or JSON Lines)."""
+
+    def __init__(self, path, jsonlines):
+        self.path = path
+        self.jsonlines = jsonlines
+        self.f = open_feed(path, 'w')
+        self.count = 0
+        if not self.jsonlines:
+            self.f.write('[\n')
+
+    def write(self, record):
+        if self.jsonlines:
+            self.f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            if self.count:
+                self.f.write(',\n')
+            self.f.write(textwrap.indent(json.dumps(record, indent=4, ensure_ascii=False), '    '))
+        self.count += 1
+
+    def close(self):
+        if not self.jsonlines:
+            self.f.write('\n]\n')
+        self.f.close()
+
+
+def fix_feed(path, output=None, report=None, check=False):
+    """Validate ``path`` and write the repaired feed to ``output`` (default: in place).
+
+    Returns a ``(valid, bad)`` tuple of record counts.
+    """
+    output = output or path
+    # Écriture atomique : fichier temporaire puis remplacement
+    tmp_path = re.sub(r'(\.(gz|zst))?$', r'.tmp\1', output, count=1)
+    writer = None if check else FeedWriter(tmp_path, is_jsonlines(output))
+    report_file = open(report, 'w', encoding='utf-8') if report else None
+
+    valid = bad = 0
+    try:
+        for _, record, error in iter_feed(path):
+            if error is not None:
+                bad += 1
+                print(f"⚠️  {error.position}: {error.error}")
+                if report_file:
+                    report_file.write(json.dumps(error.to_dict(), ensure_ascii=False) + '\n')
+                continue
+            valid += 1
+            if writer:
+                writer.write(record)
+    finally:
+        if report_file:
+            report_file.close()
+        if writer:
+            writer.close()
+
+    if writer:
+        os.replace(tmp_path, output)
+    return valid, bad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default=DEFAULT_PATH, help="feed file (.json, .jsonl, .jsonl.gz, .jsonl.zst)")
+    parser.add_argument('--output', help="write the repaired feed here instead of in place")
+    parser.add_argument('--report', help="write bad records as JSON Lines to this file")
+    parser.add_argument('--check', action='store_true', help="only validate, do not write anything")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"❌ Fichier non trouvé: {args.path}")
+        return 1
+
+    valid, bad = fix_feed(args.path, output=args.output, report=args.report, check=args.check)
+    print(f"✅ {valid} animaux valides, {bad} enregistrements invalides")
+    if not args.check:
+        print(f"✅ Fichier sauvegardé : {args.output or args.path}")
+    return 1 if bad and args.check else 0
+
 
-# Lire le fichier
-with open('data/animals.json', 'r', encoding='utf-8') as f:
-    content = f.read()
-
-# Supprimer les caractères de contrôle invalides (sauf newline, tab, carriage return)
-content = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F]', '', content)
-
-# Corriger les doubles guillemets à la fin des valeurs ("",)
-content = re.sub(r'"",\s*\n', '",\n', content)
-
-# Essayer de parser
-try:
-    data = json.loads(content)
-    print(f"✅ JSON corrigé ! {len(data)} animaux")
-    
-    # Réécrire
-    with open('data/animals.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
-    print("✅ Fichier sauvegardé !")
-except json.JSONDecodeError as e:
-    print(f"❌ Erreur : {e}")
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""Profilage à la demande du crawler et de la Webapp (PROFILING=1).
+
+    profiling.settings  switch and output settings (environment variables)
+    profiling.profiler  cProfile + tracemalloc runs, decorators and per-rerun hook
+"""
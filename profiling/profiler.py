@@ -0,0 +1,234 @@
+"""Runs profilés : cProfile et échantillons tracemalloc
+
+A ``RunProfiler`` covers one run: a whole crawl (every decorated spider
+callback and pipeline ``process_item``) or one Webapp rerun. Time is only
+profiled inside its sections; memory is sampled with tracemalloc at most
+every SAMPLE_INTERVAL seconds. ``write`` saves two files per run in
+PROFILE_DIR:
+
+    <run>-<date>-<pid>-<n>.prof  cProfile stats (pstats, snakeviz...)
+    <run>-<date>-<pid>-<n>.txt   sections, hotspots, memory timeline,
+                                 top allocations and their growth
+
+With PROFILING unset, ``profiled`` returns the function unchanged and
+``start_run`` a no-op, so the hooks cost nothing in normal operation.
+"""
+import atexit
+import cProfile
+import functools
+import inspect
+import io
+import itertools
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+from profiling import settings
+
+_runs = {}
+_lock = threading.Lock()
+_sequence = itertools.count(1)
+# Premier instantané du processus : croissance mémoire d'un rerun à l'autre
+_baseline = None
+
+
+def _take_snapshot():
+    snapshot = tracemalloc.take_snapshot()
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+
+
+def _mb(size):
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+class RunProfiler:
+    """cProfile and tracemalloc sampling for one run."""
+
+    def __init__(self, name, directory=None, top=None, sample_interval=None, frames=None):
+        global _baseline
+        self.name = name
+        self.directory = directory or settings.PROFILE_DIR
+        self.top = top or settings.TOP
+        self.sample_interval = settings.SAMPLE_INTERVAL if sample_interval is None else sample_interval
+        self.frames = settings.TRACEMALLOC_FRAMES if frames is None else frames
+        self.profile = cProfile.Profile()
+        self.sections = {}
+        self.depth = 0
+        self.profiling = False
+        self.started = time.perf_counter()
+        self.timeline = []
+        self.first_snapshot = self.last_snapshot = None
+        self.last_sample = None
+        if self.frames:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            self.first_snapshot = _take_snapshot()
+            if _baseline is None:
+                _baseline = self.first_snapshot
+            self.last_sample = self.started
+
+    @contextmanager
+    def section(self, name):
+        """Profile the enclosed code and count it under ``name``."""
+        if self.depth == 0:
+            try:
+                self.profile.enable()
+                self.profiling = True
+            except ValueError:
+                # Un autre profileur est actif (session Streamlit concurrente) : temps non profilé
+                self.profiling = False
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.depth -= 1
+            if self.depth == 0 and self.profiling:
+                self.profile.disable()
+                self.profiling = False
+            calls, total = self.sections.get(name, (0, 0.0))
+            self.sections[name] = (calls + 1, total + elapsed)
+            if self.depth == 0:
+                self.sample()
+
+    def sample(self, force=False):
+        """Record the traced memory, with a snapshot if the interval has elapsed."""
+        if not self.frames or not tracemalloc.is_tracing():
+            return
+        now = time.perf_counter()
+        if not force and now - self.last_sample < self.sample_interval:
+            return
+        self.last_sample = now
+        current, peak = tracemalloc.get_traced_memory()
+        self.timeline.append((now - self.started, current, peak))
+        self.last_snapshot = _take_snapshot()
+
+    def report(self):
+        """Text report of the run."""
+        out = io.StringIO()
+        duration = time.perf_counter() - self.started
+        out.write(f"Run {self.name}, {duration:.3f} s, pid {os.getpid()}\n")
+
+        out.write("\nSections (calls, total s, mean ms)\n")
+        for name, (calls, total) in sorted(self.sections.items(), key=lambda s: -s[1][1]):
+            out.write(f"  {name:<40} {calls:>8} {total:>10.3f} {total / calls * 1000:>10.3f}\n")
+
+        out.write(f"\nHotspots (top {self.top} by cumulative time)\n")
+        try:
+            stats = pstats.Stats(self.profile, stream=out)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        except TypeError:
+            # Aucun appel profilé (pstats refuse un profil vide)
+            out.write("  (no profiled calls)\n")
+
+        if self.last_snapshot is not None:
+            out.write("\nMemory timeline (s, current, peak)\n")
+            for elapsed, current, peak in self.timeline:
+                out.write(f"  {elapsed:>10.1f} {_mb(current):>10} {_mb(peak):>10}\n")
+            out.write(f"\nTop {self.top} allocations\n")
+            for stat in self.last_snapshot.statistics("lineno")[:self.top]:
+                out.write(f"  {stat}\n")
+            out.write(f"\nTop {self.top} allocation growth during the run\n")
+            for stat in self.last_snapshot.compare_to(self.first_snapshot, "lineno")[:self.top]:
+                out.write(f"  {stat}\n")
+            if _baseline is not None and _baseline is not self.first_snapshot:
+                out.write(f"\nTop {self.top} allocation growth since profiling started\n")
+                for stat in self.last_snapshot.compare_to(_baseline, "lineno")[:self.top]:
+                    out.write(f"  {stat}\n")
+        return out.getvalue()
+
+    def write(self):
+        """Write the .prof and .txt files; returns their base path."""
+        self.sample(force=True)
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(self.directory, f"{self.name}-{stamp}-{os.getpid()}-{next(_sequence)}")
+        self.profile.dump_stats(base + ".prof")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(self.report())
+        return base
+
+
+def get_run(name):
+    """Process-wide run ``name`` (created on first use, written at exit)."""
+    with _lock:
+        run = _runs.get(name)
+        if run is None:
+            if not _runs:
+                atexit.register(write_runs)
+            run = _runs[name] = RunProfiler(name)
+        return run
+
+
+def write_runs():
+    """Write and forget the process-wide runs (end of a crawl)."""
+    with _lock:
+        runs = list(_runs.values())
+        _runs.clear()
+    return [run.write() for run in runs]
+
+
+def profiled(section=None, run="crawl"):
+    """Decorator profiling every call of the function in the process-wide ``run``.
+
+    Generator functions (Scrapy callbacks) are profiled while they produce
+    each value. Returns the function unchanged when profiling is disabled.
+    """
+    def decorator(func):
+        if not settings.ENABLED:
+            return func
+        name = section or func.__qualname__
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                profiler = get_run(run)
+                iterator = func(*args, **kwargs)
+                while True:
+                    with profiler.section(name):
+                        try:
+                            value = next(iterator)
+                        except StopIteration:
+                            return
+                    yield value
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_run(run).section(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _Rerun:
+    """One profiled Webapp rerun (see ``start_run``)."""
+
+    def __init__(self, name):
+        self.profiler = RunProfiler(name)
+        self.section = self.profiler.section(name)
+        self.section.__enter__()
+
+    def stop(self):
+        self.section.__exit__(None, None, None)
+        return self.profiler.write()
+
+
+class _NoRun:
+    def stop(self):
+        return None
+
+
+def start_run(name):
+    """Start profiling a run that ends with ``.stop()`` (e.g. a Streamlit rerun)."""
+    return _Rerun(name) if settings.ENABLED else _NoRun()
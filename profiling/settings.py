@@ -0,0 +1,17 @@
+"""Configuration du profilage (surchargeable par variables d'environnement)"""
+import os
+
+# Interrupteur : désactivé, les décorateurs renvoient les fonctions telles quelles
+ENABLED = os.getenv("PROFILING", "").lower() in ("1", "true", "yes", "on")
+
+# Répertoire des fichiers .prof (cProfile) et des rapports .txt
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# Nombre de lignes des rapports (fonctions les plus coûteuses, plus grosses allocations)
+TOP = int(os.getenv("PROFILE_TOP", "25"))
+
+# Échantillonnage mémoire : un instantané tracemalloc au plus toutes les N secondes
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "30"))
+
+# Profondeur des piles enregistrées par tracemalloc (0 : pas de suivi mémoire)
+TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))
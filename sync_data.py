@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Incremental sync from MongoDB to downstream stores.
+
+Each target keeps a watermark (the ``updated_at`` of the last shipped change)
+in the ``sync_state`` collection; a run only reads documents modified since
+then, so its cost follows the change volume, not the collection size.
+Animals deleted since then (dedupe_data.py --apply merges) are read from
+their tombstones (see datastore.changes) and shipped as deletions.
+
+Targets:
+    jsonl          JSON Lines snapshot (full rewrite on first run, then appends;
+                   a deletion is a ``{"url": ..., "deleted": true}`` line)
+    elasticsearch  bulk re-index of the changed animals, removal of the deleted ones
+    cache          bump the data version the Webapp keys its caches on (ingest
+                   scripts and the crawler already do it when they finish)
+
+A full sync (first run, --full, or after import_data.py, which replaces the
+collection) has no tombstones to replay: the jsonl snapshot is rewritten,
+but Elasticsearch documents of animals that no longer exist are left in the
+index until it is recreated.
+
+Usage:
+    python sync_data.py jsonl [--path data/animals_sync.jsonl]
+    python sync_data.py elasticsearch
+    python sync_data.py cache
+    python sync_data.py jsonl --full     # ignore the watermark
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Scrapy'))
+
+from crawler.search_index import ElasticsearchIndexer  # noqa: E402
+from datastore import settings  # noqa: E402
+from datastore.bulk import iter_batches  # noqa: E402
+from datastore.changes import TOMBSTONE_COLLECTION, bump_data_version, deletions_query  # noqa: E402
+from datastore.client import close_clients, get_database  # noqa: E402
+
+COLLECTION_NAME = settings.COLLECTION_NAME
+SYNC_STATE_COLLECTION = "sync_state"
+
+DEFAULT_SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'animals_sync.jsonl')
+BATCH_SIZE = 500
+# Ne pas synchroniser les écritures des dernières secondes : une écriture en cours
+# avec un updated_at antérieur à la borne pourrait sinon être manquée.
+SAFETY_LAG = timedelta(seconds=2)
+
+
+def server_time(db):
+    """Current MongoDB server time (naive UTC, like stored dates)."""
+    try:
+        return db.command('hello')['localTime'].replace(tzinfo=None)
+    except Exception:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def change_query(watermark, upper):
+    """Filter for documents changed in (watermark, upper]."""
+    if watermark is None:
+        # Synchronisation complète, y compris les documents sans horodatage
+        return {'$or': [{'updated_at': {'$lte': upper}}, {'updated_at': {'$exists': False}}]}
+    return {'updated_at': {'$gt': watermark, '$lte': upper}}
+
+
+def to_json_record(doc):
+    """Make a MongoDB document JSON-serialisable."""
+    doc = dict(doc)
+    doc.pop('_id', None)
+    for key, value in doc.items():
+        if isinstance(value, datetime):
+            doc[key] = value.isoformat()
+    return doc
+
+
+class JsonlTarget:
+    """Append changed documents to a JSON Lines snapshot.
+
+    The latest line for a given ``url`` is the current version of that animal.
+    """
+
+    name = 'jsonl'
+
+    def __init__(self, path=DEFAULT_SNAPSHOT):
+        self.path = path
+        self.f = None
+
+    def open(self, full):
+        self.f = open(self.path, 'w' if full else 'a', encoding='utf-8')
+
+    def write(self, docs):
+        for doc in docs:
+            self.f.write(json.dumps(to_json_record(doc), ensure_ascii=False) + '\n')
+
+    def delete(self, tombstones):
+        for tombstone in tombstones:
+            record = {'url': tombstone['url'], 'deleted': True, 'deleted_at': tombstone['deleted_at']}
+            self.f.write(json.dumps(to_json_record(record), ensure_ascii=False) + '\n')
+
+    def close(self, changed, version):
+        self.f.close()
+
+
+class ElasticsearchTarget:
+    """Re-index changed documents through the bulk indexer."""
+
+    name = 'elasticsearch'
+
+    def __init__(self, url=None, index=None):
+        self.indexer = ElasticsearchIndexer(
+            url or os.getenv('ELASTICSEARCH_URL', 'http://localhost:9200'),
+            index or os.getenv('ES_INDEX', 'animals'),
+            batch_size=BATCH_SIZE
+        )
+
+    def open(self, full):
+        self.indexer.ensure_index()
+
+    def write(self, docs):
+        for doc in docs:
+            self.indexer.add(doc)
+
+    def delete(self, tombstones):
+        for tombstone in tombstones:
+            self.indexer.delete(tombstone)
+
+    def close(self, changed, version):
+        self.indexer.close()
+        if self.indexer.failed:
+            raise RuntimeError(f"{self.indexer.failed} documents failed to index")
+
+
+class CacheTarget:
+    """Publish the data version the Webapp caches are keyed on."""
+
+    name = 'cache'
+
+    def __init__(self, db):
+        self.db = db
+
+    def open(self, full):
+        pass
+
+    def write(self, docs):
+        pass
+
+    def delete(self, tombstones):
+        pass
+
+    def close(self, changed, version):
+        if changed:
+            bump_data_version(self.db, version)
+
+
+def sync(db, target, full=False, now=None):
+    """Ship documents changed since the target's watermark; return the count."""
+    collection = db[COLLECTION_NAME]
+    state = db[SYNC_STATE_COLLECTION]
+
+    saved = None if full else state.find_one({'_id': target.name})
+    watermark = saved['watermark'] if saved else None
+    upper = (now or server_time(db)) - SAFETY_LAG
+
+    cursor = collection.find(change_query(watermark, upper)).sort('updated_at', 1).batch_size(BATCH_SIZE)
+    target.open(full=watermark is None)
+    changed = 0
+    for batch in iter_batches(cursor, BATCH_SIZE):
+        target.write(batch)
+        changed += len(batch)
+    if watermark is not None:
+        # Une synchronisation complète repart de la collection : rien à supprimer
+        changed += sync_deletions(db, target, watermark, upper)
+    target.close(changed, upper)
+
+    # Le watermark n'avance qu'une fois la cible à jour
+    state.update_one(
+        {'_id': target.name},
+        {'$set': {'watermark': upper, 'last_count': changed}},
+        upsert=True
+    )
+    return changed
+
+
+def sync_deletions(db, target, watermark, upper):
+    """Ship the animals deleted in (watermark, upper]; return the count."""
+    cursor = db[TOMBSTONE_COLLECTION].find(deletions_query(watermark, upper)).sort('deleted_at', 1)
+    deleted = 0
+    for batch in iter_batches(cursor, BATCH_SIZE):
+        # Une URL supprimée puis recrawlée existe de nouveau : sa version courante a déjà été envoyée
+        alive = set(db[COLLECTION_NAME].distinct('url', {'url': {'$in': [t['url'] for t in batch]}}))
+        batch = [tombstone for tombstone in batch if tombstone['url'] not in alive]
+        target.delete(batch)
+        deleted += len(batch)
+    return deleted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('target', choices=['jsonl', 'elasticsearch', 'cache'])
+    parser.add_argument('--path', default=DEFAULT_SNAPSHOT, help="JSON Lines snapshot path (jsonl target)")
+    parser.add_argument('--full', action='store_true', help="ignore the stored watermark")
+    args = parser.parse_args(argv)
+
+    db = get_database()
+    db[COLLECTION_NAME].create_index('updated_at')
+
+    if args.target == 'jsonl':
+        target = JsonlTarget(args.path)
+    elif args.target == 'elasticsearch':
+        target = ElasticsearchTarget()
+    else:
+        target = CacheTarget(db)
+
+    try:
+        changed = sync(db, target, full=args.full)
+    finally:
+        close_clients()
+    print(f"✅ {changed} animaux synchronisés vers {args.target}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
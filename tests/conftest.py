@@ -0,0 +1,19 @@
+"""
+Shared fixtures of the test suite.
+"""
+import pytest
+
+
+@pytest.fixture
+def make_animal():
+    """Factory of scraped animal items; keyword arguments override or add fields."""
+    def make(name, description='', **fields):
+        return {
+            'animal_name': name,
+            'scientific_name': None,
+            'description': description,
+            'key_facts': ['Solitary'],
+            'url': f'https://a-z-animals.com/animals/{name.lower().replace(" ", "-")}/',
+            **fields,
+        }
+    return make
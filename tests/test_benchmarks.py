@@ -0,0 +1,30 @@
+"""
+Tests for the synthetic benchmark dataset generator.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from fix_json import validate_record  # noqa: E402
+from synthetic import generate_animals, render_animal_page  # noqa: E402
+
+
+class TestSyntheticAnimals:
+    """Tests for generated documents and pages."""
+
+    def test_generation_is_deterministic(self):
+        assert generate_animals(50) == generate_animals(50)
+        assert generate_animals(50, seed=1) != generate_animals(50)
+
+    def test_documents_are_valid_feed_records(self):
+        animals = generate_animals(200)
+        assert all(validate_record(animal) is None for animal in animals)
+        assert len({animal['url'] for animal in animals}) == 200
+
+    def test_page_contains_scraped_fields(self):
+        animal = generate_animals(1)[0]
+        page = render_animal_page(animal)
+        assert f"<h1>{animal['animal_name']}</h1>" in page
+        assert animal['locations'][0] in page
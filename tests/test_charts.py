@@ -0,0 +1,87 @@
+"""
+Tests for the Stats figures and the pre-rendered landing view (Webapp/charts.py).
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Webapp'))
+
+pytest.importorskip('plotly')
+pd = pytest.importorskip('pandas')
+
+import charts  # noqa: E402
+from repository import AnimalRepository  # noqa: E402
+
+ANIMALS = [
+    {'animal_name': 'Tiger', 'habitat': 'Forest', 'diet': 'Carnivore', 'conservation_status': 'Endangered',
+     'diet_tags': ['carnivore'], 'habitat_tags': ['forest'], 'locations': ['Asia'],
+     'url': 'https://a-z-animals.com/animals/tiger/'},
+    {'animal_name': 'Zebra', 'habitat': 'Savanna', 'diet': 'Herbivore', 'conservation_status': None,
+     'diet_tags': ['herbivore'], 'habitat_tags': ['grassland'], 'locations': ['Africa'],
+     'url': 'https://a-z-animals.com/animals/zebra/'},
+]
+
+
+def frame(rows, label):
+    return pd.DataFrame(rows, columns=[label, 'count'])
+
+
+class TestStatsFigures:
+    """Tests for the figure builders and their serialization."""
+
+    def test_location_chart_only_with_counts(self):
+        figures = charts.stats_figures(
+            frame([('carnivore', 1)], 'diet'), frame([('forest', 1)], 'habitat'),
+            frame([('Endangered', 1)], 'status'), frame([], 'location'),
+        )
+        assert sorted(figures) == ['diet', 'habitat', 'status']
+
+    def test_json_round_trip(self):
+        figures = charts.stats_figures(
+            frame([('carnivore', 2)], 'diet'), frame([('forest', 1)], 'habitat'),
+            frame([('Endangered', 1)], 'status'), frame([('Asia', 1)], 'location'),
+        )
+        loaded = charts.load_figures(charts.dump_figures(figures))
+        assert loaded['diet'].layout.title.text == figures['diet'].layout.title.text
+        assert list(loaded['location'].data[0].x) == ['Asia']
+
+
+class TestBuildLanding:
+    """Tests for the rendering of the unfiltered view."""
+
+    def test_metrics_and_figures(self):
+        mongomock = pytest.importorskip('mongomock')
+        db = mongomock.MongoClient()['animals_test']
+        db['animals'].insert_many([dict(a) for a in ANIMALS])
+        landing = charts.build_landing(AnimalRepository(db))
+        assert landing['metrics'] == {'total': 2, 'habitats': 2, 'diets': 2, 'results': 2}
+        assert set(landing['figures']) == {'diet', 'habitat', 'status', 'location'}
+        assert all(isinstance(data, str) for data in landing['figures'].values())
+
+    def test_rebuilt_after_tag_update(self, tmp_path, monkeypatch):
+        mongomock = pytest.importorskip('mongomock')
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        import extract_keywords
+        from datastore import client as datastore_client
+        from datastore.changes import bump_data_version
+
+        db = mongomock.MongoClient()['animals_test']
+        db['animals'].insert_many([
+            {key: value for key, value in a.items() if key not in ('diet_tags', 'habitat_tags')} for a in ANIMALS
+        ])
+        repository = AnimalRepository(db)
+        old_version = bump_data_version(db).isoformat()
+        repository.store_landing(old_version, charts.build_landing(repository))
+        assert 'carnivore' not in repository.landing(old_version)['figures']['diet']
+
+        monkeypatch.setattr(datastore_client, 'get_collection', lambda: db['animals'])
+        monkeypatch.setattr(extract_keywords, 'SNAPSHOT_PATH', str(tmp_path / 'animals.arrow'))
+        assert extract_keywords.main() == 2
+
+        # Nouvelle version : la vue d'accueil stockée n'est plus servie, elle est rendue à nouveau
+        version = repository.data_version()
+        assert version != old_version
+        assert repository.landing(version) is None
+        assert 'carnivore' in charts.build_landing(repository)['figures']['diet']
@@ -0,0 +1,96 @@
+"""
+Tests for the shared MongoDB data-access package (datastore/).
+"""
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('pymongo')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pymongo.errors import AutoReconnect, OperationFailure  # noqa: E402
+
+from datastore import client as datastore_client  # noqa: E402
+from datastore.bulk import BulkWriter, find_batches, iter_batches  # noqa: E402
+
+
+class TestClients:
+    """Tests for the per-process client registry."""
+
+    def test_clients_are_shared_per_uri_and_options(self):
+        uri = 'mongodb://localhost:27999'
+        try:
+            first = datastore_client.get_client(uri)
+            assert datastore_client.get_client(uri) is first
+            assert datastore_client.get_client(uri, maxPoolSize=5) is not first
+            datastore_client.close_client(uri)
+            assert datastore_client.get_client(uri) is not first
+        finally:
+            datastore_client.close_clients()
+
+    def test_options_come_from_settings(self):
+        options = datastore_client.client_options(w='majority')
+        assert options['w'] == 'majority'
+        assert options['retryWrites'] is True
+        assert 'serverSelectionTimeoutMS' in options
+
+
+class TestRetry:
+    """Tests for with_retry."""
+
+    def test_retries_connection_errors_then_succeeds(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise AutoReconnect('primary stepped down')
+            return 'ok'
+
+        assert datastore_client.with_retry(flaky, attempts=3, backoff=0) == 'ok'
+        assert len(calls) == 3
+
+    def test_gives_up_after_the_last_attempt(self):
+        def down():
+            raise AutoReconnect('no server')
+
+        with pytest.raises(AutoReconnect):
+            datastore_client.with_retry(down, attempts=2, backoff=0)
+
+    def test_other_errors_are_not_retried(self):
+        calls = []
+
+        def denied():
+            calls.append(1)
+            raise OperationFailure('not authorized')
+
+        with pytest.raises(OperationFailure):
+            datastore_client.with_retry(denied, attempts=3, backoff=0)
+        assert len(calls) == 1
+
+
+class TestBulk:
+    """Tests for cursor batching and buffered writes."""
+
+    @pytest.fixture
+    def collection(self):
+        mongomock = pytest.importorskip('mongomock')
+        return mongomock.MongoClient()['animals_test']['animals']
+
+    def test_iter_batches(self):
+        assert list(iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+    def test_bulk_writer_flushes_every_batch_and_on_exit(self, collection):
+        with BulkWriter(collection, batch_size=2) as writer:
+            for i in range(3):
+                writer.insert_one({'animal_name': f'Animal{i}'})
+            assert collection.count_documents({}) == 2
+        assert collection.count_documents({}) == 3
+        assert writer.stats['inserted'] == 3
+
+    def test_find_batches(self, collection):
+        collection.insert_many([{'i': i} for i in range(5)])
+        batches = list(find_batches(collection, {}, {'_id': 0}, batch_size=2))
+        assert [len(b) for b in batches] == [2, 2, 1]
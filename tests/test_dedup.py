@@ -0,0 +1,111 @@
+"""
+Tests for MinHash/LSH near-duplicate detection and list-field deduplication.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Scrapy'))
+
+from crawler.minhash import (  # noqa: E402
+    LSHIndex, MinHasher, NearDuplicateDetector, dedupe_list, dedupe_list_fields, shingles, similarity
+)
+
+TIGER_TEXT = (
+    "The tiger is the largest living cat species and a member of the genus Panthera. "
+    "It is most recognisable for its dark vertical stripes on orange fur with a white underside."
+)
+ZEBRA_TEXT = (
+    "Zebras are African equines with distinctive black-and-white striped coats. "
+    "They live in herds on the open grasslands and plains of East and Southern Africa."
+)
+
+
+class TestListDeduplication:
+    """Tests for in-item deduplication of list fields."""
+
+    def test_dedupe_list_keeps_first_spelling_and_order(self):
+        """Repeats are removed regardless of case and spacing."""
+        assert dedupe_list(['Solitary', 'Mainly solitary', 'solitary ', 'Brown']) == [
+            'Solitary', 'Mainly solitary', 'Brown'
+        ]
+
+    def test_dedupe_list_fields_only_reports_changes(self):
+        """Only list fields that actually shrink are returned."""
+        doc = {'key_facts': ['Solitary', 'Solitary'], 'locations': ['Africa']}
+        assert dedupe_list_fields(doc) == {'key_facts': ['Solitary']}
+
+
+class TestMinHash:
+    """Tests for signatures and the LSH index."""
+
+    def test_similarity_estimates_jaccard(self):
+        """Identical texts have similarity 1, unrelated texts close to 0."""
+        hasher = MinHasher()
+        tiger = hasher.signature(shingles(TIGER_TEXT))
+        assert similarity(tiger, hasher.signature(shingles(TIGER_TEXT))) == 1.0
+        assert similarity(tiger, hasher.signature(shingles(ZEBRA_TEXT))) < 0.2
+
+    def test_lsh_only_returns_similar_candidates(self):
+        """The index finds the near-duplicate and ignores the unrelated animal."""
+        hasher = MinHasher()
+        index = LSHIndex()
+        index.insert('tiger', hasher.signature(shingles(TIGER_TEXT)))
+        index.insert('zebra', hasher.signature(shingles(ZEBRA_TEXT)))
+
+        variant = TIGER_TEXT.replace('orange fur', 'orange-brown fur')
+        matches = index.query(hasher.signature(shingles(variant)), threshold=0.5)
+        assert [key for key, _ in matches] == ['tiger']
+
+    def test_bands_must_divide_permutations(self):
+        with pytest.raises(ValueError):
+            LSHIndex(num_perm=128, bands=10)
+
+
+class TestNearDuplicateDetector:
+    """Tests for clustering near-duplicate animals."""
+
+    def test_name_variant_is_clustered(self, make_animal):
+        """The same species under another name and URL is reported as a duplicate."""
+        detector = NearDuplicateDetector()
+        assert detector.add('tiger', make_animal('Tiger', TIGER_TEXT)) is None
+        assert detector.add('zebra', make_animal('Zebra', ZEBRA_TEXT)) is None
+        representative, score = detector.add('bengal', make_animal('Bengal Tiger', TIGER_TEXT + ' Bengal.'))
+        assert representative == 'tiger'
+        assert score >= 0.7
+
+        report = detector.report({'tiger': 'Tiger', 'bengal': 'Bengal Tiger'})
+        assert report == [{
+            'representative': 'tiger',
+            'representative_name': 'Tiger',
+            'duplicates': [{'key': 'bengal', 'name': 'Bengal Tiger', 'similarity': round(score, 3)}],
+        }]
+
+    def test_short_texts_are_never_matched(self, make_animal):
+        """Animals with only a few shared words (e.g. colours) are not merged."""
+        detector = NearDuplicateDetector()
+        detector.add('a', make_animal('A', key_facts=['Brown', 'Grey']))
+        assert detector.add('b', make_animal('B', key_facts=['Brown', 'Grey'])) is None
+
+
+class TestMergeCluster:
+    """Tests for merging a cluster in MongoDB (dedupe_data.py --apply)."""
+
+    def test_deleted_duplicates_leave_tombstones(self, make_animal):
+        mongomock = pytest.importorskip('mongomock')
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        from dedupe_data import merge_cluster
+
+        collection = mongomock.MongoClient()['animals_test']['animals']
+        collection.insert_many([
+            {'_id': 1, **make_animal('Tiger', TIGER_TEXT, key_facts=['Solitary', 'Nocturnal'])},
+            {'_id': 2, **make_animal('Tigers', TIGER_TEXT)},
+        ])
+        cluster = {'representative': 1, 'duplicates': [{'key': 2}]}
+        assert merge_cluster(collection, cluster) == 1
+
+        (tombstone,) = collection.database['tombstones'].find()
+        assert tombstone['url'] == 'https://a-z-animals.com/animals/tigers/'
+        assert tombstone['replaced_by'] == 'https://a-z-animals.com/animals/tiger/'
+        assert tombstone['deleted_at'] is not None
@@ -0,0 +1,194 @@
+"""
+Tests for Elasticsearch bulk indexing and the Webapp search backend,
+against a local stub server implementing the bulk and search endpoints.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Scrapy'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Webapp'))
+
+from crawler.search_index import ElasticsearchIndexer  # noqa: E402
+from search import ElasticsearchSearch  # noqa: E402
+
+
+class StubElasticsearch(BaseHTTPRequestHandler):
+    """Minimal Elasticsearch: index creation, _bulk and multi_match _search."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+
+    def do_GET(self):
+        self._reply(200, {'version': {'number': '8.11.0'}})
+
+    def do_PUT(self):
+        self._body()
+        index = self.path.strip('/')
+        if index in self.server.indices:
+            self._reply(400, {'error': {'type': 'resource_already_exists_exception'}})
+        else:
+            self.server.indices[index] = {}
+            self._reply(200, {'acknowledged': True})
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == '/_bulk':
+            self.server.bulk_requests += 1
+            lines = iter(body.strip().split('\n'))
+            items = []
+            for line in lines:
+                (action, meta), = json.loads(line).items()
+                index = self.server.indices.setdefault(meta['_index'], {})
+                if action == 'delete':
+                    status = 200 if index.pop(meta['_id'], None) is not None else 404
+                    items.append({'delete': {'_id': meta['_id'], 'status': status}})
+                    continue
+                source = next(lines)
+                if self.server.reject_next > 0:
+                    self.server.reject_next -= 1
+                    items.append({'index': {'_id': meta['_id'], 'status': 429}})
+                    continue
+                index[meta['_id']] = json.loads(source)
+                items.append({'index': {'_id': meta['_id'], 'status': 201}})
+            errors = any(result['status'] >= 300 for item in items for result in item.values())
+            self._reply(200, {'errors': errors, 'items': items})
+        elif self.path.endswith('/_search'):
+            query = json.loads(body)['query']['multi_match']
+            terms = query['query'].lower().split()
+            fields = [f.split('^')[0] for f in query['fields']]
+            index = self.path.split('/')[1]
+            hits = []
+            for doc in self.server.indices.get(index, {}).values():
+                text = json.dumps([doc.get(f) for f in fields]).lower()
+                score = sum(text.count(t) for t in terms)
+                if score:
+                    hits.append({'_score': score, '_source': {'url': doc['url']}})
+            hits.sort(key=lambda h: -h['_score'])
+            self._reply(200, {'hits': {'hits': hits[:json.loads(body)['size']]}})
+        else:
+            self._reply(404, {})
+
+
+@pytest.fixture
+def es_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubElasticsearch)
+    server.indices = {}
+    server.bulk_requests = 0
+    server.reject_next = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def es_url(server):
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+class TestElasticsearchIndexer:
+    """Tests for batched _bulk indexing."""
+
+    def test_documents_are_sent_in_batches(self, es_server, make_animal):
+        """Documents are buffered and flushed every batch_size items."""
+        indexer = ElasticsearchIndexer(es_url(es_server), 'animals', batch_size=10)
+        indexer.ensure_index()
+        for i in range(25):
+            indexer.add(make_animal(f'Animal{i}', 'A test animal'))
+        assert es_server.bulk_requests == 2
+        indexer.close()
+        assert es_server.bulk_requests == 3
+        assert indexer.indexed == 25
+        assert len(es_server.indices['animals']) == 25
+
+    def test_ensure_index_is_idempotent(self, es_server):
+        """Creating an existing index is not an error."""
+        indexer = ElasticsearchIndexer(es_url(es_server), 'animals')
+        indexer.ensure_index()
+        indexer.ensure_index()
+
+    def test_rejected_items_are_retried(self, es_server, make_animal):
+        """Items rejected with 429 are retried alone, not the whole batch."""
+        es_server.reject_next = 3
+        indexer = ElasticsearchIndexer(es_url(es_server), 'animals', batch_size=100, backoff=0)
+        for i in range(10):
+            indexer.add(make_animal(f'Animal{i}', 'A test animal'))
+        indexer.close()
+        assert indexer.indexed == 10
+        assert indexer.failed == 0
+        assert es_server.bulk_requests == 2
+
+    def test_reindexing_is_idempotent(self, es_server, make_animal):
+        """The same animal indexed twice is stored once."""
+        indexer = ElasticsearchIndexer(es_url(es_server), 'animals')
+        indexer.add(make_animal('Tiger', 'Largest cat'))
+        indexer.add(make_animal('Tiger', 'Largest cat'))
+        indexer.close()
+        assert len(es_server.indices['animals']) == 1
+
+    def test_deleted_animals_are_removed(self, es_server, make_animal):
+        """Deletions share the bulk requests; an animal already missing is not a failure."""
+        indexer = ElasticsearchIndexer(es_url(es_server), 'animals')
+        indexer.add(make_animal('Tiger', 'Largest cat'))
+        indexer.add(make_animal('Lion', 'Social cat'))
+        indexer.close()
+        indexer.delete({'url': 'https://a-z-animals.com/animals/lion/'})
+        indexer.delete({'url': 'https://a-z-animals.com/animals/unknown/'})
+        indexer.close()
+        assert [doc['animal_name'] for doc in es_server.indices['animals'].values()] == ['Tiger']
+        assert (indexer.indexed, indexer.deleted, indexer.failed) == (2, 2, 0)
+
+    def test_unreachable_cluster_counts_failures(self, es_server, make_animal):
+        """A cluster gone mid-crawl fails the batch, not the items: they go on through the pipelines."""
+        pytest.importorskip('scrapy')
+        from crawler.pipelines import ElasticsearchPipeline
+
+        pipeline = ElasticsearchPipeline(es_url(es_server), 'animals', batch_size=2)
+        spider = type('Spider', (), {'logger': logging.getLogger('test')})()
+        pipeline.open_spider(spider)
+        es_server.shutdown()
+        es_server.server_close()
+        pipeline.indexer.backoff = 0
+
+        items = [make_animal(name, 'A cat') for name in ('Tiger', 'Lion', 'Puma')]
+        assert [pipeline.process_item(item, spider) for item in items] == items
+        pipeline.close_spider(spider)
+        assert (pipeline.indexer.indexed, pipeline.indexer.failed) == (0, 3)
+
+
+class TestElasticsearchSearch:
+    """Tests for the Webapp full-text backend."""
+
+    def test_search_over_text_fields(self, es_server, make_animal):
+        """Queries match description and diet, not only the name."""
+        indexer = ElasticsearchIndexer(es_url(es_server), 'animals')
+        indexer.add(make_animal('Tiger', 'The largest living cat species', diet='Carnivore'))
+        indexer.add(make_animal('Zebra', 'Striped horse of Africa', diet='Herbivore'))
+        indexer.close()
+
+        backend = ElasticsearchSearch(es_url(es_server), 'animals')
+        assert backend.available()
+        assert backend.search('cat') == ['https://a-z-animals.com/animals/tiger/']
+        assert backend.search('herbivore') == ['https://a-z-animals.com/animals/zebra/']
+
+    def test_unreachable_cluster_is_unavailable(self):
+        """A cluster that does not answer is reported unavailable."""
+        backend = ElasticsearchSearch('http://127.0.0.1:9', 'animals', timeout=0.5)
+        assert not backend.available()
@@ -0,0 +1,155 @@
+"""
+Tests for the JSON Lines feed mode and the streaming feed validator.
+"""
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Scrapy'))
+
+from crawler.feeds import build_feeds  # noqa: E402
+from fix_json import fix_feed, iter_feed, iter_records  # noqa: E402
+
+
+class TestBuildFeeds:
+    """Tests for the FEEDS setting builder."""
+
+    def test_default_is_json_array(self, tmp_path, monkeypatch):
+        """Without configuration the feed stays a single overwritten JSON array."""
+        monkeypatch.delenv('FEED_FORMAT', raising=False)
+        monkeypatch.delenv('FEED_COMPRESSION', raising=False)
+        feeds = build_feeds(str(tmp_path))
+        assert feeds == {
+            os.path.join(str(tmp_path), 'animals.json'): {
+                'format': 'json', 'encoding': 'utf-8', 'overwrite': True,
+            },
+        }
+
+    def test_jsonlines_appends(self, tmp_path):
+        """JSON Lines mode appends so partial crawls are kept."""
+        (path, options), = build_feeds(str(tmp_path), 'jsonlines').items()
+        assert path.endswith('animals.jsonl')
+        assert options['format'] == 'jsonlines'
+        assert options['overwrite'] is False
+        assert 'postprocessing' not in options
+
+    @pytest.mark.parametrize('compression,suffix', [('gzip', '.jsonl.gz'), ('zstd', '.jsonl.zst')])
+    def test_jsonlines_compression(self, tmp_path, compression, suffix):
+        """Compressed feeds get a matching suffix and post-processing plugin."""
+        (path, options), = build_feeds(str(tmp_path), 'jsonlines', compression).items()
+        assert path.endswith(suffix)
+        assert len(options['postprocessing']) == 1
+
+    def test_invalid_configuration(self, tmp_path):
+        """Unknown formats and compressed JSON arrays are rejected."""
+        with pytest.raises(ValueError):
+            build_feeds(str(tmp_path), 'xml')
+        with pytest.raises(ValueError):
+            build_feeds(str(tmp_path), 'json', 'gzip')
+
+
+class TestStreamingValidation:
+    """Tests for fix_json streaming validation and repair."""
+
+    def test_jsonlines_reports_bad_records(self, tmp_path, make_animal):
+        """Bad lines are reported with their position and do not stop reading."""
+        path = tmp_path / 'animals.jsonl'
+        lines = [
+            json.dumps(make_animal('Tiger')),
+            '{"animal_name": "Lion", "url"',
+            json.dumps({'animal_name': None, 'url': 'https://a-z-animals.com/animals/x/'}),
+            json.dumps(make_animal('Zebra')),
+        ]
+        path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+        results = list(iter_feed(str(path)))
+        errors = [error for _, _, error in results if error]
+        assert [r['animal_name'] for r in iter_records(str(path))] == ['Tiger', 'Zebra']
+        assert [e.position for e in errors] == ['line 2', 'line 3']
+        assert 'animal_name' in errors[1].error
+
+    def test_truncated_json_array_is_repaired(self, tmp_path, make_animal):
+        """A JSON array cut mid-record keeps every complete record."""
+        path = tmp_path / 'animals.json'
+        content = json.dumps([make_animal(n) for n in ('Tiger', 'Lion', 'Zebra')], indent=4)
+        path.write_text(content[:content.rfind('Zebra')], encoding='utf-8')
+
+        valid, bad = fix_feed(str(path))
+        assert (valid, bad) == (2, 1)
+        data = json.loads(path.read_text(encoding='utf-8'))
+        assert [a['animal_name'] for a in data] == ['Tiger', 'Lion']
+
+    def test_control_characters_and_double_quotes(self, tmp_path):
+        """Known corruptions are repaired without altering empty strings."""
+        path = tmp_path / 'animals.json'
+        path.write_text(
+            '[\n    {\n        "animal_name": "Ti\x01ger",\n        "habitat": "Asia"",\n'
+            '        "description": "",\n        "url": "https://a-z-animals.com/animals/tiger/"\n    }\n]\n',
+            encoding='utf-8'
+        )
+        record, = iter_records(str(path))
+        assert record['animal_name'] == 'Tiger'
+        assert record['habitat'] == 'Asia'
+        assert record['description'] == ''
+
+    def test_truncated_gzip_stream(self, tmp_path, make_animal):
+        """A gzip feed cut mid-write yields its complete lines and one error."""
+        path = tmp_path / 'animals.jsonl.gz'
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for i in range(200):
+                f.write(json.dumps(make_animal(f'Animal{i}')) + '\n')
+        raw = path.read_bytes()
+        path.write_bytes(raw[:len(raw) // 2])
+
+        results = list(iter_feed(str(path)))
+        errors = [error for _, _, error in results if error]
+        assert len(errors) == 1
+        assert 'truncated' in errors[0].error
+        assert len(results) > 1
+
+
+class TestZstdFeed:
+    """Tests for the zstd compressed JSON Lines feed, written by the Scrapy plugin."""
+
+    @pytest.fixture(autouse=True)
+    def zstandard(self):
+        return pytest.importorskip('zstandard')
+
+    def append_run(self, path, animals):
+        """Append one crawl run (one zstd frame) the way the feed exporter does."""
+        from crawler.feeds import ZstdPlugin
+
+        plugin = ZstdPlugin(open(path, 'ab'), {})
+        for animal in animals:
+            plugin.write((json.dumps(animal) + '\n').encode('utf-8'))
+        plugin.close()
+
+    def test_appended_runs_are_read_across_frames(self, tmp_path, make_animal):
+        """Every run appended to the feed is read back, then rewritten as zstd."""
+        path = str(tmp_path / 'animals.jsonl.zst')
+        self.append_run(path, [make_animal('Tiger'), make_animal('Lion')])
+        self.append_run(path, [make_animal('Zebra')])
+        assert [r['animal_name'] for r in iter_records(path)] == ['Tiger', 'Lion', 'Zebra']
+
+        output = str(tmp_path / 'fixed.jsonl.zst')
+        assert fix_feed(path, output=output) == (3, 0)
+        assert [r['animal_name'] for r in iter_records(output)] == ['Tiger', 'Lion', 'Zebra']
+
+    def test_truncated_final_frame(self, tmp_path, make_animal):
+        """A run cut mid-write keeps the previous runs and reports the truncation."""
+        path = tmp_path / 'animals.jsonl.zst'
+        self.append_run(str(path), [make_animal('Tiger'), make_animal('Lion')])
+        first_frame = path.stat().st_size
+        self.append_run(str(path), [make_animal(f'Animal{i}') for i in range(200)])
+        raw = path.read_bytes()
+        path.write_bytes(raw[:first_frame + (len(raw) - first_frame) // 2])
+
+        results = list(iter_feed(str(path)))
+        errors = [error for _, _, error in results if error]
+        assert [r['animal_name'] for _, r, _ in results[:2]] == ['Tiger', 'Lion']
+        assert len(errors) == 1
+        assert 'truncated' in errors[0].error
@@ -0,0 +1,136 @@
+"""
+Tests for the embedded BM25 full-text index.
+"""
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Webapp'))
+
+from fulltext import BM25Index, BM25Search, build_index, main, tokenize  # noqa: E402
+
+ANIMALS = [
+    {
+        'animal_name': 'Tiger',
+        'description': 'The tiger is the largest living cat species.',
+        'habitat': 'Tropical forests and grasslands of Asia',
+        'diet': 'Carnivore, hunts deer and wild boar',
+        'key_facts': ['Solitary', 'Nocturnal'],
+        'url': 'https://a-z-animals.com/animals/tiger/',
+    },
+    {
+        'animal_name': 'Zebra',
+        'description': 'Striped horse of the African savanna.',
+        'habitat': 'Open grasslands and plains',
+        'diet': 'Herbivore, grazes on grass',
+        'key_facts': ['Herd', 'Diurnal'],
+        'facts': {'Main Prey': 'Grass'},
+        'url': 'https://a-z-animals.com/animals/zebra/',
+    },
+    {
+        'animal_name': 'Garden Eel',
+        'description': 'Small eel living in colonies on sandy sea floors.',
+        'habitat': 'Coral reefs of the Indo-Pacific',
+        'diet': 'Carnivore, eats plankton',
+        'key_facts': ['Colony'],
+        'url': 'https://a-z-animals.com/animals/garden-eel/',
+    },
+]
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = str(tmp_path / 'animals.bm25')
+    assert build_index(ANIMALS, path) == 3
+    return path
+
+
+class TestBM25Index:
+    """Tests for building and querying the index file."""
+
+    def test_tokenize_drops_stopwords(self):
+        assert tokenize('The Tiger is a CAT') == ['tiger', 'cat']
+
+    def test_search_over_all_text_fields(self, index_path):
+        """Terms from description, habitat, diet, key_facts and facts are searchable."""
+        index = BM25Index(index_path)
+        assert index.search('savanna') == ['https://a-z-animals.com/animals/zebra/']
+        assert index.search('reefs') == ['https://a-z-animals.com/animals/garden-eel/']
+        assert index.search('nocturnal') == ['https://a-z-animals.com/animals/tiger/']
+        assert index.search('prey') == ['https://a-z-animals.com/animals/zebra/']
+
+    def test_ranking_prefers_more_matching_terms(self, index_path):
+        """Documents matching more query terms rank first."""
+        results = BM25Index(index_path).search('carnivore forests')
+        assert results[0] == 'https://a-z-animals.com/animals/tiger/'
+        assert set(results) == {
+            'https://a-z-animals.com/animals/tiger/',
+            'https://a-z-animals.com/animals/garden-eel/',
+        }
+
+    def test_unknown_terms_return_nothing(self, index_path):
+        assert BM25Index(index_path).search('unicorn') == []
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / 'not_an_index'
+        path.write_bytes(b'\0' * 128)
+        with pytest.raises(ValueError):
+            BM25Index(str(path))
+
+
+class TestBM25Search:
+    """Tests for the lazily loaded Webapp backend."""
+
+    def test_missing_index_is_unavailable(self, tmp_path):
+        assert not BM25Search(str(tmp_path / 'missing.bm25')).available()
+
+    def test_rebuilt_index_is_reloaded(self, index_path):
+        """A rebuilt index file is picked up without restarting."""
+        backend = BM25Search(index_path)
+        assert backend.available()
+        assert backend.search('eel') == ['https://a-z-animals.com/animals/garden-eel/']
+
+        build_index(ANIMALS[:2], index_path)
+        os.utime(index_path, ns=(0, 1))
+        assert backend.search('eel') == []
+
+    def test_previous_mapping_is_closed(self, index_path):
+        """Re-mapping closes the previous mapping instead of leaving it to the garbage collector."""
+        backend = BM25Search(index_path)
+        backend.search('eel')
+        previous = backend._index
+        build_index(ANIMALS, index_path)
+        os.utime(index_path, ns=(0, 1))
+        backend.search('eel')
+        assert previous.mm.closed
+        assert backend._index is not previous
+
+    def test_shared_backends_keep_the_mapping(self, index_path):
+        """The Webapp picks its backend among long-lived ones, so the index is mapped once."""
+        from search import ElasticsearchSearch, get_search_backend
+
+        backends = (ElasticsearchSearch('http://127.0.0.1:9', timeout=0.1), BM25Search(index_path))
+        get_search_backend(backends).search('eel')
+        mapped = backends[1]._index
+        assert get_search_backend(backends) is backends[1]
+        backends[1].search('tiger')
+        assert backends[1]._index is mapped
+        assert not mapped.mm.closed
+
+
+class TestBuildCommand:
+    """Tests for building the index from a feed file."""
+
+    def test_compressed_jsonlines_feed(self, tmp_path):
+        """Feeds are streamed with the fix_json reader, compressed ones included."""
+        feed = tmp_path / 'animals.jsonl.gz'
+        with gzip.open(feed, 'wt', encoding='utf-8') as f:
+            for animal in ANIMALS:
+                f.write(json.dumps(animal) + '\n')
+            f.write('{"animal_name": "Broken"\n')
+        output = str(tmp_path / 'animals.bm25')
+        assert main(['build', '--json', str(feed), '--output', output]) == 0
+        assert BM25Index(output).n_docs == 3
@@ -0,0 +1,87 @@
+"""
+Tests for the end of an ingest: data version and snapshot (Scrapy/crawler/ingest.py).
+"""
+import os
+import sys
+
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Scrapy'))
+
+from crawler.ingest import finish_ingest  # noqa: E402
+
+ANIMALS = [
+    {'animal_name': 'Tiger', 'diet': 'Carnivore', 'habitat': 'Forest', 'facts': {},
+     'url': 'https://a-z-animals.com/animals/tiger/'},
+    {'animal_name': 'Zebra', 'diet': None, 'habitat': None, 'facts': {'Diet': 'Herbivore', 'Habitat': 'Savanna'},
+     'url': 'https://a-z-animals.com/animals/zebra/'},
+]
+
+
+@pytest.fixture
+def collection():
+    collection = mongomock.MongoClient()['animals_test']['animals']
+    collection.insert_many([dict(animal) for animal in ANIMALS])
+    return collection
+
+
+def data_version(collection):
+    return collection.database['meta'].find_one({'_id': 'data_version'})
+
+
+class TestFinishIngest:
+    """Tests for the version bump and snapshot export shared by every ingest."""
+
+    def test_bumps_version_and_exports_snapshot(self, collection, tmp_path):
+        pytest.importorskip('pyarrow')
+        path = str(tmp_path / 'animals.arrow')
+        version, rows = finish_ingest(collection, path)
+        assert rows == 2
+        assert os.path.exists(path)
+        assert data_version(collection)['version'] == version.isoformat()
+
+    def test_without_snapshot_path(self, collection):
+        version, rows = finish_ingest(collection, None)
+        assert rows is None
+        assert data_version(collection)['version'] == version.isoformat()
+
+    def test_enrichment_finishes_the_ingest(self, collection, tmp_path, monkeypatch):
+        pytest.importorskip('pyarrow')
+        import enrich_data
+
+        path = str(tmp_path / 'animals.arrow')
+        monkeypatch.setattr(enrich_data, 'get_collection', lambda: collection)
+        monkeypatch.setattr(enrich_data, 'SNAPSHOT_PATH', path)
+        enrich_data.enrich_animals()
+        assert collection.find_one({'animal_name': 'Zebra'})['diet'] == 'Herbivore'
+        assert data_version(collection) is not None
+        assert os.path.exists(path)
+
+    def test_dedup_merge_finishes_the_ingest(self, collection, tmp_path, monkeypatch):
+        pytest.importorskip('pyarrow')
+        import dedupe_data
+
+        path = str(tmp_path / 'animals.arrow')
+        collection.insert_one({**ANIMALS[0], 'key_facts': ['Solitary', 'solitary']})
+        monkeypatch.setattr(dedupe_data, 'get_collection', lambda: collection)
+        monkeypatch.setattr(dedupe_data, 'SNAPSHOT_PATH', path)
+        assert dedupe_data.main(['--apply', '--report', str(tmp_path / 'report.json')]) == 0
+        assert data_version(collection) is not None
+        assert os.path.exists(path)
+
+    def test_keyword_tags_finish_the_ingest(self, collection, tmp_path, monkeypatch):
+        import extract_keywords
+        from datastore import client as datastore_client
+
+        monkeypatch.setattr(datastore_client, 'get_collection', lambda: collection)
+        monkeypatch.setattr(extract_keywords, 'SNAPSHOT_PATH', str(tmp_path / 'animals.arrow'))
+        assert extract_keywords.main() == 1
+        assert collection.find_one({'animal_name': 'Tiger'})['diet_tags'] == ['carnivore']
+        version = data_version(collection)['version']
+
+        # Tags inchangés : pas de nouvelle version
+        assert extract_keywords.main() == 0
+        assert data_version(collection)['version'] == version
@@ -0,0 +1,138 @@
+"""
+Tests for the MongoDB pipelines lifecycle (shared client, final flushes).
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Scrapy'))
+
+pytest.importorskip('scrapy')
+mongomock = pytest.importorskip('mongomock')
+
+from scrapy import Spider, signals  # noqa: E402
+from scrapy.exceptions import DropItem  # noqa: E402
+from scrapy.pipelines import ItemPipelineManager  # noqa: E402
+from scrapy.utils.test import get_crawler  # noqa: E402
+
+from datastore import client as datastore_client  # noqa: E402
+
+MONGO_URI = 'mongodb://pipelines-test'
+PIPELINES = {
+    'crawler.pipelines.CrawlStatePipeline': 200,
+    'crawler.pipelines.ValidationPipeline': 220,
+    'crawler.pipelines.MongoDBPipeline': 300,
+}
+TIGER = {
+    'animal_name': 'Tiger', 'scientific_name': 'Panthera tigris', 'description': 'The largest living cat.',
+    'locations': ['Asia'], 'url': 'https://a-z-animals.com/animals/tiger/',
+}
+
+
+class ClosableClient(mongomock.MongoClient):
+    """mongomock client recording what was written when it was closed."""
+
+    def __init__(self):
+        super().__init__()
+        self.at_close = None
+
+    def close(self):
+        db = self['animals_test']
+        self.at_close = {name: db[name].count_documents({}) for name in ('crawl_state', 'quarantine', 'animals')}
+
+
+@pytest.fixture
+def client():
+    client = ClosableClient()
+    # Client partagé enregistré comme si get_client l'avait créé
+    datastore_client._clients[datastore_client._key(MONGO_URI, {})] = client
+    yield client
+    datastore_client._clients.pop(datastore_client._key(MONGO_URI, {}), None)
+
+
+class TestSharedClient:
+    """Tests for the closing order of the pipelines sharing the MongoDB client."""
+
+    def test_client_is_closed_after_every_final_flush(self, client):
+        crawler = get_crawler(Spider, {
+            'ITEM_PIPELINES': PIPELINES, 'MONGO_URI': MONGO_URI, 'MONGO_DB': 'animals_test',
+            'MONGO_COLLECTION': 'animals', 'SNAPSHOT_PATH': None, 'MONGO_BULK_SIZE': 100,
+        })
+        spider = Spider(name='animals')
+        manager = ItemPipelineManager.from_crawler(crawler)
+        for open_spider in manager.methods['open_spider']:
+            open_spider(spider)
+
+        # Écritures restées dans les tampons (lots de 100) jusqu'à la fermeture
+        spider.recrawl.discover(TIGER['url'], 'Tiger', None)
+        validation, mongodb = manager.middlewares[1], manager.middlewares[2]
+        with pytest.raises(DropItem):
+            validation.process_item({**TIGER, 'animal_name': None}, spider)
+        mongodb.process_item(dict(TIGER), spider)
+
+        # Ordre réel de Scrapy : priorité décroissante, puis le signal spider_closed
+        for close_spider in manager.methods['close_spider']:
+            close_spider(spider)
+        assert client.at_close is None
+        crawler.signals.send_catch_log(signals.spider_closed, spider=spider, reason='finished')
+
+        assert client.at_close == {'crawl_state': 1, 'quarantine': 1, 'animals': 1}
+        # Nouvelle version des données publiée pour les caches de la Webapp
+        assert client['animals_test']['meta'].find_one({'_id': 'data_version'}) is not None
+        assert datastore_client._key(MONGO_URI, {}) not in datastore_client._clients
+
+
+class TestValidation:
+    """Tests for the validation of the shipped crawl data."""
+
+    def test_shipped_data_is_kept(self, client):
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        from crawler.pipelines import ValidationPipeline
+        from fix_json import iter_records
+
+        pipeline = ValidationPipeline(MONGO_URI, 'animals_test', 'quarantine')
+        spider = Spider(name='animals')
+        pipeline.open_spider(spider)
+        records = list(iter_records(os.path.join(os.path.dirname(__file__), '..', 'data', 'animals.json')))
+        dropped = 0
+        for record in records:
+            try:
+                item = pipeline.process_item(dict(record), spider)
+            except DropItem:
+                dropped += 1
+                continue
+            assert item['animal_name'] == record['animal_name']
+        pipeline.close_spider(spider)
+
+        # 402 animaux à corriger (322 descriptions en nom latin, 78 vides, 2 noms scientifiques vides
+        # dont 2 avec aussi une description invalide) : 404 champs vidés, aucun animal écarté
+        assert (len(records), dropped) == (504, 0)
+        assert pipeline.cleared == 404
+        assert client['animals_test']['quarantine'].count_documents({}) == 0
+
+
+class TestStampedUpdate:
+    """Tests for the change stamps of the crawl upserts."""
+
+    def crawl(self, collection, doc):
+        from crawler.pipelines import stamped_update
+
+        collection.update_one({'url': doc['url']}, stamped_update(dict(doc)), upsert=True)
+        return collection.find_one({'url': doc['url']})
+
+    def test_unchanged_page_keeps_its_stamps(self):
+        collection = mongomock.MongoClient()['animals_test']['animals']
+        first = self.crawl(collection, {**TIGER, 'habitat': None})
+        again = self.crawl(collection, {**TIGER, 'habitat': None})
+        # mongomock ignore $$NOW : seule la révision, qui suit le même $cond, est vérifiée
+        assert first['revision'] == again['revision'] == 1
+
+    def test_overwriting_enriched_fields_is_a_change(self):
+        collection = mongomock.MongoClient()['animals_test']['animals']
+        self.crawl(collection, {**TIGER, 'habitat': None})
+        # Champ rempli par enrich_data.py, sans nouveau contenu sur la page
+        collection.update_one({'url': TIGER['url']}, {'$set': {'habitat': 'Forest'}, '$inc': {'revision': 1}})
+        recrawled = self.crawl(collection, {**TIGER, 'habitat': None})
+        assert recrawled['habitat'] is None
+        assert recrawled['revision'] == 3
@@ -0,0 +1,106 @@
+"""
+Tests for the cProfile/tracemalloc profiling hooks.
+"""
+import os
+import pstats
+import sys
+import tracemalloc
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from profiling import profiler, settings  # noqa: E402
+from profiling.profiler import RunProfiler, profiled, start_run  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def stop_tracing():
+    yield
+    tracemalloc.stop()
+    profiler._baseline = None
+
+
+@pytest.fixture
+def enabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, 'ENABLED', True)
+    monkeypatch.setattr(settings, 'PROFILE_DIR', str(tmp_path))
+    yield tmp_path
+    profiler.write_runs()
+
+
+def allocate(count):
+    return [str(i) * 10 for i in range(count)]
+
+
+class TestDisabled:
+    """Tests for the default (disabled) mode."""
+
+    def test_functions_are_returned_unchanged(self, monkeypatch):
+        monkeypatch.setattr(settings, 'ENABLED', False)
+        assert profiled()(allocate) is allocate
+        assert start_run('webapp').stop() is None
+
+
+class TestProfiled:
+    """Tests for the process-wide run decorators."""
+
+    def test_calls_are_counted_per_section(self, enabled):
+        wrapped = profiled('allocate', run='test')(allocate)
+        assert len(wrapped(10)) == 10
+        wrapped(10)
+        assert profiler.get_run('test').sections['allocate'][0] == 2
+
+    def test_generator_values_and_exceptions_pass_through(self, enabled):
+        @profiled('callback', run='test')
+        def callback(count):
+            yield from range(count)
+            raise KeyError('boom')
+
+        values = []
+        with pytest.raises(KeyError):
+            for value in callback(3):
+                values.append(value)
+        assert values == [0, 1, 2]
+        # Une section par valeur produite, plus celle qui lève l'exception
+        assert profiler.get_run('test').sections['callback'][0] == 4
+
+    def test_runs_are_written_at_the_end(self, enabled):
+        profiled(run='test')(allocate)(1000)
+        (base,) = profiler.write_runs()
+        assert os.path.dirname(base) == str(enabled)
+        assert pstats.Stats(base + '.prof').total_calls > 0
+        with open(base + '.txt', encoding='utf-8') as f:
+            report = f.read()
+        assert 'allocate' in report
+        assert 'Top 25 allocations' in report
+
+
+class TestRunProfiler:
+    """Tests for one profiled run."""
+
+    def test_rerun_report(self, enabled):
+        run = start_run('webapp')
+        allocate(5000)
+        base = run.stop()
+        assert os.path.basename(base).startswith('webapp-')
+        with open(base + '.txt', encoding='utf-8') as f:
+            report = f.read()
+        assert 'Run webapp' in report
+        assert 'allocation growth during the run' in report
+
+    def test_memory_is_sampled_at_most_every_interval(self, tmp_path):
+        run = RunProfiler('test', directory=str(tmp_path), sample_interval=3600)
+        for _ in range(3):
+            with run.section('step'):
+                allocate(100)
+        assert run.timeline == []
+        run.sample(force=True)
+        assert len(run.timeline) == 1
+
+    def test_without_tracemalloc(self, tmp_path):
+        run = RunProfiler('test', directory=str(tmp_path), frames=0)
+        with run.section('step'):
+            allocate(100)
+        with open(run.write() + '.txt', encoding='utf-8') as f:
+            assert 'allocations' not in f.read()
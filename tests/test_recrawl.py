@@ -0,0 +1,114 @@
+"""
+Tests for the freshness-driven recrawl planning.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Scrapy'))
+
+from crawler.recrawl import (  # noqa: E402
+    MIN_INTERVAL, NEVER_FETCHED_PRIORITY, PRIOR_INTERVAL, RecrawlScheduler, estimated_interval,
+    failure_update, fetch_update, plan, request_priority, staleness,
+)
+
+NOW = datetime(2026, 1, 31)
+
+
+def state(url, fetched_days_ago=None, history_days=0, changes=0):
+    if fetched_days_ago is None:
+        return {'_id': url, 'last_fetched': None}
+    last = NOW - timedelta(days=fetched_days_ago)
+    return {'_id': url, 'first_fetched': last - timedelta(days=history_days), 'last_fetched': last,
+            'change_count': changes}
+
+
+class TestStaleness:
+    """Tests for the change interval estimate and the staleness score."""
+
+    def test_interval_without_history_is_the_prior(self):
+        assert estimated_interval(state('a', 1)) == PRIOR_INTERVAL
+
+    def test_frequent_changes_shorten_the_interval(self):
+        assert estimated_interval(state('a', 1, history_days=23, changes=9)) == timedelta(days=3)
+
+    def test_interval_has_a_floor(self):
+        assert estimated_interval(state('a', 1, history_days=1, changes=1000)) == MIN_INTERVAL
+
+    def test_staleness_grows_with_age(self):
+        assert 0 < staleness(state('a', 1), NOW) < staleness(state('a', 10), NOW) < 1
+
+    def test_never_fetched_ranks_above_everything(self):
+        assert staleness(state('a'), NOW) > 1
+        assert request_priority(state('a'), NOW) == NEVER_FETCHED_PRIORITY
+        assert 0 <= request_priority(state('b', 30), NOW) <= 1000
+
+
+class TestPlan:
+    """Tests for the budgeted selection of the pages to fetch."""
+
+    def test_never_seen_then_most_likely_stale(self):
+        states = [
+            state('static', 5, history_days=300, changes=0),
+            state('volatile', 5, history_days=30, changes=10),
+            state('new'),
+            state('fresh', 0),
+        ]
+        assert [s['_id'] for s in plan(states, 3, NOW)] == ['new', 'volatile', 'static']
+
+    def test_ties_go_to_the_oldest_fetch(self):
+        # Deux pages à fraîcheur nulle (dates d'horloges légèrement décalées)
+        states = [state('a', -1), state('b', 0)]
+        assert staleness(states[0], NOW) == staleness(states[1], NOW) == 0
+        assert [s['_id'] for s in plan(states, 2, NOW)] == ['b', 'a']
+
+    def test_budget_bounds_the_plan(self):
+        states = [state(str(i)) for i in range(5)]
+        assert len(plan(states, 2, NOW)) == 2
+        assert plan(states, 0, NOW) == []
+
+
+class TestFetchUpdate:
+    """Tests for the server-side fetch record."""
+
+    def test_change_is_detected_against_the_stored_hash(self):
+        update = fetch_update('abc', NOW, 'Tiger')[0]['$set']
+        changed = update['change_count']['$add'][1]['$cond'][0]
+        assert {'$ne': [{'$ifNull': ['$content_hash', None]}, 'abc']} in changed['$and']
+        assert update['content_hash'] == 'abc'
+        assert update['last_fetched'] == NOW
+        assert update['first_fetched'] == {'$ifNull': ['$first_fetched', NOW]}
+        assert update['last_error'] == {'$literal': None}
+
+    def test_failure_keeps_the_content_history(self):
+        update = failure_update(NOW, 'HTTP 404', status=404)[0]['$set']
+        assert update['last_fetched'] == NOW
+        assert update['last_status'] == {'$literal': 404}
+        assert update['last_error'] == {'$literal': 'HTTP 404'}
+        assert not {'content_hash', 'change_count', 'last_changed'} & set(update)
+
+
+class TestRecrawlScheduler:
+    """Tests for the fetch records against a MongoDB collection."""
+
+    @pytest.fixture
+    def scheduler(self):
+        mongomock = pytest.importorskip('mongomock')
+        return RecrawlScheduler(mongomock.MongoClient()['animals_test'])
+
+    def test_fetches_and_failures_share_the_discovered_url(self, scheduler):
+        url = 'https://a-z-animals.com/animals/tiger/'
+        scheduler.discover(url, 'Tiger', 'letter-t', now=NOW)
+        scheduler.record_failure(url, 'HTTP 404', status=404, now=NOW + timedelta(days=1))
+        scheduler.record_fetch(url, {'animal_name': 'Tiger', 'source_page': 'letter-t'}, now=NOW + timedelta(days=2))
+        scheduler.flush()
+
+        (state,) = scheduler.collection.find()
+        assert state['_id'] == url
+        assert state['animal_name'] == 'Tiger'
+        assert state['first_fetched'] == NOW + timedelta(days=1)
+        assert state['last_fetched'] == NOW + timedelta(days=2)
+        assert state['fetch_count'] == 2
+        assert (state['last_status'], state['last_error']) == (200, None)
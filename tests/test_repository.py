@@ -0,0 +1,116 @@
+"""
+Tests for the Webapp data-access layer (Webapp/repository.py).
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Webapp'))
+
+from datastore.facets import refresh_location_counts  # noqa: E402
+from repository import AnimalRepository, build_filter, export_csv  # noqa: E402
+
+ANIMALS = [
+    {'animal_name': 'Tiger', 'habitat': 'Forest', 'diet': 'Carnivore', 'conservation_status': 'Endangered',
+     'url': 'https://a-z-animals.com/animals/tiger/', 'key_facts': ['Solitary'], 'locations': ['Asia']},
+    {'animal_name': 'Zebra', 'habitat': 'Savanna', 'diet': 'Herbivore', 'conservation_status': None,
+     'url': 'https://a-z-animals.com/animals/zebra/', 'locations': ['Africa']},
+    {'animal_name': 'Lion', 'habitat': 'Savanna', 'diet': 'Carnivore', 'conservation_status': 'Vulnerable',
+     'url': 'https://a-z-animals.com/animals/lion/', 'locations': ['Africa', 'Asia']},
+]
+
+
+class TestBuildFilter:
+    """Tests for the sidebar state -> MongoDB filter translation."""
+
+    def test_no_filters(self):
+        assert build_filter() == {}
+
+    def test_name_regex_without_search_backend(self):
+        assert build_filter('tig') == {'animal_name': {'$regex': 'tig', '$options': 'i'}}
+
+    def test_search_results_replace_the_regex(self):
+        urls = ['https://a-z-animals.com/animals/tiger/']
+        assert build_filter('stripes', urls, statuses=['Endangered']) == {
+            'url': {'$in': urls},
+            'conservation_status': {'$in': ['Endangered']},
+        }
+
+    def test_location_filter_on_list_field(self):
+        assert build_filter(diets=['Carnivore'], locations=['Africa']) == {
+            'diet': {'$in': ['Carnivore']},
+            'locations': {'$in': ['Africa']},
+        }
+
+    def test_taxonomy_node_is_a_prefix_match(self):
+        assert build_filter(taxonomy='Animalia/Chordata/') == {'taxonomy_path': {'$regex': '^Animalia/Chordata/'}}
+
+
+class TestExportCsv:
+    """Tests for the CSV export."""
+
+    def test_selected_columns_only(self):
+        csv = export_csv(ANIMALS[:2], ['animal_name', 'conservation_status'])
+        assert csv == 'animal_name,conservation_status\nTiger,Endangered\nZebra,\n'
+
+
+class TestAnimalRepository:
+    """Tests for the repository queries."""
+
+    @pytest.fixture
+    def repository(self):
+        mongomock = pytest.importorskip('mongomock')
+        db = mongomock.MongoClient()['animals_test']
+        db['animals'].insert_many([dict(a) for a in ANIMALS])
+        return AnimalRepository(db)
+
+    def test_facets_and_metrics(self, repository):
+        facets = repository.facets()
+        assert facets['habitat'] == ['Forest', 'Savanna']
+        assert facets['conservation_status'] == ['Endangered', 'Vulnerable']
+        assert repository.metrics() == {'total': 3, 'habitats': 2, 'diets': 2}
+        assert repository.metrics(facets) == repository.metrics()
+
+    def test_page_and_detail(self, repository):
+        page = repository.page(build_filter(habitats=['Savanna']))
+        assert sorted(a['animal_name'] for a in page) == ['Lion', 'Zebra']
+        assert '_id' not in page[0]
+        assert repository.detail('https://a-z-animals.com/animals/tiger/')['key_facts'] == ['Solitary']
+        assert repository.detail('https://a-z-animals.com/animals/unknown/') is None
+
+    def test_page_follows_the_search_ranking(self, repository):
+        ranking = [
+            'https://a-z-animals.com/animals/zebra/', 'https://a-z-animals.com/animals/tiger/',
+            'https://a-z-animals.com/animals/lion/',
+        ]
+        page = repository.page(build_filter('stripes', ranking), ranking=ranking)
+        assert [a['url'] for a in page] == ranking
+
+    def test_location_facet_and_filter(self, repository):
+        assert repository.facets()['locations'] == ['Africa', 'Asia']
+        page = repository.page(build_filter(diets=['Carnivore'], locations=['Africa']))
+        assert [a['animal_name'] for a in page] == ['Lion']
+
+    def test_location_counts_prefer_the_stored_ones(self, repository):
+        assert repository.location_counts() == [
+            {'location': 'Africa', 'count': 2}, {'location': 'Asia', 'count': 2},
+        ]
+        refresh_location_counts(repository.collection, repository.meta)
+        repository.collection.delete_many({})
+        assert len(repository.location_counts()) == 2
+
+    def test_data_version(self, repository):
+        assert repository.data_version() is None
+        repository.meta.insert_one({'_id': 'data_version', 'version': 7})
+        assert repository.data_version() == 7
+
+    def test_landing_is_stored_per_data_version(self, repository):
+        assert repository.landing('v1') is None
+        repository.store_landing('v1', {'metrics': {'total': 3}, 'figures': {'diet': '{}'}})
+        assert repository.landing('v1') == {'metrics': {'total': 3}, 'figures': {'diet': '{}'}}
+        # Nouvelle version des données : le rendu précédent n'est plus servi
+        assert repository.landing('v2') is None
+        repository.store_landing('v2', {'metrics': {'total': 4}, 'figures': {}})
+        assert repository.landing('v1') is None
+        assert repository.meta.count_documents({'_id': 'landing'}) == 1
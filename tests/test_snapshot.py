@@ -0,0 +1,111 @@
+"""
+Tests for the columnar snapshot exporter and the Webapp snapshot data mode.
+"""
+import os
+import sys
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pytest.importorskip('pandas')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Scrapy'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Webapp'))
+
+import snapshot  # noqa: E402
+from crawler.snapshot import write_snapshot  # noqa: E402
+
+ANIMALS = [
+    {
+        'animal_name': 'Tiger', 'scientific_name': 'Panthera tigris',
+        'habitat': 'Forests of Asia', 'diet': 'Carnivore', 'conservation_status': 'Endangered',
+        'habitat_tags': ['forest'], 'diet_tags': ['carnivore'], 'key_facts': ['Solitary'],
+        'locations': ['Asia'],
+        'classification': {'Kingdom': 'Animalia'},
+        'url': 'https://a-z-animals.com/animals/tiger/',
+    },
+    {
+        'animal_name': 'Zebra', 'scientific_name': None,
+        'habitat': 'Zebras are found inhabiting the open grasslands and plains of East and Southern Africa',
+        'diet': 'Herbivore', 'conservation_status': 'Near Threatened',
+        'habitat_tags': ['grassland'], 'diet_tags': ['herbivore'], 'locations': ['Africa', 'Asia'],
+        'url': 'https://a-z-animals.com/animals/zebra/',
+    },
+    {
+        'animal_name': 'aardvark', 'scientific_name': 'Orycteropus afer',
+        'habitat': 'Savanna', 'diet': 'Insectivore', 'conservation_status': 'Endangered',
+        'url': 'https://a-z-animals.com/animals/aardvark/',
+    },
+]
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = str(tmp_path / 'animals.arrow')
+    assert write_snapshot(ANIMALS, path) == 3
+    return snapshot.load_snapshot(path)
+
+
+class TestSnapshotExport:
+    """Tests for the snapshot file layout."""
+
+    def test_tag_and_status_columns_are_dictionary_encoded(self, table):
+        for column in ('conservation_status', 'habitat_tag', 'diet_tag'):
+            assert pa.types.is_dictionary(table.schema.field(column).type)
+
+    def test_nested_fields_are_left_out(self, table):
+        assert 'classification' not in table.column_names
+        assert table['key_facts'].to_pylist() == [['Solitary'], None, None]
+
+    def test_parquet_output(self, tmp_path):
+        pq = pytest.importorskip('pyarrow.parquet')
+        path = str(tmp_path / 'animals.parquet')
+        write_snapshot(ANIMALS, path)
+        assert pq.read_table(path).num_rows == 3
+
+
+class TestSnapshotQueries:
+    """Tests for vectorized filters and counts."""
+
+    def test_facets(self, table):
+        assert snapshot.facet_values(table)['conservation_status'] == ['Endangered', 'Near Threatened']
+
+    def test_filters_match_mongodb_semantics(self, table):
+        """Name regex is case-insensitive; list filters are $in on each column."""
+        names = lambda t: t['animal_name'].to_pylist()  # noqa: E731
+        assert names(snapshot.filter_table(table, name_pattern='TIG')) == ['Tiger']
+        assert names(snapshot.filter_table(table, statuses=['Endangered'])) == ['Tiger', 'aardvark']
+        assert names(snapshot.filter_table(table, statuses=['Endangered'], diets=['Insectivore'])) == ['aardvark']
+        assert names(snapshot.filter_table(table, urls=['https://a-z-animals.com/animals/zebra/'])) == ['Zebra']
+        assert snapshot.filter_table(table).num_rows == 3
+
+    def test_location_filter_and_counts(self, table):
+        """A row matches when any of its locations is selected."""
+        names = snapshot.filter_table(table, locations=['Africa'])['animal_name'].to_pylist()
+        assert names == ['Zebra']
+        assert snapshot.filter_table(table, locations=['Asia']).num_rows == 2
+        assert snapshot.facet_values(table)['locations'] == ['Africa', 'Asia']
+        counts = snapshot.counts_frame(table, 'locations', 'location')
+        assert counts.to_dict('records')[0] == {'location': 'Asia', 'count': 2}
+
+    def test_counts_skip_missing_values(self, table):
+        counts = snapshot.counts_frame(table, 'conservation_status', 'status')
+        assert counts.to_dict('records') == [
+            {'status': 'Endangered', 'count': 2},
+            {'status': 'Near Threatened', 'count': 1},
+        ]
+        assert snapshot.value_counts(table['diet_tag']) == {'carnivore': 1, 'herbivore': 1}
+
+    def test_search_ranking_order(self, table):
+        """Search results keep their ranking, also in the Table view."""
+        urls = ['https://a-z-animals.com/animals/zebra/', 'https://a-z-animals.com/animals/aardvark/']
+        ranked = snapshot.rank_by_urls(snapshot.filter_table(table, urls=urls), urls)
+        assert ranked['url'].to_pylist() == urls
+        assert snapshot.display_frame(ranked, alphabetical=False)['Nom'].tolist() == ['Zebra', 'aardvark']
+
+    def test_display_frame(self, table):
+        """Rows are sorted case-insensitively, tags win over truncated text."""
+        df = snapshot.display_frame(table)
+        assert df['Nom'].tolist() == ['aardvark', 'Tiger', 'Zebra']
+        assert df['Habitat'].tolist() == ['Savanna', 'Forest', 'Grassland']
+        assert df['Scientifique'].tolist()[2] == 'N/A'
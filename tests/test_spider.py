@@ -112,6 +112,53 @@ class TestAnimalsSpider:
         assert isinstance(spider.ANIMALS_PER_LETTER, int)
 
 
+class FakeRecrawl:
+    """Crawl state recorder keeping the recorded fetches."""
+
+    def __init__(self):
+        self.fetches = []
+        self.failures = []
+
+    def record_fetch(self, url, item, status=200):
+        self.fetches.append((url, item['animal_name'], status))
+
+    def record_failure(self, url, error, animal_name=None, source_page=None, status=None):
+        self.failures.append((url, animal_name, status))
+
+
+class TestFetchRecording:
+    """Tests for the crawl state records made by the animal page callbacks."""
+
+    TIGER_URL = "https://a-z-animals.com/animals/tiger/"
+
+    @pytest.fixture
+    def spider(self):
+        spider = AnimalsSpider()
+        spider.recrawl = FakeRecrawl()
+        return spider
+
+    def test_redirected_fetch_is_recorded_under_the_requested_url(self, spider):
+        request = spider.animal_request(self.TIGER_URL, "Tiger", None)
+        # Réponse après redirection : meta conservée, URL différente
+        redirected = request.replace(url="https://a-z-animals.com/animals/bengal-tiger/")
+        response = HtmlResponse(url=redirected.url, request=redirected, body=SAMPLE_ANIMAL_HTML, encoding='utf-8')
+        (item,) = spider.parse_animal_detail(response)
+        assert item['url'] == redirected.url
+        assert spider.recrawl.fetches == [(self.TIGER_URL, "Tiger", 200)]
+
+    def test_http_error_is_recorded_as_a_failure(self, spider):
+        from scrapy.spidermiddlewares.httperror import HttpError
+        from twisted.python.failure import Failure
+
+        request = spider.animal_request(self.TIGER_URL, "Tiger", None)
+        response = HtmlResponse(url=self.TIGER_URL, request=request, status=404, body=b'', encoding='utf-8')
+        failure = Failure(HttpError(response, 'Ignoring non-200 response'))
+        failure.request = request
+        spider.fetch_failed(failure)
+        assert spider.recrawl.failures == [(self.TIGER_URL, "Tiger", 404)]
+        assert spider.recrawl.fetches == []
+
+
 class TestJsonValidation:
     """Tests for exported JSON format validation."""
 
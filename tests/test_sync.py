@@ -0,0 +1,127 @@
+"""
+Tests for the watermark-based incremental sync (sync_data.py).
+"""
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datastore.changes import record_deletions  # noqa: E402
+from sync_data import CacheTarget, JsonlTarget, sync  # noqa: E402
+
+T0 = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()['animals_test']
+
+
+def seed(db, count):
+    db['animals'].insert_many([
+        {
+            'animal_name': f'Animal{i}',
+            'url': f'https://a-z-animals.com/animals/animal{i}/',
+            'updated_at': T0 + timedelta(minutes=i),
+            'revision': 1,
+        }
+        for i in range(count)
+    ])
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+class TestIncrementalSync:
+    """Only documents changed since the watermark are shipped."""
+
+    def test_first_sync_is_full(self, db, tmp_path):
+        """Without watermark every document is written, including unstamped ones."""
+        seed(db, 5)
+        db['animals'].insert_one({'animal_name': 'Legacy', 'url': 'https://a-z-animals.com/animals/legacy/'})
+        path = str(tmp_path / 'snapshot.jsonl')
+
+        assert sync(db, JsonlTarget(path), now=T0 + timedelta(hours=1)) == 6
+        assert len(read_lines(path)) == 6
+
+    def test_second_sync_ships_only_changes(self, db, tmp_path):
+        """After a first sync, only modified documents are appended."""
+        seed(db, 5)
+        path = str(tmp_path / 'snapshot.jsonl')
+        sync(db, JsonlTarget(path), now=T0 + timedelta(hours=1))
+
+        db['animals'].update_one(
+            {'animal_name': 'Animal2'},
+            {'$set': {'diet': 'Carnivore', 'updated_at': T0 + timedelta(hours=2)}, '$inc': {'revision': 1}}
+        )
+        assert sync(db, JsonlTarget(path), now=T0 + timedelta(hours=3)) == 1
+        lines = read_lines(path)
+        assert len(lines) == 6
+        assert lines[-1]['animal_name'] == 'Animal2'
+        assert lines[-1]['revision'] == 2
+
+        assert sync(db, JsonlTarget(path), now=T0 + timedelta(hours=4)) == 0
+
+    def test_recent_writes_wait_for_next_run(self, db, tmp_path):
+        """Writes inside the safety lag are left for the next run."""
+        seed(db, 2)
+        path = str(tmp_path / 'snapshot.jsonl')
+        assert sync(db, JsonlTarget(path), now=T0 + timedelta(minutes=1, seconds=1)) == 1
+        assert sync(db, JsonlTarget(path), now=T0 + timedelta(hours=1)) == 1
+
+    def test_cache_target_bumps_data_version(self, db):
+        """The cache target publishes a new data version only when data changed."""
+        seed(db, 3)
+        sync(db, CacheTarget(db), now=T0 + timedelta(hours=1))
+        version = db['meta'].find_one({'_id': 'data_version'})['version']
+
+        sync(db, CacheTarget(db), now=T0 + timedelta(hours=2))
+        assert db['meta'].find_one({'_id': 'data_version'})['version'] == version
+
+
+class TestDeletions:
+    """Animals deleted by a dedup merge reach the targets through their tombstones."""
+
+    def test_deleted_animals_are_shipped_once(self, db, tmp_path):
+        seed(db, 3)
+        path = str(tmp_path / 'snapshot.jsonl')
+        sync(db, JsonlTarget(path), now=datetime.utcnow())
+
+        deleted = db['animals'].find_one({'animal_name': 'Animal1'})
+        record_deletions(db, [deleted], replaced_by='https://a-z-animals.com/animals/animal0/')
+        db['animals'].delete_one({'_id': deleted['_id']})
+        later = datetime.utcnow() + timedelta(minutes=1)
+
+        assert sync(db, JsonlTarget(path), now=later) == 1
+        assert read_lines(path)[-1]['url'] == deleted['url']
+        assert read_lines(path)[-1]['deleted'] is True
+        assert sync(db, JsonlTarget(path), now=later + timedelta(minutes=1)) == 0
+
+    def test_recreated_animal_is_not_deleted(self, db, tmp_path):
+        """A URL crawled again after its deletion keeps its current version."""
+        seed(db, 2)
+        path = str(tmp_path / 'snapshot.jsonl')
+        sync(db, JsonlTarget(path), now=datetime.utcnow())
+
+        record_deletions(db, [db['animals'].find_one({'animal_name': 'Animal1'})])
+        assert sync(db, JsonlTarget(path), now=datetime.utcnow() + timedelta(minutes=1)) == 0
+        assert 'deleted' not in read_lines(path)[-1]
+
+    def test_deletions_bump_the_data_version(self, db):
+        seed(db, 2)
+        sync(db, CacheTarget(db), now=datetime.utcnow())
+        version = db['meta'].find_one({'_id': 'data_version'})['version']
+
+        deleted = db['animals'].find_one({'animal_name': 'Animal0'})
+        record_deletions(db, [deleted])
+        db['animals'].delete_one({'_id': deleted['_id']})
+        sync(db, CacheTarget(db), now=datetime.utcnow() + timedelta(minutes=1))
+        assert db['meta'].find_one({'_id': 'data_version'})['version'] != version
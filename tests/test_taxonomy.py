@@ -0,0 +1,69 @@
+"""
+Tests for the taxonomy materialized paths and subtree counts.
+"""
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datastore.taxonomy import (  # noqa: E402
+    build_nodes, child_nodes, refresh_taxonomy, subtree_filter, taxonomy_path,
+)
+
+TIGER = {'Kingdom': 'Animalia', 'Phylum': 'Chordata', 'Class': 'Mammalia', 'Order': 'Carnivora',
+         'Family': 'Felidae', 'Genus': 'Panthera'}
+LYNX = {**TIGER, 'Genus': 'Lynx'}
+OWL = {'Kingdom': 'Animalia', 'Phylum': 'Chordata', 'Class': 'Aves', 'Order': 'Strigiformes'}
+
+
+class TestTaxonomyPath:
+    """Tests for the materialized path of a classification."""
+
+    def test_full_path(self):
+        assert taxonomy_path(TIGER) == 'Animalia/Chordata/Mammalia/Carnivora/Felidae/Panthera/'
+
+    def test_labels_are_case_insensitive_and_path_stops_at_a_gap(self):
+        classification = {'kingdom:': 'Animalia', 'Phylum': ' Chordata ', 'Order': 'Carnivora'}
+        assert taxonomy_path(classification) == 'Animalia/Chordata/'
+
+    def test_missing_classification(self):
+        assert taxonomy_path(None) is None
+        assert taxonomy_path({'Genus': 'Panthera'}) is None
+
+    def test_subtree_filter_is_an_anchored_prefix(self):
+        pattern = subtree_filter('Animalia/Chordata/Mammalia/')['taxonomy_path']['$regex']
+        assert re.match(pattern, taxonomy_path(TIGER))
+        assert not re.match(pattern, taxonomy_path(OWL))
+
+
+class TestTaxonomyTree:
+    """Tests for the tree nodes and their subtree counts."""
+
+    @pytest.fixture
+    def nodes(self):
+        return build_nodes({taxonomy_path(TIGER): 2, taxonomy_path(LYNX): 1, taxonomy_path(OWL): 4, None: 3})
+
+    def test_subtree_counts(self, nodes):
+        counts = {node['_id']: node['count'] for node in nodes}
+        assert counts['Animalia/'] == 7
+        assert counts['Animalia/Chordata/Mammalia/Carnivora/Felidae/'] == 3
+        assert counts['Animalia/Chordata/Aves/Strigiformes/'] == 4
+
+    def test_drill_down(self, nodes):
+        classes = child_nodes(nodes, 'Animalia/Chordata/')
+        assert [(n['name'], n['rank'], n['count']) for n in classes] == [('Aves', 'Class', 4), ('Mammalia', 'Class', 3)]
+        assert [n['name'] for n in child_nodes(nodes)] == ['Animalia']
+
+    def test_refresh_stores_the_tree_and_backfills_paths(self):
+        mongomock = pytest.importorskip('mongomock')
+        pytest.importorskip('pymongo')
+        collection = mongomock.MongoClient()['animals_test']['animals']
+        collection.insert_many([{'classification': TIGER}, {'classification': OWL}, {'classification': None}])
+        # 6 nœuds sur le chemin du tigre, plus Aves et Strigiformes
+        assert refresh_taxonomy(collection) == 8
+        assert collection.count_documents(subtree_filter('Animalia/Chordata/Aves/')) == 1
+        stored = collection.database['taxonomy'].find_one({'_id': 'Animalia/'})
+        assert stored['count'] == 2
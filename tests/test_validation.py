@@ -0,0 +1,101 @@
+"""
+Tests for the compiled animal schema validation.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Scrapy'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from crawler.validation import compile_optional_fields, compile_schema  # noqa: E402
+from synthetic import generate_animals  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def validate():
+    return compile_schema()
+
+
+@pytest.fixture
+def tiger():
+    return {
+        'animal_name': 'Tiger',
+        'scientific_name': 'Panthera tigris',
+        'description': 'The tiger is the largest living cat species.',
+        'key_facts': ['Largest living cat species', 'Native to Asia'],
+        'conservation_status': 'Endangered',
+        'habitat': 'Forests of Asia',
+        'diet': 'Carnivore',
+        'image_url': None,
+        'classification': {'Kingdom': 'Animalia', 'Genus': 'Panthera'},
+        'facts': None,
+        'locations': ['Asia'],
+        'url': 'https://a-z-animals.com/animals/tiger/',
+        'source_page': 'https://a-z-animals.com/animals/animals-that-start-with-t/'
+    }
+
+
+class TestAnimalSchema:
+    """Tests for the scraped animal schema."""
+
+    def test_valid_items(self, validate, tiger):
+        assert validate(tiger) is None
+        assert all(validate(animal) is None for animal in generate_animals(100))
+
+    def test_null_or_blank_name(self, validate, tiger):
+        assert validate({**tiger, 'animal_name': None}) == '$.animal_name: expected string, got null'
+        assert validate({**tiger, 'animal_name': '  '}).startswith('$.animal_name: does not match')
+
+    def test_missing_url(self, validate, tiger):
+        del tiger['url']
+        assert validate(tiger) == '$.url: required field missing'
+
+    def test_empty_scientific_name(self, validate, tiger):
+        assert validate({**tiger, 'scientific_name': ''}).startswith('$.scientific_name')
+        assert validate({**tiger, 'scientific_name': None}) is None
+
+    def test_description_that_is_a_latin_name(self, validate, tiger):
+        assert validate({**tiger, 'description': 'Panthera tigris'}).startswith('$.description: must not match')
+        assert validate({**tiger, 'description': 'Panthera tigris altaica'}) is not None
+        assert validate({**tiger, 'description': None}) is None
+
+    def test_nested_values(self, validate, tiger):
+        assert validate({**tiger, 'key_facts': ['Solitary', 3]}) == '$.key_facts[]: expected string, got integer'
+        assert validate({**tiger, 'classification': {'Kingdom': ['Animalia']}}) == (
+            '$.classification.*: expected string, got array'
+        )
+
+    def test_foreign_url(self, validate, tiger):
+        assert validate({**tiger, 'url': 'https://example.com/tiger'}).startswith('$.url: does not match')
+
+
+class TestCompileSchema:
+    """Tests for the schema keywords supported by the compiler."""
+
+    def test_type_union_and_min_length(self):
+        validate = compile_schema({'type': ['string', 'null'], 'minLength': 2})
+        assert validate(None) is None
+        assert validate('ab') is None
+        assert validate('a') == '$: shorter than 2 characters'
+        assert validate(3) == '$: expected string or null, got integer'
+
+    def test_empty_schema_accepts_anything(self):
+        assert compile_schema({})({'any': 'thing'}) is None
+
+
+class TestOptionalFields:
+    """Tests for the optional fields cleared instead of dropping the item."""
+
+    def test_required_fields_are_not_optional(self):
+        names = [name for name, _, _ in compile_optional_fields()]
+        assert 'description' in names
+        assert not {'animal_name', 'url'} & set(names)
+
+    def test_cleared_values(self):
+        fields = {name: (check, cleared) for name, check, cleared in compile_optional_fields()}
+        check, cleared = fields['description']
+        assert check('Panthera tigris') is not None
+        assert cleared is None
+        assert fields['locations'][1] == []